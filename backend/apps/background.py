@@ -0,0 +1,53 @@
+"""
+Background work started when a transaction commits
+
+Jobs are handed to a small named thread pool once the current transaction
+commits, so they never see uncommitted rows and never hold up the request,
+or run inline in the committing thread when the caller asks for it. A job
+that fails is logged rather than lost with its thread, and pool threads
+close their database connections after every job.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def dispatch(pool, workers, func, *args, inline=False):
+    """
+    Run ``func(*args)`` once the current transaction commits, on the thread
+    pool named ``pool`` (started with ``workers`` threads on first use), or
+    in the committing thread when ``inline`` is set
+    """
+    transaction.on_commit(lambda: submit(pool, workers, func, *args, inline=inline))
+
+
+def submit(pool, workers, func, *args, inline=False):
+    if inline:
+        return _run_logged(func, *args)
+    with _lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = _executors[pool] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=pool)
+    return executor.submit(_run, func, *args)
+
+
+def _run_logged(func, *args):
+    try:
+        return func(*args)
+    except Exception:
+        logger.exception("Background job %s%r failed", func.__name__, args)
+
+
+def _run(func, *args):
+    try:
+        return _run_logged(func, *args)
+    finally:
+        close_old_connections()
@@ -2,7 +2,7 @@
 Admin configuration for Bookings app
 """
 from django.contrib import admin
-from .models import Booking, RefundRequest
+from .models import Booking, RefundRequest, WaitlistEntry, SeatHold, TripCancellation
 
 
 @admin.register(Booking)
@@ -13,12 +13,12 @@ class BookingAdmin(admin.ModelAdmin):
     list_display = ('student', 'transport_option', 'booking_date', 'seats_booked', 'total_amount', 'booking_status', 'payment_status')
     list_filter = ('booking_status', 'payment_status', 'payment_method', 'booking_date', 'created_at')
     search_fields = ('student__user__first_name', 'student__user__last_name', 'student__student_id', 'transport_option__route_name')
-    readonly_fields = ('created_at', 'updated_at', 'payment_reference')
+    readonly_fields = ('created_at', 'updated_at', 'payment_reference', 'departure_at', 'arrival_at', 'boarded_at')
     
     fieldsets = (
-        ('Booking Information', {'fields': ('student', 'transport_option', 'booking_date', 'seats_booked')}),
-        ('Payment Information', {'fields': ('total_amount', 'platform_fee', 'organizer_amount', 'payment_method', 'payment_reference', 'payment_status')}),
-        ('Status', {'fields': ('booking_status', 'refund_status', 'refund_amount', 'refund_reason')}),
+        ('Booking Information', {'fields': ('student', 'transport_option', 'booking_date', 'seats_booked', 'departure_at', 'arrival_at')}),
+        ('Payment Information', {'fields': ('total_amount', 'platform_fee', 'organizer_amount', 'payment_method', 'payment_reference', 'payment_status', 'payment_due_at')}),
+        ('Status', {'fields': ('booking_status', 'boarded_at', 'refund_status', 'refund_amount', 'refund_reason')}),
         ('Additional Information', {'fields': ('special_requests',)}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
@@ -48,4 +48,55 @@ class RefundRequestAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
             'booking', 'student', 'student__user', 'organizer', 'organizer__user', 'processed_by'
-        )
\ No newline at end of file
+        )
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """
+    Waitlist Entry admin
+    """
+    list_display = ('student', 'transport_option', 'booking_date', 'seats_requested', 'priority', 'status', 'created_at')
+    list_filter = ('status', 'booking_date', 'created_at')
+    search_fields = ('student__user__first_name', 'student__user__last_name', 'student__student_id', 'transport_option__route_name')
+    list_editable = ('priority',)
+    readonly_fields = ('created_at', 'promoted_at', 'booking')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'student', 'student__user', 'transport_option'
+        )
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    """
+    Seat Hold admin
+    """
+    list_display = ('student', 'transport_option', 'booking_date', 'seats', 'status', 'expires_at')
+    list_filter = ('status', 'booking_date', 'created_at')
+    search_fields = ('student__user__first_name', 'student__user__last_name', 'student__student_id', 'transport_option__route_name')
+    readonly_fields = ('created_at', 'booking')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'student', 'student__user', 'transport_option'
+        )
+
+
+@admin.register(TripCancellation)
+class TripCancellationAdmin(admin.ModelAdmin):
+    """
+    Trip Cancellation admin
+    """
+    list_display = ('transport_option', 'service_date', 'status', 'total_bookings', 'bookings_cancelled', 'refunds_created', 'created_at')
+    list_filter = ('status', 'service_date', 'created_at')
+    search_fields = ('transport_option__route_name',)
+    readonly_fields = (
+        'trip_update', 'transport_option', 'service_date', 'total_bookings', 'bookings_cancelled',
+        'seats_released', 'refunds_created', 'notifications_sent', 'error',
+        'started_at', 'completed_at', 'created_at', 'updated_at'
+    )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('transport_option')
@@ -0,0 +1,145 @@
+"""
+Admission control for booking rushes
+
+Each protected queue (a route, or payments as a whole) admits requests at a
+fixed rate. Only requests with a valid access token take a slot. A request
+arriving while its queue has a free slot goes straight through; otherwise it
+is given a signed ticket carrying its user and admission time and turned
+away before any database work. Clients poll the ticket's position and retry
+with the ticket once it is admitted.
+
+Queue state lives in a pluggable backend: ``LocalAdmissionBackend`` keeps it
+in-process per node, ``CacheAdmissionBackend`` shares it through the Django
+cache.
+"""
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+SALT = 'bookings.admission'
+
+
+class LocalAdmissionBackend:
+    """
+    Queue state for this process only
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_free = {}
+        self._used = {}
+
+    def reserve(self, queue, interval, now, max_wait):
+        """
+        Admission time of the next slot in ``queue``, or None if it is
+        further away than ``max_wait`` seconds
+        """
+        with self._lock:
+            if len(self._next_free) > 10000:
+                # Queues whose next slot has passed are the same as new ones
+                self._next_free = {key: free_at for key, free_at in self._next_free.items() if free_at > now}
+            admit_at = max(now, self._next_free.get(queue, 0.0))
+            if admit_at - now > max_wait:
+                return None
+            self._next_free[queue] = admit_at + interval
+            return admit_at
+
+    def consume(self, ticket, ttl):
+        """
+        Mark a ticket used, returning False if it already was
+        """
+        now = time.time()
+        with self._lock:
+            if len(self._used) > 10000:
+                self._used = {key: expiry for key, expiry in self._used.items() if expiry > now}
+            if self._used.get(ticket, 0) > now:
+                return False
+            self._used[ticket] = now + ttl
+            return True
+
+
+class CacheAdmissionBackend:
+    """
+    Queue state shared by every node through the Django cache
+    """
+
+    def _acquire(self, queue):
+        lock = f'admission:lock:{queue}'
+        for _ in range(50):
+            if cache.add(lock, 1, timeout=1):
+                return lock
+            time.sleep(0.002)
+        return None
+
+    def reserve(self, queue, interval, now, max_wait):
+        lock = self._acquire(queue)
+        if lock is None:
+            return None
+        try:
+            key = f'admission:next:{queue}'
+            admit_at = max(now, cache.get(key, 0.0))
+            if admit_at - now > max_wait:
+                return None
+            cache.set(key, admit_at + interval, timeout=int(max_wait) + 60)
+            return admit_at
+        finally:
+            cache.delete(lock)
+
+    def consume(self, ticket, ttl):
+        return cache.add(f'admission:used:{ticket}', 1, timeout=int(ttl) + 1)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.ADMISSION_BACKEND)()
+    return _backend
+
+
+def interval_for(queue):
+    rate = settings.ADMISSION_PAYMENT_RATE if queue == 'payments' else settings.ADMISSION_ROUTE_RATE
+    return 1.0 / rate
+
+
+def issue_ticket(queue, admit_at, user_id):
+    """
+    A signed ticket for ``queue`` admitted at ``admit_at``, usable only by
+    ``user_id``, with its payload
+    """
+    ticket = {'q': queue, 'u': user_id, 't': uuid.uuid4().hex, 'a': admit_at}
+    return signing.dumps(ticket, salt=SALT, compress=True), ticket
+
+
+def read_ticket(token):
+    """
+    The payload of a queue ticket, or None if it is forged or stale
+    """
+    max_age = settings.ADMISSION_MAX_WAIT_SECONDS + settings.ADMISSION_TICKET_TTL_SECONDS
+    try:
+        return signing.loads(token, salt=SALT, max_age=max_age)
+    except signing.BadSignature:
+        return None
+
+
+def ticket_status(ticket, now=None):
+    """
+    Whether a ticket is admitted, and roughly how many requests are ahead of it
+    """
+    now = now or time.time()
+    wait = max(0.0, ticket['a'] - now)
+    return {
+        'admitted': wait == 0,
+        'position': math.ceil(wait / interval_for(ticket['q'])),
+        'retry_after': math.ceil(wait),
+        'expires_in': max(0, math.floor(ticket['a'] + settings.ADMISSION_TICKET_TTL_SECONDS - now)),
+    }
@@ -0,0 +1,133 @@
+"""
+Seat availability and price calendar for a route or corridor
+
+Seats booked per route and date come from one grouped query over bookings;
+the weekly schedule of each route decides which dates it runs on. Results
+are cached per route or corridor, and the cache is dropped whenever a
+booking or a route in that scope changes.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from apps.transport.models import TransportOption
+from .models import Booking
+
+
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def route_scope(transport_option_id):
+    return f'route:{transport_option_id}'
+
+
+def corridor_scope(departure_stop_id, destination_stop_id):
+    return f'corridor:{departure_stop_id}:{destination_stop_id}'
+
+
+def _version(scope):
+    return cache.get_or_set(f'availability:version:{scope}', lambda: uuid.uuid4().hex, None)
+
+
+def invalidate(transport_option):
+    """
+    Drop cached calendars covering a route, including its corridor
+    """
+    invalidate_many([transport_option])
+
+
+def invalidate_many(transport_options):
+    keys = set()
+    for option in transport_options:
+        keys.add(f'availability:version:{route_scope(option.pk)}')
+        current = (option.departure_stop_id, option.destination_stop_id)
+        # A route moved to other stops also leaves the corridor it was stored under
+        for departure_stop_id, destination_stop_id in {current, getattr(option, '_loaded_stops', current)}:
+            keys.add(f'availability:version:{corridor_scope(departure_stop_id, destination_stop_id)}')
+    cache.delete_many(list(keys))
+
+
+def booked_seats(option_ids, start, end):
+    """
+    {(transport_option_id, booking_date): seats} for active bookings in the window
+    """
+    rows = Booking.objects.filter(
+        transport_option_id__in=option_ids,
+        booking_date__gte=start,
+        booking_date__lte=end,
+        booking_status__in=ACTIVE_BOOKING_STATUSES
+    ).values('transport_option_id', 'booking_date').annotate(
+        seats=Sum('seats_booked')
+    ).order_by().values_list('transport_option_id', 'booking_date', 'seats')
+    return {(option_id, booking_date): seats for option_id, booking_date, seats in rows}
+
+
+def build_calendar(options, start, days):
+    """
+    Per-date remaining seats and cheapest price over a set of route rows
+    """
+    end = start + timedelta(days=days - 1)
+    booked = booked_seats([option['id'] for option in options], start, end)
+
+    by_weekday = [[] for _ in WEEKDAYS]
+    for option in options:
+        for day in set(option['days_of_operation'] or []):
+            if day in WEEKDAYS:
+                by_weekday[WEEKDAYS.index(day)].append(option)
+
+    calendar = []
+    for offset in range(days):
+        current = start + timedelta(days=offset)
+        remaining_seats = 0
+        routes_available = 0
+        cheapest_price = None
+        for option in by_weekday[current.weekday()]:
+            # available_seats also caps every date, as booking validation checks it
+            remaining = min(
+                option['available_seats'],
+                option['total_seats'] - booked.get((option['id'], current), 0)
+            )
+            if remaining <= 0:
+                continue
+            remaining_seats += remaining
+            routes_available += 1
+            if cheapest_price is None or option['price'] < cheapest_price:
+                cheapest_price = option['price']
+        calendar.append({
+            'date': current.isoformat(),
+            'operating': bool(by_weekday[current.weekday()]),
+            'remaining_seats': remaining_seats,
+            'routes_available': routes_available,
+            'cheapest_price': str(cheapest_price) if cheapest_price is not None else None,
+        })
+    return calendar
+
+
+def availability_calendar(start, days, transport_option_id=None, departure_stop_id=None, destination_stop_id=None):
+    """
+    Cached calendar for a single route, or for every route on a corridor
+    """
+    if transport_option_id:
+        scope = route_scope(transport_option_id)
+        options = TransportOption.objects.filter(pk=transport_option_id)
+    else:
+        scope = corridor_scope(departure_stop_id, destination_stop_id)
+        options = TransportOption.objects.filter(
+            departure_stop_id=departure_stop_id,
+            destination_stop_id=destination_stop_id
+        )
+
+    key = f'availability:{scope}:{_version(scope)}:{start.isoformat()}:{days}'
+    calendar = cache.get(key)
+    if calendar is None:
+        options = list(options.filter(
+            is_active=True,
+            organizer__approval_status='approved'
+        ).values('id', 'price', 'total_seats', 'available_seats', 'days_of_operation'))
+        calendar = build_calendar(options, start, days)
+        cache.set(key, calendar, settings.BOOKING_CALENDAR_CACHE_SECONDS)
+    return calendar
@@ -0,0 +1,142 @@
+"""
+Signed boarding passes checked offline at the vehicle
+
+A pass is a compact token, short enough for a QR code, carrying the
+booking, route, trip date and seats and signed with a key belonging to
+the route's organizer. An organizer's devices fetch that key once and can
+then verify passes with no connection; the boardings they record are
+uploaded later in one batch and written with a single bulk update.
+
+Token layout (base64url, no padding):
+
+    version     1 byte
+    booking     16 bytes (UUID)
+    route       16 bytes (UUID)
+    trip date   4 bytes, big-endian proleptic Gregorian ordinal
+    seats       2 bytes, big-endian
+    signature   first 16 bytes of HMAC-SHA256(organizer key, the fields above)
+"""
+import base64
+import hmac
+import struct
+import uuid
+from datetime import date
+from hashlib import sha256
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .models import Booking
+
+
+VERSION = 1
+SALT = 'bookings.boarding_pass'
+SIGNATURE_BYTES = 16
+_FIELDS = struct.Struct('>B16s16sIH')
+
+
+def organizer_key(organizer_id):
+    """
+    The key an organizer's passes are signed and verified with
+    """
+    return salted_hmac(SALT, str(organizer_id), secret=settings.BOARDING_PASS_SECRET, algorithm='sha256').digest()
+
+
+def _sign(key, payload):
+    return hmac.new(key, payload, sha256).digest()[:SIGNATURE_BYTES]
+
+
+def issue(booking):
+    """
+    A boarding pass token for a booking
+    """
+    payload = _FIELDS.pack(
+        VERSION,
+        booking.pk.bytes,
+        booking.transport_option_id.bytes,
+        booking.booking_date.toordinal(),
+        booking.seats_booked
+    )
+    token = payload + _sign(organizer_key(booking.transport_option.organizer_id), payload)
+    return base64.urlsafe_b64encode(token).rstrip(b'=').decode()
+
+
+def read(token, key):
+    """
+    The contents of a pass signed with ``key``, or None if it is malformed
+    or forged
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (ValueError, TypeError):
+        return None
+    if len(raw) != _FIELDS.size + SIGNATURE_BYTES:
+        return None
+    payload, signature = raw[:_FIELDS.size], raw[_FIELDS.size:]
+    if not hmac.compare_digest(signature, _sign(key, payload)):
+        return None
+    version, booking_id, option_id, ordinal, seats = _FIELDS.unpack(payload)
+    if version != VERSION:
+        return None
+    return {
+        'booking': uuid.UUID(bytes=booking_id),
+        'transport_option': uuid.UUID(bytes=option_id),
+        'booking_date': date.fromordinal(ordinal),
+        'seats': seats,
+    }
+
+
+def record_boardings(organizer, scans):
+    """
+    Mark the bookings behind scanned passes as boarded.
+
+    ``scans`` is a list of {'boarding_pass', 'boarded_at'} dicts. Bookings
+    are read in one query and updated in one batched write; a booking
+    scanned more than once keeps its earliest boarding time. Returns one
+    result per scan, in order.
+    """
+    key = organizer_key(organizer.pk)
+    now = timezone.now()
+    passes = [read(scan['boarding_pass'], key) for scan in scans]
+
+    results = [None] * len(scans)
+    with transaction.atomic():
+        bookings = Booking.objects.select_for_update().filter(
+            pk__in={boarding_pass['booking'] for boarding_pass in passes if boarding_pass},
+            transport_option__organizer=organizer
+        ).only('id', 'transport_option_id', 'booking_date', 'booking_status', 'boarded_at').in_bulk()
+
+        boarded = {}
+        for index, (scan, boarding_pass) in enumerate(zip(scans, passes)):
+            if boarding_pass is None:
+                results[index] = {'status': 'rejected', 'error': 'Invalid boarding pass.'}
+                continue
+            booking = bookings.get(boarding_pass['booking'])
+            result = {'booking': str(boarding_pass['booking'])}
+            if booking is None:
+                result.update(status='rejected', error='Booking not found.')
+            elif (booking.transport_option_id, booking.booking_date) != (
+                    boarding_pass['transport_option'], boarding_pass['booking_date']):
+                result.update(status='rejected', error='This pass is for a different trip than the booking.')
+            elif booking.booking_status != 'confirmed':
+                result.update(status='rejected', error=f'Booking is {booking.booking_status}.')
+            elif booking.boarded_at is not None and booking.pk not in boarded:
+                result.update(status='already_boarded', boarded_at=booking.boarded_at.isoformat())
+            else:
+                boarded_at = min(scan.get('boarded_at') or now, now)
+                if booking.pk in boarded:
+                    boarded_at = min(boarded_at, booking.boarded_at)
+                booking.boarded_at = boarded_at
+                booking.updated_at = now
+                boarded[booking.pk] = booking
+                result['status'] = 'boarded'
+            results[index] = result
+
+        Booking.objects.bulk_update(boarded.values(), ['boarded_at', 'updated_at'], batch_size=1000)
+
+    for result in results:
+        if result['status'] == 'boarded':
+            result['boarded_at'] = boarded[uuid.UUID(result['booking'])].boarded_at.isoformat()
+    return results
@@ -0,0 +1,188 @@
+"""
+Cancelling every booking on a cancelled trip
+
+A cancellation TripUpdate for a service date starts a TripCancellation.
+The trip's waitlist and seat holds are closed first, then its active
+bookings are worked through in chunks, each in its own short transaction:
+the chunk's rows are locked, cancelled with set-based UPDATEs, their seats
+returned to the route, refund requests created for paid bookings and the
+riders notified, all with bulk_create, and the progress counters advanced.
+
+Each chunk only picks up bookings that are still active, so a run that
+stops part way (a crash, a deploy) is resumed by running it again. Runs
+start after the cancelling transaction commits, on a background thread
+rather than in the request.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.background import dispatch as dispatch_background
+from apps.communications.models import Notification
+from apps.transport.models import TransportOption
+from .availability import ACTIVE_BOOKING_STATUSES, invalidate
+from .holds import forget
+from .models import Booking, RefundRequest, SeatHold, TripCancellation, WaitlistEntry
+
+
+def cancelled_dates(transport_option_id, start, end=None):
+    """
+    Dates between ``start`` and ``end`` on which the route's trip is cancelled
+    """
+    return set(TripCancellation.objects.filter(
+        transport_option_id=transport_option_id,
+        service_date__gte=start,
+        service_date__lte=end or start
+    ).values_list('service_date', flat=True))
+
+
+def start(trip_update):
+    """
+    The TripCancellation for a cancellation trip update, created if needed
+    """
+    cancellation, _ = TripCancellation.objects.get_or_create(
+        trip_update=trip_update,
+        defaults={
+            'transport_option_id': trip_update.transport_option_id,
+            'service_date': trip_update.service_date,
+        }
+    )
+    return cancellation
+
+
+def run(cancellation, chunk_size=None):
+    """
+    Work through a cancellation until every booking on the trip is
+    cancelled. Safe to call again on an unfinished or failed run.
+    """
+    chunk_size = chunk_size or settings.TRIP_CANCELLATION_CHUNK_SIZE
+    trip = TripCancellation.objects.filter(pk=cancellation.pk)
+    if cancellation.status == 'completed':
+        return cancellation
+
+    bookings = Booking.objects.filter(
+        transport_option_id=cancellation.transport_option_id,
+        booking_date=cancellation.service_date,
+        booking_status__in=ACTIVE_BOOKING_STATUSES
+    )
+    with transaction.atomic():
+        _close_trip(cancellation)
+        fields = {'status': 'running', 'error': None}
+        if cancellation.started_at is None:
+            fields.update(started_at=timezone.now(), total_bookings=bookings.count())
+        trip.update(**fields)
+
+    try:
+        while _cancel_chunk(cancellation, bookings, chunk_size):
+            pass
+    except Exception as exc:
+        trip.update(status='failed', error=str(exc), updated_at=timezone.now())
+        raise
+
+    trip.update(status='completed', completed_at=timezone.now(), updated_at=timezone.now())
+    invalidate(cancellation.transport_option)
+    cancellation.refresh_from_db()
+    return cancellation
+
+
+def dispatch(cancellation):
+    """
+    Run ``cancellation`` once the current transaction commits, on a
+    background thread unless TRIP_CANCELLATION_RUN_INLINE is on. A run that
+    fails is logged and left marked failed for resume_trip_cancellations.
+    """
+    dispatch_background(
+        'trip-cancellation', settings.TRIP_CANCELLATION_WORKERS, run, cancellation,
+        inline=settings.TRIP_CANCELLATION_RUN_INLINE
+    )
+
+
+def _close_trip(cancellation):
+    WaitlistEntry.objects.filter(
+        transport_option_id=cancellation.transport_option_id,
+        booking_date=cancellation.service_date,
+        status='waiting'
+    ).update(status='cancelled')
+    SeatHold.objects.filter(
+        transport_option_id=cancellation.transport_option_id,
+        booking_date=cancellation.service_date,
+        status='active'
+    ).update(status='released')
+    forget([(cancellation.transport_option_id, cancellation.service_date)])
+
+
+def _cancel_chunk(cancellation, bookings, chunk_size):
+    """
+    Cancel up to ``chunk_size`` bookings in one transaction, returning how
+    many were cancelled
+    """
+    with transaction.atomic():
+        option = TransportOption.objects.select_for_update().select_related('organizer').get(
+            pk=cancellation.transport_option_id
+        )
+        rows = list(bookings.select_for_update(of=('self',)).order_by('pk').values_list(
+            'id', 'student_id', 'student__user_id', 'seats_booked', 'payment_status', 'total_amount'
+        )[:chunk_size])
+        if not rows:
+            return 0
+
+        now = timezone.now()
+        ids = [row[0] for row in rows]
+        paid = {row[0]: (row[1], row[5]) for row in rows if row[4] == 'paid'}
+        Booking.objects.filter(pk__in=ids).update(booking_status='cancelled', updated_at=now)
+
+        seats = sum(row[3] for row in rows)
+        option.available_seats += seats
+        option.save()
+
+        refunds = _create_refunds(cancellation, option, paid)
+        notified = _notify(cancellation, option, rows, paid)
+        TripCancellation.objects.filter(pk=cancellation.pk).update(
+            bookings_cancelled=F('bookings_cancelled') + len(rows),
+            seats_released=F('seats_released') + seats,
+            refunds_created=F('refunds_created') + refunds,
+            notifications_sent=F('notifications_sent') + notified,
+            updated_at=now
+        )
+    return len(rows)
+
+
+def _create_refunds(cancellation, option, paid):
+    if not paid:
+        return 0
+    # Bookings may already have a refund request from before the cancellation
+    existing = set(RefundRequest.objects.filter(booking_id__in=list(paid)).values_list('booking_id', flat=True))
+    reason = f"Trip cancelled by the organizer: {cancellation.trip_update.title}"
+    created = RefundRequest.objects.bulk_create([
+        RefundRequest(
+            booking_id=booking_id,
+            student_id=student_id,
+            organizer=option.organizer,
+            refund_amount=amount,
+            reason=reason,
+            status='approved'
+        )
+        for booking_id, (student_id, amount) in paid.items() if booking_id not in existing
+    ], batch_size=500)
+    Booking.objects.filter(pk__in=[refund.booking_id for refund in created]).update(
+        refund_status='approved', refund_amount=F('total_amount')
+    )
+    return len(created)
+
+
+def _notify(cancellation, option, rows, paid):
+    update = cancellation.trip_update
+    title = f"Trip cancelled: {option.route_name} on {cancellation.service_date}"
+    notifications = [
+        Notification(
+            user_id=user_id,
+            title=title[:200],
+            message=update.message + (" Your payment will be refunded to your wallet." if booking_id in paid else ""),
+            notification_type='trip_update',
+            related_id=update.pk
+        )
+        for booking_id, _, user_id, _, _, _ in rows
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=500)
+    return len(notifications)
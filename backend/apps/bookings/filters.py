@@ -33,6 +33,9 @@ class RefundRequestFilter(django_filters.FilterSet):
     Filter for refund requests
     """
     status = django_filters.ChoiceFilter(choices=RefundRequest.REFUND_STATUS_CHOICES)
+    transport_option = django_filters.UUIDFilter(field_name='booking__transport_option')
+    booking_date = django_filters.DateFilter(field_name='booking__booking_date')
+    booking_status = django_filters.ChoiceFilter(field_name='booking__booking_status', choices=Booking.BOOKING_STATUS_CHOICES)
     min_amount = django_filters.NumberFilter(field_name='refund_amount', lookup_expr='gte')
     max_amount = django_filters.NumberFilter(field_name='refund_amount', lookup_expr='lte')
     created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
@@ -41,5 +44,6 @@ class RefundRequestFilter(django_filters.FilterSet):
     class Meta:
         model = RefundRequest
         fields = [
-            'status', 'min_amount', 'max_amount', 'created_after', 'created_before'
+            'status', 'organizer', 'transport_option', 'booking_date', 'booking_status',
+            'min_amount', 'max_amount', 'created_after', 'created_before'
         ]
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Short-lived seat holds during checkout
+
+A hold reserves seats on a route and date without touching the route's
+``available_seats``: held seats are subtracted wherever availability is
+checked and only become a booking when the hold is converted at payment.
+Active held-seat totals are kept in the cache (in-process unless a shared
+backend is configured) and read back from the seat_holds table on a miss;
+expired holds are reclaimed in bulk by ``release_expired_holds``.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.utils import timezone
+
+from apps.transport.models import TransportOption
+from apps.users.models import StudentProfile
+from .availability import booked_seats
+from .models import Booking, SeatHold, WaitlistEntry
+from .overlaps import clash, clash_message
+
+
+class HoldError(Exception):
+    """
+    A hold that cannot be placed or converted
+    """
+
+
+def _key(transport_option_id, booking_date):
+    return f'seat_holds:{transport_option_id}:{booking_date.isoformat()}'
+
+
+def forget(pairs):
+    """
+    Drop the cached held-seat totals of (option_id, booking_date) pairs
+    once the current transaction commits
+    """
+    keys = [_key(option_id, booking_date) for option_id, booking_date in pairs]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def held_seats(transport_option_id, booking_date, use_cache=True):
+    """
+    Seats held by active, unexpired holds on a route for a date
+    """
+    key = _key(transport_option_id, booking_date)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    now = timezone.now()
+    totals = SeatHold.objects.filter(
+        transport_option_id=transport_option_id,
+        booking_date=booking_date,
+        status='active',
+        expires_at__gt=now
+    ).aggregate(seats=Sum('seats'), next_expiry=Min('expires_at'))
+    seats = totals['seats'] or 0
+    # Never cache past the moment the first hold lapses
+    timeout = settings.SEAT_HOLD_CACHE_SECONDS
+    if totals['next_expiry']:
+        timeout = max(1, min(timeout, int((totals['next_expiry'] - now).total_seconds())))
+    cache.set(key, seats, timeout)
+    return seats
+
+
+def held_by_date(transport_option_id, start, end):
+    """
+    {booking_date: seats} held by active holds on a route over a date range
+    """
+    rows = SeatHold.objects.filter(
+        transport_option_id=transport_option_id,
+        booking_date__gte=start,
+        booking_date__lte=end,
+        status='active',
+        expires_at__gt=timezone.now()
+    ).values('booking_date').annotate(seats=Sum('seats')).order_by().values_list('booking_date', 'seats')
+    return dict(rows)
+
+
+def free_seats(option, booking_date, use_cache=True):
+    """
+    Seats still bookable on a route for a date, net of active holds
+    """
+    booked = booked_seats([option.pk], booking_date, booking_date).get((option.pk, booking_date), 0)
+    free = min(option.available_seats, option.total_seats - booked)
+    return max(0, free - held_seats(option.pk, booking_date, use_cache))
+
+
+def place_hold(student, option, booking_date, seats):
+    """
+    Reserve seats for checkout, failing if they are not free
+    """
+    with transaction.atomic():
+        if SeatHold.objects.filter(
+            student=student, status='active', expires_at__gt=timezone.now()
+        ).count() >= settings.SEAT_HOLD_MAX_ACTIVE:
+            raise HoldError(f"You can hold seats on at most {settings.SEAT_HOLD_MAX_ACTIVE} trips at a time.")
+
+        option = TransportOption.objects.select_for_update().get(pk=option.pk)
+        free = free_seats(option, booking_date, use_cache=False)
+        if seats > free:
+            raise HoldError(f"Only {free} seats available.")
+
+        hold = SeatHold.objects.create(
+            student=student,
+            transport_option=option,
+            booking_date=booking_date,
+            seats=seats,
+            expires_at=timezone.now() + timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+        )
+        forget([(option.pk, booking_date)])
+    return hold
+
+
+def release_hold(hold):
+    """
+    Give held seats back before the hold expires
+    """
+    with transaction.atomic():
+        released = SeatHold.objects.filter(pk=hold.pk, status='active').update(status='released')
+        if released:
+            forget([(hold.transport_option_id, hold.booking_date)])
+            _promote_waitlist([(hold.transport_option_id, hold.booking_date)])
+    return bool(released)
+
+
+def wallet_payment_rows(profile, booking, balance_before, now):
+    """
+    Unsaved payment Transaction and wallet debit for a booking paid from
+    ``profile``'s wallet when it held ``balance_before``
+    """
+    from apps.payments.models import Transaction, WalletTransaction
+
+    option = booking.transport_option
+    description = f"Booking on {option.route_name} for {booking.booking_date}"
+    payment = Transaction(
+        booking=booking,
+        student=profile,
+        organizer=option.organizer,
+        transaction_type='payment',
+        amount=booking.total_amount,
+        payment_method='wallet',
+        payment_reference=booking.payment_reference,
+        description=description,
+        status='success',
+        processed_at=now
+    )
+    debit = WalletTransaction(
+        student=profile,
+        transaction_type='debit',
+        amount=booking.total_amount,
+        balance_before=balance_before,
+        balance_after=balance_before - booking.total_amount,
+        reference_type='booking',
+        reference_id=booking.pk,
+        description=description
+    )
+    return payment, debit
+
+
+def _pay_from_wallet(student, booking):
+    profile = StudentProfile.objects.select_for_update().get(pk=student.pk)
+    if profile.wallet_balance < booking.total_amount:
+        raise HoldError("Insufficient wallet balance.")
+
+    booking.payment_reference = str(uuid.uuid4())
+    payment, debit = wallet_payment_rows(profile, booking, profile.wallet_balance, timezone.now())
+    payment.save()
+    debit.save()
+    profile.wallet_balance -= booking.total_amount
+    profile.save(update_fields=['wallet_balance'])
+    return payment
+
+
+def convert_hold(hold, payment_method, special_requests=None):
+    """
+    Turn an active hold into a booking.
+
+    Wallet payments are debited immediately and confirm the booking; other
+    methods leave a pending booking, as direct booking does.
+    """
+    with transaction.atomic():
+        hold = SeatHold.objects.select_for_update(of=('self',)).select_related('student').get(pk=hold.pk)
+        if hold.status != 'active':
+            raise HoldError(f"This hold is {hold.status}.")
+        if hold.is_expired:
+            raise HoldError("This hold has expired.")
+
+        option = TransportOption.objects.select_for_update().get(pk=hold.transport_option_id)
+        existing = clash(hold.student, option, hold.booking_date)
+        if existing:
+            raise HoldError(clash_message(existing))
+        booking = Booking(
+            student=hold.student,
+            transport_option=option,
+            booking_date=hold.booking_date,
+            seats_booked=hold.seats,
+            payment_method=payment_method,
+            special_requests=special_requests
+        )
+        booking.save()
+        if payment_method == 'wallet':
+            payment = _pay_from_wallet(hold.student, booking)
+            booking.booking_status = 'confirmed'
+            booking.payment_status = 'paid'
+            booking.payment_reference = payment.payment_reference
+            booking.save(update_fields=['booking_status', 'payment_status', 'payment_reference', 'updated_at'])
+
+        option.available_seats -= hold.seats
+        option.save()
+        hold.status = 'converted'
+        hold.booking = booking
+        hold.save(update_fields=['status', 'booking'])
+        forget([(option.pk, hold.booking_date)])
+    return booking
+
+
+def _promote_waitlist(pairs):
+    from .waitlist import promote
+
+    for option_id, booking_date in pairs:
+        if not WaitlistEntry.objects.filter(
+            transport_option_id=option_id, booking_date=booking_date, status='waiting'
+        ).exists():
+            continue
+        option = TransportOption.objects.select_for_update().get(pk=option_id)
+        if promote(option, booking_date):
+            option.save()
+
+
+def release_expired_holds(now=None):
+    """
+    Mark every lapsed hold expired in one update and hand the seats to any
+    waitlist. Returns the number of holds reclaimed.
+    """
+    now = now or timezone.now()
+    lapsed = SeatHold.objects.filter(status='active', expires_at__lte=now)
+    with transaction.atomic():
+        pairs = set(lapsed.values_list('transport_option_id', 'booking_date'))
+        expired = lapsed.update(status='expired')
+        if expired:
+            forget(pairs)
+            _promote_waitlist(sorted(pairs))
+    return expired
@@ -0,0 +1,16 @@
+"""
+Cancel unpaid bookings past their payment deadline and promote waitlisted students
+"""
+from django.core.management.base import BaseCommand
+
+from apps.bookings.waitlist import expire_pending_bookings
+
+
+class Command(BaseCommand):
+    help = 'Expire unpaid bookings past their payment deadline and fill the seats from the waitlist'
+
+    def handle(self, *args, **options):
+        expired, promoted = expire_pending_bookings()
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {expired} pending bookings and promoted {promoted} waitlist entries."
+        ))
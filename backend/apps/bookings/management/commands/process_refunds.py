@@ -0,0 +1,50 @@
+"""
+Approve, reject or process refund requests in bulk
+"""
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings import refunds
+from apps.bookings.filters import RefundRequestFilter
+from apps.bookings.models import RefundRequest
+
+
+class Command(BaseCommand):
+    help = 'Apply a refund transition to refund requests chosen by id or filter, crediting wallets when processing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=sorted(refunds.TRANSITIONS))
+        parser.add_argument('ids', nargs='*', help='Refund request ids')
+        parser.add_argument('--transport-option', help='Only refunds for bookings on this transport option')
+        parser.add_argument('--booking-date', help='Only refunds for bookings on this date (YYYY-MM-DD)')
+        parser.add_argument('--organizer', help='Only refunds owed by this organizer (id)')
+        parser.add_argument('--all', action='store_true', help='Every refund request the action applies to')
+        parser.add_argument('--notes', help='Admin notes recorded on every request')
+
+    def handle(self, *args, **options):
+        filters = {
+            'transport_option': options['transport_option'],
+            'booking_date': options['booking_date'],
+            'organizer': options['organizer'],
+        }
+        filters = {name: value for name, value in filters.items() if value}
+        if not (options['ids'] or filters or options['all']):
+            raise CommandError("Give refund request ids, a filter, or --all.")
+
+        refund_filter = RefundRequestFilter(filters, queryset=RefundRequest.objects.all())
+        if not refund_filter.is_valid():
+            raise CommandError(str(refund_filter.errors))
+        selected = refund_filter.qs
+        try:
+            if options['ids']:
+                selected = selected.filter(pk__in=options['ids'])
+            summary = refunds.apply(options['action'], selected, admin_notes=options['notes'])
+        except ValidationError as exc:
+            raise CommandError(' '.join(exc.messages))
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['changed']} refund requests {summary['status']}"
+            + (
+                f", {summary['credited']} credited to wallets, {summary['skipped']} skipped as unpaid or already refunded."
+                if summary['action'] == 'process' else "."
+            )
+        ))
@@ -0,0 +1,14 @@
+"""
+Reclaim lapsed seat holds in bulk
+"""
+from django.core.management.base import BaseCommand
+
+from apps.bookings.holds import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Mark lapsed seat holds expired and promote waitlisted students into the released seats'
+
+    def handle(self, *args, **options):
+        expired = release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f"Released {expired} expired seat holds."))
@@ -0,0 +1,33 @@
+"""
+Finish trip cancellations that have not completed
+"""
+from django.core.management.base import BaseCommand
+
+from apps.bookings import cancellations
+from apps.bookings.models import TripCancellation
+
+
+class Command(BaseCommand):
+    help = 'Run pending, interrupted and failed trip cancellations to completion'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help='Bookings cancelled per transaction')
+
+    def handle(self, *args, **options):
+        pending = TripCancellation.objects.exclude(status='completed').select_related(
+            'trip_update', 'transport_option'
+        ).order_by('created_at')
+        completed = failed = 0
+        for cancellation in pending:
+            try:
+                cancellation = cancellations.run(cancellation, chunk_size=options['chunk_size'])
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{cancellation.pk}: {exc}")
+                continue
+            completed += 1
+            self.stdout.write(
+                f"{cancellation.transport_option.route_name} ({cancellation.service_date}): "
+                f"{cancellation.bookings_cancelled} bookings cancelled, {cancellation.refunds_created} refunds created"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Completed {completed} trip cancellations, {failed} failed."))
@@ -0,0 +1,168 @@
+"""
+Passenger manifests for a route and date
+
+Confirmed passengers are read with values_list() over iterator(), so only
+the manifest columns are fetched and rows are written out as they arrive.
+CSV, compact JSON and a plain printable PDF are produced as streams and
+never hold the whole passenger list in memory.
+"""
+import csv
+import json
+
+from django.db.models import Count, Sum
+
+from apps.exports import CSVRenderer, Echo, csv_value
+from .models import Booking
+
+
+COLUMNS = (
+    ('booking', 'id'),
+    ('first_name', 'student__user__first_name'),
+    ('last_name', 'student__user__last_name'),
+    ('student_id', 'student__student_id'),
+    ('phone_number', 'student__user__phone_number'),
+    ('emergency_contact_name', 'student__emergency_contact_name'),
+    ('emergency_contact_phone', 'student__emergency_contact_phone'),
+    ('seats', 'seats_booked'),
+    ('payment_status', 'payment_status'),
+)
+CHUNK_SIZE = 500
+
+
+class PDFRenderer(CSVRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+def passengers(transport_option, booking_date):
+    return Booking.objects.filter(
+        transport_option=transport_option,
+        booking_date=booking_date,
+        booking_status='confirmed'
+    ).order_by('student__user__last_name', 'student__user__first_name', 'id')
+
+
+def summary(transport_option, booking_date):
+    totals = passengers(transport_option, booking_date).aggregate(bookings=Count('id'), seats=Sum('seats_booked'))
+    return {
+        'transport_option': str(transport_option.pk),
+        'route_name': transport_option.route_name,
+        'date': booking_date.isoformat(),
+        'departure_time': transport_option.departure_time.strftime('%H:%M'),
+        'departure_location': transport_option.departure_location,
+        'destination': transport_option.destination,
+        'bookings': totals['bookings'],
+        'seats_booked': totals['seats'] or 0,
+        'total_seats': transport_option.total_seats,
+    }
+
+
+def rows(transport_option, booking_date):
+    fields = [field for _, field in COLUMNS]
+    for row in passengers(transport_option, booking_date).values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        yield [str(row[0]), *row[1:]]
+
+
+def stream_csv(transport_option, booking_date):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in COLUMNS])
+    for row in rows(transport_option, booking_date):
+        yield writer.writerow([csv_value(value) for value in row])
+
+
+def stream_json(transport_option, booking_date):
+    head = json.dumps(summary(transport_option, booking_date), separators=(',', ':'))
+    yield head[:-1] + ',"columns":' + json.dumps([name for name, _ in COLUMNS], separators=(',', ':')) + ',"rows":['
+    separator = ''
+    for row in rows(transport_option, booking_date):
+        yield separator + json.dumps(row, separators=(',', ':'))
+        separator = ','
+    yield ']}'
+
+
+def _pdf_text(value):
+    text = str(value if value is not None else '')
+    text = text.encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+class _PDFStream:
+    """
+    Minimal text-only PDF written object by object, tracking byte offsets
+    so the cross-reference table can be emitted at the end
+    """
+    LINES_PER_PAGE = 48
+
+    def __init__(self):
+        self.offset = 0
+        self.offsets = {}
+        self.pages = []
+        # 1: catalog, 2: page tree, 3: font; pages follow
+        self.next_object = 4
+
+    def emit(self, data):
+        data = data.encode('latin-1')
+        self.offset += len(data)
+        return data
+
+    def obj(self, number, body):
+        self.offsets[number] = self.offset
+        return self.emit(f"{number} 0 obj\n{body}\nendobj\n")
+
+    def page(self, lines):
+        content = ['BT', '/F1 9 Tf', '11 TL', '40 800 Td']
+        content.extend(f"({_pdf_text(line)}) '" for line in lines)
+        content.append('ET')
+        stream = '\n'.join(content)
+        contents, page = self.next_object, self.next_object + 1
+        self.next_object += 2
+        self.pages.append(page)
+        return self.obj(contents, f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream") + self.obj(
+            page,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {contents} 0 R >>"
+        )
+
+    def finish(self):
+        kids = ' '.join(f"{page} 0 R" for page in self.pages)
+        data = self.obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>")
+        data += self.obj(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        xref_at = self.offset
+        total = self.next_object
+        xref = [f"xref\n0 {total}\n", "0000000000 65535 f \n"]
+        xref.extend(f"{self.offsets[number]:010d} 00000 n \n" for number in range(1, total))
+        data += self.emit(''.join(xref))
+        data += self.emit(f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n")
+        return data
+
+
+def stream_pdf(transport_option, booking_date):
+    pdf = _PDFStream()
+    yield pdf.emit('%PDF-1.4\n')
+    yield pdf.obj(3, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    info = summary(transport_option, booking_date)
+    header = [
+        f"Passenger manifest - {info['route_name']}",
+        f"{info['date']} {info['departure_time']}  {info['departure_location']} to {info['destination']}",
+        f"{info['bookings']} bookings, {info['seats_booked']} of {info['total_seats']} seats",
+        '',
+        f"{'Name':<32}{'Student ID':<16}{'Phone':<18}{'Emergency contact':<28}Seats",
+    ]
+    lines = list(header)
+    for row in rows(transport_option, booking_date):
+        name = f"{row[2]}, {row[1]}"
+        lines.append(f"{name[:31]:<32}{str(row[3])[:15]:<16}{str(row[4])[:17]:<18}{str(row[6])[:27]:<28}{row[7]}")
+        if len(lines) >= pdf.LINES_PER_PAGE:
+            yield pdf.page(lines)
+            lines = []
+    if lines or not pdf.pages:
+        yield pdf.page(lines)
+    yield pdf.finish()
+
+
+STREAMS = {
+    'csv': (stream_csv, 'text/csv'),
+    'json': (stream_json, 'application/json'),
+    'pdf': (stream_pdf, 'application/pdf'),
+}
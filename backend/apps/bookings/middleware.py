@@ -0,0 +1,126 @@
+"""
+Middleware for Bookings app
+"""
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import admission
+
+
+# URL names gated by admission control; routes queue separately, payments share a queue
+ROUTE_QUEUED = ('booking-create', 'booking-bulk', 'seat-holds', 'waitlist-join')
+PAYMENT_QUEUED = ('seat-hold-convert', 'wallet-topup')
+
+
+def _transport_option(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        value = data.get('transport_option') if isinstance(data, dict) else None
+    else:
+        value = request.POST.get('transport_option')
+    # Only well-formed ids get a queue, in one canonical spelling
+    try:
+        return str(uuid.UUID(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _user_id(request):
+    # Only the token's signature and expiry are checked; the view still authenticates fully
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        return str(AccessToken(raw_token)[api_settings.USER_ID_CLAIM])
+    except (AuthenticationFailed, TokenError, KeyError):
+        return None
+
+
+class AdmissionControlMiddleware:
+    """
+    Admit booking and payment requests at a fixed rate per queue, turning
+    the excess away with a queue ticket before the view runs
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.ADMISSION_CONTROL_ENABLED and request.method == 'POST':
+            queue = self.queue_for(request)
+            if queue:
+                refusal = self.admit(request, queue)
+                if refusal is not None:
+                    return refusal
+        return self.get_response(request)
+
+    def queue_for(self, request):
+        try:
+            url_name = resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+        if url_name in PAYMENT_QUEUED:
+            return 'payments'
+        if url_name in ROUTE_QUEUED:
+            option_id = _transport_option(request)
+            # Malformed requests are left for the view to reject
+            return f'route:{option_id}' if option_id else None
+        return None
+
+    def admit(self, request, queue):
+        # Anonymous requests would only be rejected by the view, so they never take a slot
+        user_id = _user_id(request)
+        if user_id is None:
+            return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+        now = time.time()
+        backend = admission.get_backend()
+        token = request.headers.get('X-Queue-Ticket')
+        if token:
+            ticket = admission.read_ticket(token)
+            if ticket is None or ticket['q'] != queue or ticket.get('u') != user_id:
+                return JsonResponse({'error': 'Invalid queue ticket.'}, status=400)
+            state = admission.ticket_status(ticket, now)
+            if not state['admitted']:
+                return self.wait(token, state)
+            if state['expires_in'] <= 0 or not backend.consume(ticket['t'], settings.ADMISSION_TICKET_TTL_SECONDS):
+                return JsonResponse({'error': 'This queue ticket has expired or was already used.'}, status=409)
+            return None
+
+        interval = admission.interval_for(queue)
+        # A burst of requests is admitted at once before queueing starts
+        tolerance = (settings.ADMISSION_BURST - 1) * interval
+        admit_at = backend.reserve(queue, interval, now, settings.ADMISSION_MAX_WAIT_SECONDS + tolerance)
+        if admit_at is None:
+            response = JsonResponse({'error': 'Too many requests right now. Please try again shortly.'}, status=503)
+            response['Retry-After'] = str(settings.ADMISSION_MAX_WAIT_SECONDS)
+            return response
+        admit_at -= tolerance
+        if admit_at <= now:
+            return None
+        token, ticket = admission.issue_ticket(queue, admit_at, user_id)
+        return self.wait(token, admission.ticket_status(ticket, now))
+
+    def wait(self, token, state):
+        response = JsonResponse({
+            'error': 'High demand: you are in the queue. Retry with the X-Queue-Ticket header once admitted.',
+            'queue_ticket': token,
+            'position': state['position'],
+            'retry_after': state['retry_after'],
+        }, status=429)
+        response['Retry-After'] = str(max(1, state['retry_after']))
+        return response
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:16
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_studentprofile_emergency_contact_phone_and_more'),
+        ('transport', '0007_route_popularity'),
+        ('bookings', '0004_alter_booking_booking_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('booking_date', models.DateField()),
+                ('seats_requested', models.IntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('payment_method', models.CharField(choices=[('wallet', 'Wallet'), ('mobile_money', 'Mobile Money'), ('bank_transfer', 'Bank Transfer'), ('card', 'Card')], max_length=20)),
+                ('priority', models.IntegerField(default=0, help_text='Higher priorities are promoted first; ties are first come, first served')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted'), ('cancelled', 'Cancelled')], default='waiting', max_length=20)),
+                ('promoted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='bookings.booking')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='users.studentprofile')),
+                ('transport_option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='transport.transportoption')),
+            ],
+            options={
+                'verbose_name': 'Waitlist Entry',
+                'verbose_name_plural': 'Waitlist Entries',
+                'db_table': 'waitlist_entries',
+                'ordering': ['-priority', 'created_at'],
+                'indexes': [models.Index(fields=['transport_option', 'booking_date', 'status', '-priority', 'created_at'], name='waitlist_queue_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('student', 'transport_option', 'booking_date'), name='waitlist_one_waiting_entry'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:18
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0007_route_popularity'),
+        ('users', '0002_alter_studentprofile_emergency_contact_phone_and_more'),
+        ('bookings', '0005_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('booking_date', models.DateField()),
+                ('seats', models.IntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('status', models.CharField(choices=[('active', 'Active'), ('converted', 'Converted'), ('released', 'Released'), ('expired', 'Expired')], default='active', max_length=20)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seat_hold', to='bookings.booking')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='users.studentprofile')),
+                ('transport_option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='transport.transportoption')),
+            ],
+            options={
+                'verbose_name': 'Seat Hold',
+                'verbose_name_plural': 'Seat Holds',
+                'db_table': 'seat_holds',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['transport_option', 'booking_date', 'status', 'expires_at'], name='seat_hold_active_idx'), models.Index(fields=['status', 'expires_at'], name='seat_hold_expiry_idx')],
+            },
+        ),
+    ]
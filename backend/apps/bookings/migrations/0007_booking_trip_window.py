@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:23
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_trip_windows(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    batch = []
+    for booking in Booking.objects.select_related('transport_option').only(
+        'id', 'booking_date', 'transport_option__departure_time', 'transport_option__arrival_time'
+    ).iterator(chunk_size=2000):
+        option = booking.transport_option
+        departure = timezone.make_aware(datetime.combine(booking.booking_date, option.departure_time))
+        arrival = timezone.make_aware(datetime.combine(booking.booking_date, option.arrival_time))
+        if arrival <= departure:
+            arrival += timedelta(days=1)
+        booking.departure_at, booking.arrival_at = departure, arrival
+        batch.append(booking)
+        if len(batch) >= 2000:
+            Booking.objects.bulk_update(batch, ['departure_at', 'arrival_at'])
+            batch = []
+    Booking.objects.bulk_update(batch, ['departure_at', 'arrival_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_seathold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='arrival_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='departure_at',
+            field=models.DateTimeField(blank=True, help_text='Trip start, from the booking date and route times', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['student', 'departure_at'], name='booking_student_window_idx'),
+        ),
+        migrations.RunPython(backfill_trip_windows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_trip_window'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='boarded_at',
+            field=models.DateTimeField(blank=True, help_text='When the boarding pass was scanned at the vehicle', null=True),
+        ),
+    ]
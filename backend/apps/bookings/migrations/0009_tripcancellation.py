@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0008_tripupdate_service_date'),
+        ('bookings', '0008_booking_boarded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripCancellation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('service_date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_bookings', models.IntegerField(default=0, help_text='Active bookings on the trip when cancellation started')),
+                ('bookings_cancelled', models.IntegerField(default=0)),
+                ('seats_released', models.IntegerField(default=0)),
+                ('refunds_created', models.IntegerField(default=0)),
+                ('notifications_sent', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('transport_option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cancellations', to='transport.transportoption')),
+                ('trip_update', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cancellation', to='transport.tripupdate')),
+            ],
+            options={
+                'verbose_name': 'Trip Cancellation',
+                'verbose_name_plural': 'Trip Cancellations',
+                'db_table': 'trip_cancellations',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['transport_option', 'service_date'], name='trip_cancellation_trip_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:05
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def deadline_promotions(apps, schema_editor):
+    # Unpaid waitlist promotions keep the deadline they were notified about
+    WaitlistEntry = apps.get_model('bookings', 'WaitlistEntry')
+    Booking = apps.get_model('bookings', 'Booking')
+    window = timedelta(minutes=settings.BOOKING_PENDING_EXPIRY_MINUTES)
+    for booking_id, promoted_at in WaitlistEntry.objects.filter(
+        status='promoted',
+        promoted_at__isnull=False,
+        booking__booking_status='pending',
+        booking__payment_status='pending'
+    ).values_list('booking_id', 'promoted_at').iterator(chunk_size=2000):
+        Booking.objects.filter(pk=booking_id).update(payment_due_at=promoted_at + window)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_tripcancellation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='payment_due_at',
+            field=models.DateTimeField(blank=True, help_text='Unpaid bookings are released after this, e.g. seats promoted from the waitlist', null=True),
+        ),
+        migrations.RunPython(deadline_promotions, migrations.RunPython.noop),
+    ]
@@ -2,12 +2,13 @@
 Booking models for BUI Transport System
 """
 import uuid
+from decimal import Decimal
 from django.db import models
-from datetime import date
+from datetime import date, datetime, timedelta
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from apps.users.models import User, StudentProfile
-from apps.transport.models import TransportOption
+from apps.transport.models import TransportOption, TripUpdate
 
 
 class Booking(models.Model):
@@ -43,6 +44,9 @@ class Booking(models.Model):
         ('processed', 'Processed'),
     ]
     
+    # Share of every booking's total kept by the platform
+    PLATFORM_FEE_RATE = Decimal('0.05')
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student = models.ForeignKey(
         StudentProfile, 
@@ -67,6 +71,10 @@ class Booking(models.Model):
     refund_status = models.CharField(max_length=20, choices=REFUND_STATUS_CHOICES, default='none')
     refund_reason = models.TextField(blank=True, null=True)
     special_requests = models.TextField(blank=True, null=True)
+    departure_at = models.DateTimeField(blank=True, null=True, help_text="Trip start, from the booking date and route times")
+    arrival_at = models.DateTimeField(blank=True, null=True)
+    boarded_at = models.DateTimeField(blank=True, null=True, help_text="When the boarding pass was scanned at the vehicle")
+    payment_due_at = models.DateTimeField(blank=True, null=True, help_text="Unpaid bookings are released after this, e.g. seats promoted from the waitlist")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -75,17 +83,36 @@ class Booking(models.Model):
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['student', 'departure_at'], name='booking_student_window_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.user.first_name} - {self.transport_option.route_name} ({self.booking_date})"
     
+    @staticmethod
+    def trip_window(transport_option, booking_date):
+        """
+        (departure, arrival) datetimes of a route's trip on a date; trips
+        arriving at an earlier clock time than they leave end the next day
+        """
+        departure = timezone.make_aware(datetime.combine(booking_date, transport_option.departure_time))
+        arrival = timezone.make_aware(datetime.combine(booking_date, transport_option.arrival_time))
+        if arrival <= departure:
+            arrival += timedelta(days=1)
+        return departure, arrival
+    
     def save(self, *args, **kwargs):
+        if self.departure_at is None:
+            self.departure_at, self.arrival_at = self.trip_window(self.transport_option, self.booking_date)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'departure_at', 'arrival_at'}
+        
         # Calculate amounts if not set
         if not self.total_amount:
             self.total_amount = self.transport_option.price * self.seats_booked
         if not self.organizer_amount:
-            # Platform fee is 5% of total amount
-            self.platform_fee = self.total_amount * 0.05
+            self.platform_fee = self.total_amount * self.PLATFORM_FEE_RATE
             self.organizer_amount = self.total_amount - self.platform_fee
         
         super().save(*args, **kwargs)
@@ -139,4 +166,170 @@ class RefundRequest(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"Refund Request - {self.booking} ({self.status})"
\ No newline at end of file
+        return f"Refund Request - {self.booking} ({self.status})"
+
+
+class WaitlistEntry(models.Model):
+    """
+    Students queued for a sold-out route and date
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(
+        StudentProfile, 
+        on_delete=models.CASCADE, 
+        related_name='waitlist_entries'
+    )
+    transport_option = models.ForeignKey(
+        TransportOption, 
+        on_delete=models.CASCADE, 
+        related_name='waitlist_entries'
+    )
+    booking_date = models.DateField()
+    seats_requested = models.IntegerField(default=1, validators=[MinValueValidator(1)])
+    payment_method = models.CharField(max_length=20, choices=Booking.PAYMENT_METHOD_CHOICES)
+    priority = models.IntegerField(default=0, help_text="Higher priorities are promoted first; ties are first come, first served")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    booking = models.OneToOneField(
+        Booking, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        blank=True,
+        related_name='waitlist_entry'
+    )
+    promoted_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'waitlist_entries'
+        verbose_name = 'Waitlist Entry'
+        verbose_name_plural = 'Waitlist Entries'
+        ordering = ['-priority', 'created_at']
+        indexes = [
+            models.Index(
+                fields=['transport_option', 'booking_date', 'status', '-priority', 'created_at'],
+                name='waitlist_queue_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'transport_option', 'booking_date'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_one_waiting_entry'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.user.first_name} waiting for {self.transport_option.route_name} ({self.booking_date})"
+
+
+class SeatHold(models.Model):
+    """
+    Seats reserved for a few minutes while a student checks out
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('converted', 'Converted'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(
+        StudentProfile, 
+        on_delete=models.CASCADE, 
+        related_name='seat_holds'
+    )
+    transport_option = models.ForeignKey(
+        TransportOption, 
+        on_delete=models.CASCADE, 
+        related_name='seat_holds'
+    )
+    booking_date = models.DateField()
+    seats = models.IntegerField(default=1, validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    expires_at = models.DateTimeField()
+    booking = models.OneToOneField(
+        Booking, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        blank=True,
+        related_name='seat_hold'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'seat_holds'
+        verbose_name = 'Seat Hold'
+        verbose_name_plural = 'Seat Holds'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['transport_option', 'booking_date', 'status', 'expires_at'], name='seat_hold_active_idx'),
+            models.Index(fields=['status', 'expires_at'], name='seat_hold_expiry_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.seats} seat(s) on {self.transport_option.route_name} ({self.booking_date}) - {self.status}"
+    
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class TripCancellation(models.Model):
+    """
+    Progress of cancelling every booking on a cancelled trip
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    trip_update = models.OneToOneField(
+        TripUpdate, 
+        on_delete=models.CASCADE, 
+        related_name='cancellation'
+    )
+    transport_option = models.ForeignKey(
+        TransportOption, 
+        on_delete=models.CASCADE, 
+        related_name='cancellations'
+    )
+    service_date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_bookings = models.IntegerField(default=0, help_text="Active bookings on the trip when cancellation started")
+    bookings_cancelled = models.IntegerField(default=0)
+    seats_released = models.IntegerField(default=0)
+    refunds_created = models.IntegerField(default=0)
+    notifications_sent = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'trip_cancellations'
+        verbose_name = 'Trip Cancellation'
+        verbose_name_plural = 'Trip Cancellations'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['transport_option', 'service_date'], name='trip_cancellation_trip_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.transport_option.route_name} ({self.service_date}) - {self.status}"
+    
+    @property
+    def progress(self):
+        if not self.total_bookings:
+            return 1.0 if self.status == 'completed' else 0.0
+        return round(min(self.bookings_cancelled / self.total_bookings, 1.0), 4)
@@ -0,0 +1,96 @@
+"""
+Overlapping trips in a student's schedule
+
+Every booking stores its trip window (departure_at, arrival_at). No trip
+lasts more than a day, so only trips departing less than a day before a
+window starts can reach into it; that bound turns each check into a short
+range scan of the (student, departure_at) index.
+"""
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .availability import ACTIVE_BOOKING_STATUSES
+from .models import Booking
+
+
+MAX_TRIP = timedelta(days=1)
+
+
+def _active(student):
+    return Booking.objects.filter(student=student, booking_status__in=ACTIVE_BOOKING_STATUSES)
+
+
+def overlapping(student, departure, arrival):
+    """
+    The student's active bookings whose trips overlap [departure, arrival)
+    """
+    return _active(student).filter(
+        departure_at__gt=departure - MAX_TRIP,
+        departure_at__lt=arrival,
+        arrival_at__gt=departure
+    )
+
+
+def clash(student, transport_option, booking_date):
+    """
+    An active booking that a trip on ``booking_date`` would overlap, if any
+    """
+    departure, arrival = Booking.trip_window(transport_option, booking_date)
+    return overlapping(student, departure, arrival).select_related('transport_option').order_by('departure_at').first()
+
+
+def clash_message(booking):
+    departure = timezone.localtime(booking.departure_at)
+    arrival = timezone.localtime(booking.arrival_at)
+    return (
+        f"This trip overlaps your booking on {booking.transport_option.route_name} "
+        f"({departure:%Y-%m-%d %H:%M} to {arrival:%H:%M})."
+    )
+
+
+def clashes_by_date(student, transport_option, dates):
+    """
+    {date: overlapping booking} for trips on many dates, from one query
+    """
+    windows = {booking_date: Booking.trip_window(transport_option, booking_date) for booking_date in dates}
+    if not windows:
+        return {}
+    starts = [departure for departure, _ in windows.values()]
+    ends = [arrival for _, arrival in windows.values()]
+    existing = list(_active(student).filter(
+        departure_at__gt=min(starts) - MAX_TRIP,
+        departure_at__lt=max(ends)
+    ).select_related('transport_option').order_by('departure_at'))
+    departures = [booking.departure_at for booking in existing]
+
+    clashes = {}
+    for booking_date, (departure, arrival) in windows.items():
+        index = bisect_left(departures, departure - MAX_TRIP)
+        while index < len(existing) and departures[index] < arrival:
+            if existing[index].arrival_at > departure:
+                clashes[booking_date] = existing[index]
+                break
+            index += 1
+    return clashes
+
+
+def schedule_conflicts(student, since=None):
+    """
+    Pairs of overlapping active bookings in the student's schedule from
+    ``since`` (default now), found in one sweep over bookings ordered by
+    departure
+    """
+    since = since or timezone.now()
+    bookings = _active(student).filter(
+        arrival_at__gt=since
+    ).select_related('transport_option').order_by('departure_at')
+
+    conflicts = []
+    open_trips = []
+    for booking in bookings:
+        open_trips = [other for other in open_trips if other.arrival_at > booking.departure_at]
+        conflicts.extend((other, booking) for other in open_trips)
+        open_trips.append(booking)
+    return conflicts
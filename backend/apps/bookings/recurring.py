@@ -0,0 +1,169 @@
+"""
+Bookings for many dates of one route in a single request
+
+All dates are checked in one pass against one grouped query each for
+booked and held seats, with the route row locked; bookings and their
+payment records are then written with bulk_create. Dates are booked all
+or nothing unless partial booking is requested.
+"""
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.transport.models import TransportOption
+from apps.transport.trending import trending
+from apps.users.models import StudentProfile
+from .availability import WEEKDAYS, booked_seats, invalidate
+from .cancellations import cancelled_dates
+from .holds import held_by_date, wallet_payment_rows
+from .models import Booking
+from .overlaps import clash_message, clashes_by_date
+
+
+def expand_dates(option, start, end, weekdays=None):
+    """
+    Dates between ``start`` and ``end`` on which the route runs, limited to
+    ``weekdays`` when given
+    """
+    days = set(option.days_of_operation)
+    if weekdays:
+        days &= set(weekdays)
+    dates = []
+    current = start
+    while current <= end:
+        if WEEKDAYS[current.weekday()] in days:
+            dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+
+def _reject(results, booking_date, error):
+    results[booking_date] = {'date': booking_date.isoformat(), 'status': 'rejected', 'error': error}
+
+
+def book_dates(student, option, dates, seats, payment_method, partial=False, special_requests=None):
+    """
+    Book ``seats`` on every date in ``dates``.
+
+    Returns (bookings, results) where results has one entry per date, in
+    date order. Without ``partial`` nothing is written unless every date
+    can be booked.
+    """
+    dates = sorted(set(dates))
+    results = {}
+    today = timezone.now().date()
+
+    with transaction.atomic():
+        option = TransportOption.objects.select_for_update().get(pk=option.pk)
+        if not option.is_active or option.organizer.approval_status != 'approved':
+            for booking_date in dates:
+                _reject(results, booking_date, "This transport option is not available.")
+            return [], [results[booking_date] for booking_date in dates]
+
+        booked = booked_seats([option.pk], dates[0], dates[-1])
+        held = held_by_date(option.pk, dates[0], dates[-1])
+        cancelled = cancelled_dates(option.pk, dates[0], dates[-1])
+        available = option.available_seats
+        price = option.price * seats
+        fee = price * Booking.PLATFORM_FEE_RATE
+
+        profile = balance = None
+        if payment_method == 'wallet':
+            profile = StudentProfile.objects.select_for_update().get(pk=student.pk)
+            balance = profile.wallet_balance
+
+        clashes = clashes_by_date(student, option, dates)
+        accepted = []
+        for booking_date in dates:
+            day_name = WEEKDAYS[booking_date.weekday()]
+            if booking_date < today:
+                _reject(results, booking_date, "Booking date cannot be in the past.")
+                continue
+            if day_name not in option.days_of_operation:
+                _reject(results, booking_date, f"This transport option does not operate on {day_name}.")
+                continue
+            if booking_date in cancelled:
+                _reject(results, booking_date, "This trip has been cancelled.")
+                continue
+            if booking_date in clashes:
+                _reject(results, booking_date, clash_message(clashes[booking_date]))
+                continue
+            free = min(available, option.total_seats - booked.get((option.pk, booking_date), 0)) - held.get(booking_date, 0)
+            if seats > free:
+                _reject(results, booking_date, f"Only {max(free, 0)} seats available.")
+                continue
+            if balance is not None:
+                if balance < price:
+                    _reject(results, booking_date, "Insufficient wallet balance.")
+                    continue
+                balance -= price
+            available -= seats
+            accepted.append(booking_date)
+
+        if not accepted or (len(accepted) < len(dates) and not partial):
+            for booking_date in accepted:
+                results[booking_date] = {
+                    'date': booking_date.isoformat(), 'status': 'rejected',
+                    'error': "Not booked because other dates could not be booked."
+                }
+            return [], [results[booking_date] for booking_date in dates]
+
+        paid = payment_method == 'wallet'
+        bookings = []
+        for booking_date in accepted:
+            departure_at, arrival_at = Booking.trip_window(option, booking_date)
+            bookings.append(Booking(
+                student=student,
+                transport_option=option,
+                booking_date=booking_date,
+                departure_at=departure_at,
+                arrival_at=arrival_at,
+                seats_booked=seats,
+                total_amount=price,
+                platform_fee=fee,
+                organizer_amount=price - fee,
+                payment_method=payment_method,
+                booking_status='confirmed' if paid else 'pending',
+                payment_status='paid' if paid else 'pending',
+                payment_reference=str(uuid.uuid4()) if paid else None,
+                special_requests=special_requests
+            ))
+        Booking.objects.bulk_create(bookings, batch_size=500)
+        if paid:
+            _record_wallet_payments(profile, bookings)
+
+        option.available_seats -= seats * len(bookings)
+        option.save()
+
+    invalidate(option)
+    moments = [booking.created_at for booking in bookings]
+
+    def record_bookings():
+        for moment in moments:
+            trending.record_booking(option.pk, moment)
+
+    transaction.on_commit(record_bookings)
+    for booking in bookings:
+        results[booking.booking_date] = {
+            'date': booking.booking_date.isoformat(), 'status': 'booked', 'booking': str(booking.pk)
+        }
+    return bookings, [results[booking_date] for booking_date in dates]
+
+
+def _record_wallet_payments(profile, bookings):
+    from apps.payments.models import Transaction, WalletTransaction
+
+    now = timezone.now()
+    balance = profile.wallet_balance
+    payments, debits = [], []
+    for booking in bookings:
+        payment, debit = wallet_payment_rows(profile, booking, balance, now)
+        payments.append(payment)
+        debits.append(debit)
+        balance -= booking.total_amount
+    Transaction.objects.bulk_create(payments, batch_size=500)
+    WalletTransaction.objects.bulk_create(debits, batch_size=500)
+    profile.wallet_balance = balance
+    profile.save(update_fields=['wallet_balance'])
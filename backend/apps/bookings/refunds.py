@@ -0,0 +1,192 @@
+"""
+Refund request processing in bulk
+
+Refund requests move pending -> approved -> processed, or pending ->
+rejected. A transition is applied to every selected request in one
+transaction, a batch at a time: request and booking rows are updated with
+set-based UPDATEs, processed refunds are credited to the students' wallets
+with one UPDATE per batch, and the ledger entries and notifications are
+written with bulk_create. Only paid bookings are refunded, and never for
+more than what is left of their total after earlier refunds.
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.utils import timezone
+
+from apps.communications.models import Notification
+from apps.users.models import StudentProfile
+from .models import Booking, RefundRequest
+
+
+# action: (status it applies to, resulting status)
+TRANSITIONS = {
+    'approve': ('pending', 'approved'),
+    'reject': ('pending', 'rejected'),
+    'process': ('approved', 'processed'),
+}
+ACTION_FOR_STATUS = {target: action for action, (_, target) in TRANSITIONS.items()}
+
+_MESSAGES = {
+    'approved': ("Refund approved", "Your refund of {amount} has been approved and will be credited to your wallet."),
+    'rejected': ("Refund rejected", "Your refund request for {amount} has been rejected."),
+    'processed': ("Refund credited", "{amount} has been credited to your wallet."),
+}
+
+
+def apply(action, refunds, user=None, admin_notes=None):
+    """
+    Apply ``action`` to the refund requests in the ``refunds`` queryset.
+
+    Requests not in the action's source status are left alone, as are
+    requests to process whose booking is not paid. Returns a summary with
+    the number of requests changed and skipped and the amount credited.
+    """
+    source, target = TRANSITIONS[action]
+    batch_size = settings.REFUND_BATCH_SIZE
+    changed = skipped = 0
+    credited = Decimal('0')
+
+    with transaction.atomic():
+        ids = list(refunds.filter(status=source).order_by('created_at').values_list('id', flat=True))
+        for start in range(0, len(ids), batch_size):
+            rows = list(RefundRequest.objects.select_for_update().filter(
+                pk__in=ids[start:start + batch_size], status=source
+            ).values_list('id', 'booking_id', 'student_id', 'organizer_id', 'refund_amount'))
+            if target == 'processed':
+                payable = _payable(rows)
+                skipped += len(rows) - len(payable)
+                rows = payable
+            if not rows:
+                continue
+            _transition(rows, target, user, admin_notes)
+            if target == 'processed':
+                credited += _credit_wallets(rows)
+            _notify(rows, target)
+            changed += len(rows)
+
+    return {'action': action, 'status': target, 'changed': changed, 'skipped': skipped, 'credited': credited}
+
+
+def _payable(rows):
+    """
+    The rows whose booking is paid and not yet fully refunded, with each
+    amount cut down to what is left of the booking's total
+    """
+    from apps.payments.models import Transaction
+
+    remaining = dict(Booking.objects.select_for_update().filter(
+        pk__in={row[1] for row in rows}, payment_status='paid'
+    ).values_list('id', 'total_amount'))
+    refunded = Transaction.objects.filter(
+        booking_id__in=remaining, transaction_type='refund', status='success'
+    ).values('booking_id').annotate(total=Sum('amount')).values_list('booking_id', 'total')
+    for booking_id, total in refunded:
+        remaining[booking_id] -= total
+
+    payable = []
+    for refund_id, booking_id, student_id, organizer_id, amount in rows:
+        if remaining.get(booking_id, 0) <= 0:
+            continue
+        amount = min(amount, remaining[booking_id])
+        remaining[booking_id] -= amount
+        payable.append((refund_id, booking_id, student_id, organizer_id, amount))
+    return payable
+
+
+def _transition(rows, target, user, admin_notes):
+    now = timezone.now()
+    fields = {'status': target, 'processed_by': user, 'processed_at': now}
+    if admin_notes:
+        fields['admin_notes'] = admin_notes
+    if target == 'processed':
+        # Record the amount actually credited
+        fields['refund_amount'] = Case(
+            *[When(pk=refund_id, then=Value(amount)) for refund_id, _, _, _, amount in rows],
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        )
+    RefundRequest.objects.filter(pk__in=[row[0] for row in rows]).update(**fields)
+
+    bookings = Booking.objects.filter(pk__in={row[1] for row in rows})
+    if target == 'processed':
+        amounts = defaultdict(Decimal)
+        for _, booking_id, _, _, amount in rows:
+            amounts[booking_id] += amount
+        bookings.update(
+            refund_status=target,
+            payment_status='refunded',
+            refund_amount=Case(
+                *[When(pk=booking_id, then=Value(amount)) for booking_id, amount in amounts.items()],
+                output_field=DecimalField(max_digits=10, decimal_places=2)
+            ),
+            updated_at=now
+        )
+    else:
+        bookings.update(refund_status=target, updated_at=now)
+
+
+def _credit_wallets(rows):
+    from apps.payments.models import Transaction, WalletTransaction
+
+    totals = defaultdict(Decimal)
+    for _, _, student_id, _, amount in rows:
+        totals[student_id] += amount
+    balances = dict(StudentProfile.objects.select_for_update().filter(
+        pk__in=totals
+    ).values_list('id', 'wallet_balance'))
+    StudentProfile.objects.filter(pk__in=totals).update(wallet_balance=Case(
+        *[When(pk=student_id, then=F('wallet_balance') + Value(total)) for student_id, total in totals.items()],
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    ))
+
+    now = timezone.now()
+    refunds, credits = [], []
+    for refund_id, booking_id, student_id, organizer_id, amount in rows:
+        description = f"Refund of booking {booking_id}"
+        refunds.append(Transaction(
+            booking_id=booking_id,
+            student_id=student_id,
+            organizer_id=organizer_id,
+            transaction_type='refund',
+            amount=amount,
+            payment_method='wallet',
+            payment_reference=str(uuid.uuid4()),
+            description=description,
+            status='success',
+            processed_at=now
+        ))
+        credits.append(WalletTransaction(
+            student_id=student_id,
+            transaction_type='credit',
+            amount=amount,
+            balance_before=balances[student_id],
+            balance_after=balances[student_id] + amount,
+            reference_type='refund',
+            reference_id=refund_id,
+            description=description
+        ))
+        balances[student_id] += amount
+    Transaction.objects.bulk_create(refunds, batch_size=500)
+    WalletTransaction.objects.bulk_create(credits, batch_size=500)
+    return sum(totals.values(), Decimal('0'))
+
+
+def _notify(rows, target):
+    users = dict(StudentProfile.objects.filter(
+        pk__in={row[2] for row in rows}
+    ).values_list('id', 'user_id'))
+    title, message = _MESSAGES[target]
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=users[student_id],
+            title=title,
+            message=message.format(amount=amount),
+            notification_type='payment',
+            related_id=refund_id
+        )
+        for refund_id, _, student_id, _, amount in rows
+    ], batch_size=500)
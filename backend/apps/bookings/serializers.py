@@ -1,10 +1,20 @@
 """
 Serializers for Bookings app
 """
+from django.conf import settings
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Booking, RefundRequest
+from .models import Booking, RefundRequest, WaitlistEntry, SeatHold, TripCancellation
+from .availability import WEEKDAYS
+from .cancellations import cancelled_dates
+from .filters import RefundRequestFilter
+from .holds import free_seats, held_seats
+from .overlaps import clash, clash_message
+from .recurring import expand_dates
+from .refunds import TRANSITIONS
+from .waitlist import position
 from apps.users.serializers import StudentProfileSerializer
+from apps.transport.models import TransportOption
 from apps.transport.serializers import TransportOptionSerializer
 
 
@@ -20,12 +30,12 @@ class BookingSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'student', 'transport_option', 'booking_date', 'seats_booked',
             'total_amount', 'platform_fee', 'organizer_amount', 'booking_status',
-            'payment_status', 'payment_method', 'payment_reference', 'refund_amount',
-            'refund_status', 'refund_reason', 'special_requests', 'created_at', 'updated_at'
+            'payment_status', 'payment_method', 'payment_reference', 'payment_due_at', 'refund_amount',
+            'refund_status', 'refund_reason', 'special_requests', 'boarded_at', 'created_at', 'updated_at'
         )
         read_only_fields = (
             'id', 'total_amount', 'platform_fee', 'organizer_amount', 
-            'payment_reference', 'refund_amount', 'refund_status', 'created_at', 'updated_at'
+            'payment_reference', 'payment_due_at', 'refund_amount', 'refund_status', 'boarded_at', 'created_at', 'updated_at'
         )
 
 
@@ -62,10 +72,11 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if transport_option.organizer.approval_status != 'approved':
             raise serializers.ValidationError("This transport option is not available.")
         
-        # Check seat availability
-        if seats_booked > transport_option.available_seats:
+        # Check seat availability, leaving seats held by other checkouts alone
+        available = transport_option.available_seats - held_seats(transport_option.pk, attrs['booking_date'])
+        if seats_booked > available:
             raise serializers.ValidationError(
-                f"Only {transport_option.available_seats} seats available."
+                f"Only {max(available, 0)} seats available."
             )
         
         # Check if booking date is valid for the transport option
@@ -75,6 +86,16 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 f"This transport option does not operate on {day_name}."
             )
+        if cancelled_dates(transport_option.pk, booking_date):
+            raise serializers.ValidationError("This trip has been cancelled.")
+        
+        # Check the trip does not overlap another of the student's trips
+        request = self.context.get('request')
+        student = getattr(request.user, 'student_profile', None) if request else None
+        if student is not None:
+            existing = clash(student, transport_option, booking_date)
+            if existing:
+                raise serializers.ValidationError(clash_message(existing))
         
         return attrs
 
@@ -186,4 +207,260 @@ class RefundRequestUpdateSerializer(serializers.ModelSerializer):
                     f"Cannot change status from {current_status} to {value}."
                 )
         
-        return value
\ No newline at end of file
+        return value
+
+
+class BulkRefundSerializer(serializers.Serializer):
+    """
+    A refund transition for many requests, chosen by ID or by filter
+    """
+    action = serializers.ChoiceField(choices=sorted(TRANSITIONS))
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filters = serializers.DictField(required=False)
+    all = serializers.BooleanField(default=False, help_text="Apply the action to every refund request")
+    admin_notes = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_filters(self, value):
+        unknown = sorted(set(value) - set(RefundRequestFilter.base_filters))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filters: {', '.join(unknown)}.")
+        return {key: filter_value for key, filter_value in value.items() if filter_value not in (None, '')}
+    
+    def validate(self, attrs):
+        # Like process_refunds, selecting every request has to be asked for
+        if not (attrs.get('ids') or attrs.get('filters') or attrs['all']):
+            raise serializers.ValidationError(
+                "Give the refund request ids or filters to select them, or set all to select every request."
+            )
+        return attrs
+
+
+class AvailabilityCalendarQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for the availability calendar
+    """
+    transport_option = serializers.UUIDField(required=False)
+    departure_location = serializers.CharField(max_length=200, required=False)
+    destination = serializers.CharField(max_length=200, required=False)
+    departure_stop = serializers.UUIDField(required=False)
+    destination_stop = serializers.UUIDField(required=False)
+    start = serializers.DateField(required=False)
+    days = serializers.IntegerField(min_value=1, max_value=settings.BOOKING_CALENDAR_MAX_DAYS, default=30)
+    
+    def validate_start(self, value):
+        if value < timezone.now().date():
+            raise serializers.ValidationError("Start date cannot be in the past.")
+        return value
+    
+    def validate(self, attrs):
+        if attrs.get('transport_option'):
+            return attrs
+        if not attrs.get('departure_location') and not attrs.get('departure_stop'):
+            raise serializers.ValidationError("Provide a transport option or a departure and destination.")
+        if not attrs.get('destination') and not attrs.get('destination_stop'):
+            raise serializers.ValidationError("Provide a transport option or a departure and destination.")
+        return attrs
+
+
+def validate_trip(transport_option, booking_date, seats):
+    """
+    Checks shared by waitlist entries and seat holds
+    """
+    if not transport_option.is_active or transport_option.organizer.approval_status != 'approved':
+        raise serializers.ValidationError("This transport option is not available.")
+    
+    day_name = booking_date.strftime('%A').lower()
+    if day_name not in transport_option.days_of_operation:
+        raise serializers.ValidationError(
+            f"This transport option does not operate on {day_name}."
+        )
+    if cancelled_dates(transport_option.pk, booking_date):
+        raise serializers.ValidationError("This trip has been cancelled.")
+    
+    if seats > transport_option.total_seats:
+        raise serializers.ValidationError(
+            f"This transport option only has {transport_option.total_seats} seats."
+        )
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for waitlist entries
+    """
+    route_name = serializers.CharField(source='transport_option.route_name', read_only=True)
+    position = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = (
+            'id', 'transport_option', 'route_name', 'booking_date', 'seats_requested',
+            'payment_method', 'priority', 'status', 'position', 'booking', 'promoted_at', 'created_at'
+        )
+        read_only_fields = fields
+    
+    def get_position(self, obj):
+        if obj.status != 'waiting':
+            return None
+        return position(obj)
+
+
+class WaitlistJoinSerializer(serializers.ModelSerializer):
+    """
+    Serializer for joining the waitlist of a sold-out route
+    """
+    class Meta:
+        model = WaitlistEntry
+        fields = ('transport_option', 'booking_date', 'seats_requested', 'payment_method')
+    
+    def validate_booking_date(self, value):
+        if value < timezone.now().date():
+            raise serializers.ValidationError("Booking date cannot be in the past.")
+        return value
+    
+    def validate(self, attrs):
+        transport_option = attrs['transport_option']
+        booking_date = attrs['booking_date']
+        validate_trip(transport_option, booking_date, attrs.get('seats_requested', 1))
+        
+        if free_seats(transport_option, booking_date) >= attrs.get('seats_requested', 1):
+            raise serializers.ValidationError("Seats are available for this date; book them directly.")
+        
+        student = self.context['student']
+        existing = clash(student, transport_option, booking_date)
+        if existing:
+            raise serializers.ValidationError(clash_message(existing))
+        
+        if WaitlistEntry.objects.filter(
+            student=student, transport_option=transport_option,
+            booking_date=booking_date, status='waiting'
+        ).exists():
+            raise serializers.ValidationError("You are already on the waitlist for this date.")
+        
+        return attrs
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    """
+    Serializer for seat holds
+    """
+    route_name = serializers.CharField(source='transport_option.route_name', read_only=True)
+    
+    class Meta:
+        model = SeatHold
+        fields = (
+            'id', 'transport_option', 'route_name', 'booking_date', 'seats',
+            'status', 'expires_at', 'booking', 'created_at'
+        )
+        read_only_fields = ('id', 'status', 'expires_at', 'booking', 'created_at')
+    
+    def validate_booking_date(self, value):
+        if value < timezone.now().date():
+            raise serializers.ValidationError("Booking date cannot be in the past.")
+        return value
+    
+    def validate(self, attrs):
+        validate_trip(attrs['transport_option'], attrs['booking_date'], attrs.get('seats', 1))
+        student = self.context.get('student')
+        if student is not None:
+            existing = clash(student, attrs['transport_option'], attrs['booking_date'])
+            if existing:
+                raise serializers.ValidationError(clash_message(existing))
+        return attrs
+
+
+class SeatHoldConvertSerializer(serializers.Serializer):
+    """
+    Payment details for converting a seat hold into a booking
+    """
+    payment_method = serializers.ChoiceField(choices=Booking.PAYMENT_METHOD_CHOICES)
+    special_requests = serializers.CharField(required=False, allow_blank=True)
+
+
+class BoardingScanSerializer(serializers.Serializer):
+    """
+    A boarding pass scanned at the vehicle
+    """
+    boarding_pass = serializers.CharField(max_length=200)
+    boarded_at = serializers.DateTimeField(required=False)
+
+
+class BoardingSyncSerializer(serializers.Serializer):
+    """
+    Boarding passes scanned offline, uploaded in one batch
+    """
+    boardings = BoardingScanSerializer(many=True, allow_empty=False, max_length=settings.BOARDING_SYNC_MAX_ITEMS)
+
+
+class BulkBookingSerializer(serializers.Serializer):
+    """
+    Serializer for booking one route on many dates, either listed or as a
+    date range on chosen weekdays
+    """
+    transport_option = serializers.PrimaryKeyRelatedField(queryset=TransportOption.objects.select_related('organizer'))
+    dates = serializers.ListField(child=serializers.DateField(), required=False, allow_empty=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    weekdays = serializers.MultipleChoiceField(choices=WEEKDAYS, required=False)
+    seats_booked = serializers.IntegerField(min_value=1, default=1)
+    payment_method = serializers.ChoiceField(choices=Booking.PAYMENT_METHOD_CHOICES)
+    special_requests = serializers.CharField(required=False, allow_blank=True)
+    partial = serializers.BooleanField(default=False, help_text="Book the dates that can be booked instead of none")
+    
+    def validate(self, attrs):
+        if attrs.get('dates'):
+            dates = sorted(set(attrs['dates']))
+        elif attrs.get('start_date') and attrs.get('end_date'):
+            if attrs['end_date'] < attrs['start_date']:
+                raise serializers.ValidationError("End date must be on or after start date.")
+            if (attrs['end_date'] - attrs['start_date']).days >= 366:
+                raise serializers.ValidationError("Date ranges are limited to one year.")
+            dates = expand_dates(
+                attrs['transport_option'], attrs['start_date'], attrs['end_date'], attrs.get('weekdays')
+            )
+        else:
+            raise serializers.ValidationError("Provide dates, or a start date and end date.")
+        
+        if not dates:
+            raise serializers.ValidationError("The route does not run on any of the requested dates.")
+        if len(dates) > settings.BULK_BOOKING_MAX_DATES:
+            raise serializers.ValidationError(
+                f"At most {settings.BULK_BOOKING_MAX_DATES} dates can be booked at once."
+            )
+        attrs['dates'] = dates
+        return attrs
+
+
+class ManifestQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for a passenger manifest
+    """
+    date = serializers.DateField(required=False)
+
+
+class TripCancellationSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the progress of a trip cancellation
+    """
+    route_name = serializers.CharField(source='transport_option.route_name', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = TripCancellation
+        fields = (
+            'id', 'trip_update', 'transport_option', 'route_name', 'service_date', 'status',
+            'total_bookings', 'bookings_cancelled', 'seats_released', 'refunds_created',
+            'notifications_sent', 'progress', 'error', 'started_at', 'completed_at', 'created_at'
+        )
+        read_only_fields = fields
+
+
+class BookingWindowSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a booking's trip window
+    """
+    route_name = serializers.CharField(source='transport_option.route_name', read_only=True)
+    
+    class Meta:
+        model = Booking
+        fields = ('id', 'route_name', 'booking_date', 'departure_at', 'arrival_at', 'booking_status')
+        read_only_fields = fields
@@ -0,0 +1,40 @@
+"""
+Signal handlers keeping booking caches in sync
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.transport.models import TransportOption, TripUpdate
+from apps.transport.signals import options_bulk_changed
+from apps.transport.trending import trending
+from .models import Booking
+from . import availability, cancellations
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    availability.invalidate(instance.transport_option)
+    if kwargs.get('created'):
+        # Count the booking only once it is committed
+        option_id, created_at = instance.transport_option_id, instance.created_at
+        transaction.on_commit(lambda: trending.record_booking(option_id, created_at))
+
+
+@receiver(post_save, sender=TransportOption)
+def transport_option_saved(sender, instance, **kwargs):
+    # Price, schedule and seat changes all show up in the calendar
+    availability.invalidate(instance)
+
+
+@receiver(options_bulk_changed)
+def transport_options_bulk_changed(sender, options, **kwargs):
+    availability.invalidate_many(options)
+
+
+@receiver(post_save, sender=TripUpdate)
+def trip_update_saved(sender, instance, created, **kwargs):
+    if not created or instance.update_type != 'cancellation' or instance.service_date is None:
+        return
+    cancellations.dispatch(cancellations.start(instance))
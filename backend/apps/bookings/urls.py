@@ -8,15 +8,39 @@ urlpatterns = [
     # Booking endpoints
     path('', views.BookingListView.as_view(), name='bookings-list'),
     path('create/', views.BookingCreateView.as_view(), name='booking-create'),
+    path('bulk/', views.bulk_create_bookings, name='booking-bulk'),
     path('<uuid:pk>/', views.BookingDetailView.as_view(), name='booking-detail'),
     path('<uuid:pk>/cancel/', views.BookingCancelView.as_view(), name='booking-cancel'),
+    path('<uuid:pk>/boarding-pass/', views.boarding_pass, name='booking-boarding-pass'),
     path('stats/', views.booking_stats, name='booking-stats'),
+    path('calendar/', views.booking_calendar, name='booking-calendar'),
+    path('conflicts/', views.booking_conflicts, name='booking-conflicts'),
+    
+    path('queue/', views.queue_status, name='booking-queue-status'),
+    
+    # Seat hold endpoints
+    path('holds/', views.seat_holds, name='seat-holds'),
+    path('holds/<uuid:pk>/convert/', views.convert_seat_hold, name='seat-hold-convert'),
+    path('holds/<uuid:pk>/release/', views.release_seat_hold, name='seat-hold-release'),
+    
+    # Waitlist endpoints
+    path('waitlist/', views.WaitlistEntryListView.as_view(), name='waitlist-list'),
+    path('waitlist/join/', views.WaitlistJoinView.as_view(), name='waitlist-join'),
+    path('waitlist/<uuid:pk>/leave/', views.leave_waitlist, name='waitlist-leave'),
     
     # Organizer booking endpoints
     path('organizer/', views.OrganizerBookingListView.as_view(), name='organizer-bookings'),
+    path('organizer/routes/<uuid:pk>/manifest/', views.passenger_manifest, name='passenger-manifest'),
+    path('organizer/boarding/key/', views.boarding_key, name='boarding-key'),
+    path('organizer/boarding/sync/', views.sync_boardings, name='boarding-sync'),
+    
+    # Trip cancellation endpoints
+    path('cancellations/', views.TripCancellationListView.as_view(), name='trip-cancellations-list'),
+    path('cancellations/<uuid:pk>/', views.TripCancellationDetailView.as_view(), name='trip-cancellation-detail'),
     
     # Refund request endpoints
     path('refunds/', views.RefundRequestListView.as_view(), name='refund-requests-list'),
     path('refunds/create/', views.RefundRequestCreateView.as_view(), name='refund-request-create'),
+    path('refunds/bulk/', views.bulk_process_refunds, name='refund-requests-bulk'),
     path('refunds/<uuid:pk>/', views.RefundRequestDetailView.as_view(), name='refund-request-detail'),
 ]
\ No newline at end of file
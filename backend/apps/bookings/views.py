@@ -2,21 +2,55 @@
 Views for Bookings app
 """
 from rest_framework import generics, status, permissions, filters
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Q, Sum
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
-from .models import Booking, RefundRequest
+from .models import Booking, RefundRequest, WaitlistEntry, SeatHold, TripCancellation
 from .serializers import (
     BookingSerializer, BookingCreateSerializer, BookingUpdateSerializer,
-    RefundRequestSerializer, RefundRequestCreateSerializer, RefundRequestUpdateSerializer
+    RefundRequestSerializer, RefundRequestCreateSerializer, RefundRequestUpdateSerializer,
+    AvailabilityCalendarQuerySerializer, WaitlistEntrySerializer, WaitlistJoinSerializer,
+    SeatHoldSerializer, SeatHoldConvertSerializer, BulkBookingSerializer, BookingWindowSerializer,
+    ManifestQuerySerializer, BoardingSyncSerializer, BulkRefundSerializer, TripCancellationSerializer
 )
-from .filters import BookingFilter
+from .filters import BookingFilter, RefundRequestFilter
+from .availability import availability_calendar
+from . import admission, boarding, holds, manifest, overlaps, recurring, refunds, waitlist
+from apps.exports import CSVRenderer, StreamingExportMixin
+from apps.transport.models import TransportOption
+from apps.transport.stops import lookup_stop_id
 
 
-class BookingListView(generics.ListAPIView):
+BOOKING_EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('transport_option', 'transport_option_id'),
+    ('route_name', 'transport_option__route_name'),
+    ('student_id', 'student__student_id'),
+    ('booking_date', 'booking_date'),
+    ('departure_at', 'departure_at'),
+    ('seats_booked', 'seats_booked'),
+    ('total_amount', 'total_amount'),
+    ('platform_fee', 'platform_fee'),
+    ('organizer_amount', 'organizer_amount'),
+    ('booking_status', 'booking_status'),
+    ('payment_status', 'payment_status'),
+    ('payment_method', 'payment_method'),
+    ('payment_reference', 'payment_reference'),
+    ('refund_status', 'refund_status'),
+    ('refund_amount', 'refund_amount'),
+    ('boarded_at', 'boarded_at'),
+    ('created_at', 'created_at'),
+)
+
+
+class BookingListView(StreamingExportMixin, generics.ListAPIView):
     """
     List bookings for the current user
     """
@@ -27,6 +61,8 @@ class BookingListView(generics.ListAPIView):
     search_fields = ['transport_option__route_name', 'transport_option__departure_location', 'transport_option__destination']
     ordering_fields = ['booking_date', 'created_at', 'total_amount']
     ordering = ['-created_at']
+    export_fields = BOOKING_EXPORT_FIELDS
+    export_name = 'bookings'
     
     def get_queryset(self):
         try:
@@ -38,6 +74,43 @@ class BookingListView(generics.ListAPIView):
             return Booking.objects.none()
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_create_bookings(request):
+    """
+    Book one route on many dates in one request
+    """
+    try:
+        student_profile = request.user.student_profile
+    except AttributeError:
+        return Response({'error': 'Only students can create bookings.'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = BulkBookingSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    bookings, results = recurring.book_dates(
+        student_profile,
+        data['transport_option'],
+        data['dates'],
+        data['seats_booked'],
+        data['payment_method'],
+        partial=data['partial'],
+        special_requests=data.get('special_requests')
+    )
+    
+    if not bookings:
+        response_status = status.HTTP_409_CONFLICT
+    elif len(bookings) < len(results):
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_201_CREATED
+    return Response({
+        'booked': len(bookings),
+        'rejected': len(results) - len(bookings),
+        'results': results
+    }, status=response_status)
+
+
 class BookingDetailView(generics.RetrieveUpdateAPIView):
     """
     Retrieve and update a specific booking
@@ -101,24 +174,190 @@ class BookingCancelView(generics.UpdateAPIView):
             return Booking.objects.none()
     
     def perform_update(self, serializer):
-        booking = self.get_object()
-        
-        # Update booking status to cancelled
-        serializer.save(booking_status='cancelled')
-        
-        # Refund seats to transport option
-        transport_option = booking.transport_option
-        transport_option.available_seats += booking.seats_booked
-        transport_option.save()
-        
-        # Update refund status if payment was made
-        if booking.payment_status == 'paid':
-            booking.refund_status = 'requested'
-            booking.refund_amount = booking.total_amount
-            booking.save()
+        with transaction.atomic():
+            # Update booking status to cancelled
+            booking = serializer.save(booking_status='cancelled')
+            
+            # Refund seats to transport option, promoting waitlisted students into them
+            waitlist.release_seats(booking)
+            
+            # Update refund status if payment was made
+            if booking.payment_status == 'paid':
+                booking.refund_status = 'requested'
+                booking.refund_amount = booking.total_amount
+                booking.save()
+
+
+class WaitlistEntryListView(generics.ListAPIView):
+    """
+    List waitlist entries for the current student
+    """
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        try:
+            student_profile = self.request.user.student_profile
+            return WaitlistEntry.objects.filter(
+                student=student_profile
+            ).select_related('transport_option')
+        except AttributeError:
+            return WaitlistEntry.objects.none()
 
 
-class OrganizerBookingListView(generics.ListAPIView):
+class WaitlistJoinView(generics.CreateAPIView):
+    """
+    Join the waitlist of a sold-out route and date
+    """
+    serializer_class = WaitlistJoinSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_student(self):
+        if self.request.user.role != 'student':
+            raise PermissionDenied("Only students can join waitlists.")
+        try:
+            return self.request.user.student_profile
+        except AttributeError:
+            raise PermissionDenied("Student profile not found.")
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['student'] = self.get_student()
+        return context
+    
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            option = TransportOption.objects.select_for_update().get(
+                pk=serializer.validated_data['transport_option'].pk
+            )
+            serializer.save(student=self.get_student())
+            # Seats released since validation go straight to the queue
+            if waitlist.promote(option, serializer.instance.booking_date):
+                option.save()
+        serializer.instance.refresh_from_db()
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(
+            WaitlistEntrySerializer(serializer.instance).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def leave_waitlist(request, pk):
+    """
+    Give up a waiting place on a waitlist
+    """
+    left = WaitlistEntry.objects.filter(
+        pk=pk,
+        student__user=request.user,
+        status='waiting'
+    ).update(status='cancelled')
+    if not left:
+        return Response({'error': 'Waiting entry not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'message': 'You have left the waitlist.'})
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def seat_holds(request):
+    """
+    List the student's active seat holds or hold seats for checkout
+    """
+    try:
+        student_profile = request.user.student_profile
+    except AttributeError:
+        return Response({'error': 'Only students can hold seats.'}, status=status.HTTP_403_FORBIDDEN)
+    
+    if request.method == 'GET':
+        active = SeatHold.objects.filter(
+            student=student_profile,
+            status='active',
+            expires_at__gt=timezone.now()
+        ).select_related('transport_option')
+        return Response(SeatHoldSerializer(active, many=True).data)
+    
+    serializer = SeatHoldSerializer(data=request.data, context={'student': student_profile})
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    try:
+        hold = holds.place_hold(
+            student_profile, data['transport_option'], data['booking_date'], data.get('seats', 1)
+        )
+    except holds.HoldError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+    return Response(SeatHoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def convert_seat_hold(request, pk):
+    """
+    Pay for held seats, turning the hold into a booking
+    """
+    hold = SeatHold.objects.filter(pk=pk, student__user=request.user).first()
+    if hold is None:
+        return Response({'error': 'Seat hold not found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = SeatHoldConvertSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        booking = holds.convert_hold(hold, **serializer.validated_data)
+    except holds.HoldError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+    return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def release_seat_hold(request, pk):
+    """
+    Give held seats back before checkout completes
+    """
+    hold = SeatHold.objects.filter(pk=pk, student__user=request.user).first()
+    if hold is None or not holds.release_hold(hold):
+        return Response({'error': 'Active seat hold not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'message': 'Seats released.'})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def queue_status(request):
+    """
+    Position of a queue ticket issued during a booking rush
+    """
+    ticket = admission.read_ticket(request.query_params.get('ticket', ''))
+    if ticket is None:
+        return Response({'error': 'Invalid or expired queue ticket.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(admission.ticket_status(ticket))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def booking_conflicts(request):
+    """
+    Pairs of overlapping trips in the student's upcoming schedule
+    """
+    try:
+        student_profile = request.user.student_profile
+    except AttributeError:
+        return Response({'error': 'Only students have a booking schedule.'}, status=status.HTTP_403_FORBIDDEN)
+    
+    conflicts = overlaps.schedule_conflicts(student_profile)
+    return Response({
+        'count': len(conflicts),
+        'results': [
+            {'first': BookingWindowSerializer(first).data, 'second': BookingWindowSerializer(second).data}
+            for first, second in conflicts
+        ]
+    })
+
+
+class OrganizerBookingListView(StreamingExportMixin, generics.ListAPIView):
     """
     List bookings for transport organizer
     """
@@ -129,6 +368,8 @@ class OrganizerBookingListView(generics.ListAPIView):
     search_fields = ['student__user__first_name', 'student__user__last_name', 'student__student_id']
     ordering_fields = ['booking_date', 'created_at', 'total_amount']
     ordering = ['-created_at']
+    export_fields = BOOKING_EXPORT_FIELDS
+    export_name = 'organizer-bookings'
     
     def get_queryset(self):
         try:
@@ -140,6 +381,135 @@ class OrganizerBookingListView(generics.ListAPIView):
             return Booking.objects.none()
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes([JSONRenderer, CSVRenderer, manifest.PDFRenderer])
+def passenger_manifest(request, pk):
+    """
+    Confirmed passengers on one of the organizer's routes for a date, streamed
+    as JSON, CSV or PDF (chosen by ?format= or the Accept header)
+    """
+    query = ManifestQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    booking_date = query.validated_data.get('date') or timezone.localdate()
+    
+    options = TransportOption.objects.only(
+        'id', 'route_name', 'departure_location', 'destination', 'departure_time', 'total_seats'
+    )
+    if request.user.role != 'admin':
+        try:
+            options = options.filter(organizer=request.user.organizer_profile)
+        except AttributeError:
+            return Response({'error': 'Only organizers can view passenger manifests.'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        option = options.get(pk=pk)
+    except TransportOption.DoesNotExist:
+        return Response({'error': 'Transport option not found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    stream, content_type = manifest.STREAMS[request.accepted_renderer.format]
+    response = StreamingHttpResponse(stream(option, booking_date), content_type=content_type)
+    filename = f"manifest-{option.pk}-{booking_date.isoformat()}.{request.accepted_renderer.format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def boarding_pass(request, pk):
+    """
+    Signed boarding pass for one of the student's confirmed bookings
+    """
+    try:
+        booking = Booking.objects.select_related('transport_option').get(
+            pk=pk, student__user=request.user
+        )
+    except Booking.DoesNotExist:
+        return Response({'error': 'Booking not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if booking.booking_status != 'confirmed':
+        return Response({'error': 'Boarding passes are only issued for confirmed bookings.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'boarding_pass': boarding.issue(booking),
+        'booking': str(booking.pk),
+        'route_name': booking.transport_option.route_name,
+        'booking_date': booking.booking_date.isoformat(),
+        'departure_at': booking.departure_at,
+        'seats_booked': booking.seats_booked
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def boarding_key(request):
+    """
+    Key the organizer's devices use to verify boarding passes offline
+    """
+    try:
+        organizer = request.user.organizer_profile
+    except AttributeError:
+        return Response({'error': 'Only organizers can verify boarding passes.'}, status=status.HTTP_403_FORBIDDEN)
+    return Response({
+        'algorithm': 'HMAC-SHA256',
+        'version': boarding.VERSION,
+        'signature_bytes': boarding.SIGNATURE_BYTES,
+        'key': boarding.organizer_key(organizer.pk).hex()
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def sync_boardings(request):
+    """
+    Record boarding passes scanned offline on the organizer's devices
+    """
+    try:
+        organizer = request.user.organizer_profile
+    except AttributeError:
+        return Response({'error': 'Only organizers can record boardings.'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = BoardingSyncSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    results = boarding.record_boardings(organizer, serializer.validated_data['boardings'])
+    return Response({
+        'boarded': len({result['booking'] for result in results if result['status'] == 'boarded'}),
+        'results': results
+    })
+
+
+class TripCancellationMixin:
+    """
+    Trip cancellations visible to the user: all of them for admins, those on
+    their own routes for organizers
+    """
+    serializer_class = TripCancellationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = TripCancellation.objects.select_related('transport_option')
+        if self.request.user.role == 'admin':
+            return queryset
+        try:
+            organizer = self.request.user.organizer_profile
+            return queryset.filter(transport_option__organizer=organizer)
+        except AttributeError:
+            return TripCancellation.objects.none()
+
+
+class TripCancellationListView(TripCancellationMixin, generics.ListAPIView):
+    """
+    Progress of trip cancellations on the organizer's routes
+    """
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status', 'transport_option', 'trip_update', 'service_date']
+    ordering = ['-created_at']
+
+
+class TripCancellationDetailView(TripCancellationMixin, generics.RetrieveAPIView):
+    """
+    Progress of one trip cancellation
+    """
+
+
 class RefundRequestListView(generics.ListAPIView):
     """
     List refund requests
@@ -228,6 +598,47 @@ class RefundRequestDetailView(generics.RetrieveUpdateAPIView):
             return RefundRequestUpdateSerializer
         else:
             return RefundRequestSerializer  # Read-only for non-admins
+    
+    def perform_update(self, serializer):
+        new_status = serializer.validated_data.get('status')
+        if self.request.user.role != 'admin' or new_status in (None, serializer.instance.status):
+            serializer.save()
+            return
+        # Status changes go through the same path as bulk processing, so the
+        # booking, wallet and ledger are updated with the request
+        refunds.apply(
+            refunds.ACTION_FOR_STATUS[new_status],
+            RefundRequest.objects.filter(pk=serializer.instance.pk),
+            user=self.request.user,
+            admin_notes=serializer.validated_data.get('admin_notes')
+        )
+        serializer.instance.refresh_from_db()
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_process_refunds(request):
+    """
+    Approve, reject or process many refund requests at once (admin only)
+    """
+    if request.user.role != 'admin':
+        return Response({'error': 'Only admins can process refunds.'}, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = BulkRefundSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    
+    selected = RefundRequest.objects.all()
+    if 'filters' in params:
+        refund_filter = RefundRequestFilter(params['filters'], queryset=selected)
+        if not refund_filter.is_valid():
+            return Response({'filters': refund_filter.errors}, status=status.HTTP_400_BAD_REQUEST)
+        selected = refund_filter.qs
+    if 'ids' in params:
+        selected = selected.filter(pk__in=params['ids'])
+    
+    summary = refunds.apply(params['action'], selected, user=request.user, admin_notes=params.get('admin_notes'))
+    return Response({**summary, 'credited': str(summary['credited'])})
 
 
 @api_view(['GET'])
@@ -282,4 +693,37 @@ def booking_stats(request):
         return Response(
             {'error': 'Profile not found'}, 
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def booking_calendar(request):
+    """
+    Remaining seats and cheapest price per date for a route or corridor
+    """
+    query = AvailabilityCalendarQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    start = params.get('start') or timezone.now().date()
+    
+    if params.get('transport_option'):
+        calendar = availability_calendar(start, params['days'], transport_option_id=params['transport_option'])
+        scope = {'transport_option': params['transport_option']}
+    else:
+        departure_stop_id = params.get('departure_stop') or lookup_stop_id(params.get('departure_location'))
+        destination_stop_id = params.get('destination_stop') or lookup_stop_id(params.get('destination'))
+        if not departure_stop_id or not destination_stop_id:
+            return Response({'error': 'Unknown departure or destination.'}, status=status.HTTP_404_NOT_FOUND)
+        calendar = availability_calendar(
+            start, params['days'],
+            departure_stop_id=departure_stop_id, destination_stop_id=destination_stop_id
+        )
+        scope = {'departure_stop': departure_stop_id, 'destination_stop': destination_stop_id}
+    
+    return Response({
+        **scope,
+        'start': start.isoformat(),
+        'days': params['days'],
+        'results': calendar
+    })
\ No newline at end of file
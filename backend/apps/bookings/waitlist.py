@@ -0,0 +1,149 @@
+"""
+Waitlist for sold-out routes
+
+Seats released by a cancellation or an expired waitlist promotion are handed
+to waiting students in the same transaction that releases them: the route
+row is locked, waiting entries are promoted to pending bookings by priority
+and then arrival order, and every promoted student is notified.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.communications.models import Notification
+from apps.transport.models import TransportOption
+from .holds import free_seats
+from .overlaps import clash
+from .models import Booking, WaitlistEntry
+
+
+def position(entry):
+    """
+    1-based place of a waiting entry in its queue
+    """
+    return WaitlistEntry.objects.filter(
+        Q(priority__gt=entry.priority) | Q(priority=entry.priority, created_at__lt=entry.created_at),
+        transport_option_id=entry.transport_option_id,
+        booking_date=entry.booking_date,
+        status='waiting'
+    ).count() + 1
+
+
+def _notify(notifications):
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id, title=title, message=message,
+            notification_type='booking', related_id=related_id
+        )
+        for user_id, title, message, related_id in notifications
+    ])
+
+
+def promote(option, booking_date):
+    """
+    Turn waiting entries for a route and date into pending bookings while
+    seats last, returning the new bookings.
+
+    ``option`` must be locked with select_for_update inside a transaction;
+    its ``available_seats`` is decremented in memory and left for the
+    caller to save.
+    """
+    if not option.is_active or booking_date < timezone.now().date():
+        return []
+    if booking_date.strftime('%A').lower() not in option.days_of_operation:
+        return []
+    free = free_seats(option, booking_date, use_cache=False)
+    if free <= 0:
+        return []
+
+    entries = WaitlistEntry.objects.select_for_update(of=('self',)).filter(
+        transport_option=option,
+        booking_date=booking_date,
+        status='waiting'
+    ).select_related('student').order_by('-priority', 'created_at')
+
+    promoted, notifications = [], []
+    now = timezone.now()
+    payment_due_at = now + timedelta(minutes=settings.BOOKING_PENDING_EXPIRY_MINUTES)
+    for entry in entries:
+        if free <= 0:
+            break
+        # Parties larger than the free seats keep their place for the next release,
+        # as do students who have since booked an overlapping trip
+        if entry.seats_requested > free or clash(entry.student, option, booking_date):
+            continue
+        booking = Booking(
+            student=entry.student,
+            transport_option=option,
+            booking_date=booking_date,
+            seats_booked=entry.seats_requested,
+            payment_method=entry.payment_method,
+            payment_due_at=payment_due_at
+        )
+        booking.save()
+        entry.status = 'promoted'
+        entry.booking = booking
+        entry.promoted_at = now
+        entry.save(update_fields=['status', 'booking', 'promoted_at'])
+        free -= entry.seats_requested
+        option.available_seats -= entry.seats_requested
+        promoted.append(booking)
+        notifications.append((
+            entry.student.user_id,
+            'Waitlist seat available',
+            f"{entry.seats_requested} seat(s) on {option.route_name} for {booking_date} are now booked for you. "
+            f"Complete payment within {settings.BOOKING_PENDING_EXPIRY_MINUTES} minutes to keep them.",
+            booking.pk
+        ))
+    _notify(notifications)
+    return promoted
+
+
+def release_seats(booking):
+    """
+    Return a cancelled booking's seats to its route and hand them to the
+    waitlist. Must run inside a transaction.
+    """
+    option = TransportOption.objects.select_for_update().get(pk=booking.transport_option_id)
+    option.available_seats += booking.seats_booked
+    promoted = promote(option, booking.booking_date)
+    option.save()
+    return promoted
+
+
+def expire_pending_bookings(now=None):
+    """
+    Cancel unpaid bookings past their payment deadline, promoting waiting
+    students into the released seats. Bookings without a deadline, such as
+    card payments awaiting the gateway, are left alone. Returns (expired,
+    promoted) counts.
+    """
+    now = now or timezone.now()
+    stale = list(Booking.objects.filter(
+        booking_status='pending',
+        payment_status='pending',
+        payment_due_at__lt=now
+    ).values_list('pk', flat=True))
+
+    expired = promoted = 0
+    for booking_id in stale:
+        with transaction.atomic():
+            booking = Booking.objects.select_for_update(of=('self',)).select_related('transport_option', 'student').filter(
+                pk=booking_id, booking_status='pending', payment_status='pending'
+            ).first()
+            if booking is None:
+                continue
+            booking.booking_status = 'cancelled'
+            booking.save(update_fields=['booking_status', 'updated_at'])
+            promoted += len(release_seats(booking))
+            _notify([(
+                booking.student.user_id,
+                'Booking expired',
+                f"Your unpaid booking on {booking.transport_option.route_name} for {booking.booking_date} has expired.",
+                booking.pk
+            )])
+            expired += 1
+    return expired, promoted
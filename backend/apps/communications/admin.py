@@ -2,7 +2,7 @@
 Admin configuration for Communications app
 """
 from django.contrib import admin
-from .models import Conversation, ConversationParticipant, Message, CommunicationReport, Notification
+from .models import Conversation, ConversationParticipant, Message, CommunicationReport, Notification, FanOut
 
 
 @admin.register(Conversation)
@@ -94,16 +94,30 @@ class NotificationAdmin(admin.ModelAdmin):
     """
     Notification admin
     """
-    list_display = ('user', 'title', 'notification_type', 'is_read', 'is_push_sent', 'created_at')
+    list_display = ('user', 'title', 'notification_type', 'is_read', 'is_push_sent', 'push_attempts', 'created_at')
     list_filter = ('notification_type', 'is_read', 'is_push_sent', 'created_at')
     search_fields = ('title', 'message', 'user__first_name', 'user__last_name')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'pushed_at', 'push_channels', 'push_attempts', 'next_push_at', 'push_error')
     
     fieldsets = (
         ('Notification Information', {'fields': ('user', 'title', 'message', 'notification_type', 'related_id')}),
         ('Status', {'fields': ('is_read', 'is_push_sent')}),
+        ('Delivery', {'fields': ('pushed_at', 'push_channels', 'push_attempts', 'next_push_at', 'push_error')}),
         ('Timestamp', {'fields': ('created_at',)}),
     )
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user')
\ No newline at end of file
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(FanOut)
+class FanOutAdmin(admin.ModelAdmin):
+    """
+    Notification fan-out admin
+    """
+    list_display = ('kind', 'related_id', 'status', 'attempts', 'notifications_created', 'created_at')
+    list_filter = ('kind', 'status', 'created_at')
+    search_fields = ('related_id',)
+    readonly_fields = (
+        'kind', 'related_id', 'status', 'attempts', 'notifications_created', 'error', 'completed_at', 'created_at'
+    )
\ No newline at end of file
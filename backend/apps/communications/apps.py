@@ -7,4 +7,7 @@ from django.apps import AppConfig
 class CommunicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.communications'
-    verbose_name = 'Communications'
\ No newline at end of file
+    verbose_name = 'Communications'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
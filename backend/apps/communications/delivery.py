@@ -0,0 +1,108 @@
+"""
+Notification delivery backends
+
+The outbox worker hands a backend one user's notifications at a time with
+``send(user, notifications)``; a backend raises to have them retried later.
+``open()`` and ``close()`` are called around each batch so a backend can
+reuse one connection for it. Backends are listed in NOTIFICATION_BACKENDS,
+each delivering on its own ``channel``.
+"""
+import sys
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils.module_loading import import_string
+
+
+class BaseBackend:
+    channel = None
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, user, notifications):
+        raise NotImplementedError
+
+
+class LocalPushBackend(BaseBackend):
+    """
+    Stub push gateway: records pushes in this process instead of sending
+    them, for development and tests
+    """
+    channel = 'push'
+
+    def __init__(self, maxlen=1000):
+        self._lock = threading.Lock()
+        self.sent = deque(maxlen=maxlen)
+
+    def send(self, user, notifications):
+        with self._lock:
+            self.sent.extend(
+                (user.pk, notification.title, notification.message)
+                for notification in notifications
+            )
+
+
+class ConsoleBackend(BaseBackend):
+    """
+    Writes each notification to stdout
+    """
+    channel = 'console'
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def send(self, user, notifications):
+        lines = ''.join(
+            f"[{notification.notification_type}] {user.email}: {notification.title} - {notification.message}\n"
+            for notification in notifications
+        )
+        with self._lock:
+            self.stream.write(lines)
+            self.stream.flush()
+
+
+class EmailBackend(BaseBackend):
+    """
+    Emails each user their notifications in one message, through Django's
+    EMAIL_BACKEND with one connection per batch
+    """
+    channel = 'email'
+
+    def __init__(self):
+        self.connection = None
+
+    def open(self):
+        self.connection = get_connection()
+        self.connection.open()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def send(self, user, notifications):
+        if not user.email:
+            return
+        if len(notifications) == 1:
+            subject = notifications[0].title
+        else:
+            subject = f"You have {len(notifications)} new notifications"
+        body = '\n\n'.join(f"{notification.title}\n{notification.message}" for notification in notifications)
+        EmailMessage(subject, body, to=[user.email], connection=self.connection).send()
+
+
+_backends = None
+
+
+def get_backends():
+    global _backends
+    if _backends is None:
+        _backends = [import_string(path)() for path in settings.NOTIFICATION_BACKENDS]
+    return _backends
@@ -0,0 +1,159 @@
+"""
+Notification fan-out for trip updates and announcements
+
+The audience of a trip update (confirmed riders of the route on the trip's
+date) or an announcement (the conversation's participants) is read with a
+single query, leaving out anyone who muted the conversation. Notifications
+are inserted with bulk_create a batch at a time and left in the outbox for
+the delivery worker. Fan-out runs after the posting transaction commits, on
+a small thread pool rather than in the request.
+
+Each fan-out is recorded as a FanOut row in the posting transaction and
+marked completed when it finishes, so one lost with its worker (a crash, a
+deploy) is run again by resume_fan_outs. A rerun skips users the earlier
+run already notified.
+"""
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from apps.background import dispatch as dispatch_background
+from .models import ConversationParticipant, FanOut, Message, Notification
+
+
+# Location pings are too frequent to notify on; cancellations notify riders
+# as part of cancelling their bookings
+SILENT_UPDATE_TYPES = ('location', 'cancellation')
+
+
+def trip_update_audience(trip_update):
+    """
+    User ids of the confirmed riders a trip update is for
+    """
+    from apps.bookings.models import Booking
+
+    muted = ConversationParticipant.objects.filter(
+        user_id=OuterRef('student__user_id'),
+        conversation__conversation_type='trip_group',
+        conversation__trip_id=trip_update.transport_option_id,
+        is_muted=True
+    )
+    return Booking.objects.filter(
+        transport_option_id=trip_update.transport_option_id,
+        booking_date=trip_update.service_date or timezone.localdate(),
+        booking_status='confirmed'
+    ).exclude(Exists(muted)).values_list('student__user_id', flat=True).distinct()
+
+
+def announcement_audience(message):
+    """
+    User ids of the participants an announcement is for
+    """
+    return ConversationParticipant.objects.filter(
+        conversation_id=message.conversation_id,
+        is_muted=False
+    ).exclude(user_id=message.sender_id).values_list('user_id', flat=True)
+
+
+def fan_out(user_ids, title, message, notification_type, related_id=None):
+    """
+    Notify every user in ``user_ids`` not yet notified about ``related_id``,
+    returning how many were notified
+    """
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
+    notified = set()
+    if related_id is not None:
+        notified = set(Notification.objects.filter(
+            related_id=related_id, notification_type=notification_type
+        ).values_list('user_id', flat=True))
+    total = 0
+    batch = []
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        if user_id in notified:
+            continue
+        batch.append(Notification(
+            user_id=user_id,
+            title=title[:200],
+            message=message,
+            notification_type=notification_type,
+            related_id=related_id
+        ))
+        if len(batch) >= batch_size:
+            total += _flush(batch)
+            batch = []
+    if batch:
+        total += _flush(batch)
+    return total
+
+
+def _flush(batch):
+    Notification.objects.bulk_create(batch)
+    return len(batch)
+
+
+def notify_trip_update(trip_update_id):
+    from apps.transport.models import TripUpdate
+
+    trip_update = TripUpdate.objects.select_related('transport_option').get(pk=trip_update_id)
+    return fan_out(
+        trip_update_audience(trip_update),
+        f"{trip_update.transport_option.route_name}: {trip_update.title}",
+        trip_update.message,
+        'trip_update',
+        trip_update.pk
+    )
+
+
+def notify_announcement(message_id):
+    message = Message.objects.select_related('conversation').get(pk=message_id)
+    return fan_out(
+        announcement_audience(message),
+        message.conversation.title or "Announcement",
+        message.content,
+        'message',
+        message.pk
+    )
+
+
+JOBS = {
+    'trip_update': notify_trip_update,
+    'announcement': notify_announcement,
+}
+
+
+def schedule(kind, related_id):
+    """
+    Record a fan-out with the current transaction and run it once that
+    commits, on the fan-out thread pool unless NOTIFICATION_FANOUT_ASYNC is
+    off
+    """
+    job = FanOut.objects.create(kind=kind, related_id=related_id)
+    dispatch_background(
+        'notification-fanout', settings.NOTIFICATION_FANOUT_WORKERS, run, job.pk,
+        inline=not settings.NOTIFICATION_FANOUT_ASYNC
+    )
+    return job
+
+
+def run(job_id):
+    """
+    Run a recorded fan-out to completion. Safe to call again on a pending
+    or failed one.
+    """
+    jobs = FanOut.objects.filter(pk=job_id)
+    job = jobs.get()
+    if job.status == 'completed':
+        return job
+    jobs.update(attempts=F('attempts') + 1)
+    try:
+        created = JOBS[job.kind](job.related_id)
+    except Exception as exc:
+        jobs.update(status='failed', error=str(exc))
+        raise
+    jobs.update(
+        status='completed',
+        notifications_created=F('notifications_created') + created,
+        error=None,
+        completed_at=timezone.now()
+    )
+    return jobs.get()
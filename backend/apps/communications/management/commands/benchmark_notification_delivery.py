@@ -0,0 +1,82 @@
+"""
+Measure notification delivery throughput
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from apps.communications import outbox
+from apps.communications.models import Notification
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver synthetic notifications to synthetic users and report the throughput. '
+        'Everything is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notifications', type=int, default=10000, help='Notifications to deliver')
+        parser.add_argument('--users', type=int, default=500, help='Users the notifications are spread over')
+        parser.add_argument('--batch-size', type=int, help='Notifications claimed per batch')
+        parser.add_argument(
+            '--backend', action='append',
+            help='Delivery backend to use, repeatable (default: apps.communications.delivery.LocalPushBackend)'
+        )
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4()
+        paths = options['backend'] or ['apps.communications.delivery.LocalPushBackend']
+        backends = [import_string(path)() for path in paths]
+        batch_size = options['batch_size'] or settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=f"bench-{run.hex[:8]}-{index}",
+                    email=f"bench-{run.hex[:8]}-{index}@example.invalid",
+                    password='!',
+                    first_name='Benchmark',
+                    last_name=str(index)
+                )
+                for index in range(max(options['users'], 1))
+            ], batch_size=1000)
+            Notification.objects.bulk_create([
+                Notification(
+                    user=users[index % len(users)],
+                    title='Benchmark',
+                    message=f"Benchmark notification {index}",
+                    notification_type='general',
+                    related_id=run
+                )
+                for index in range(options['notifications'])
+            ], batch_size=1000)
+
+            started = time.perf_counter()
+            with connection.execute_wrapper(count_queries):
+                totals = outbox.deliver(
+                    backends=backends,
+                    batch_size=batch_size,
+                    notifications=Notification.objects.filter(related_id=run)
+                )
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+
+        rate = totals['sent'] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Backends: {', '.join(backend.channel for backend in backends)}\n"
+            f"Delivered {totals['sent']} notifications ({totals['failed']} failed) to {len(users)} users "
+            f"in {totals['batches']} batches of up to {batch_size}\n"
+            f"Elapsed: {elapsed:.3f}s, {rate:.0f} notifications/s, "
+            f"{len(queries)} queries ({len(queries) / max(totals['batches'], 1):.1f} per batch)"
+        )
@@ -0,0 +1,30 @@
+"""
+Deliver notifications waiting in the outbox
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.communications import outbox
+
+
+class Command(BaseCommand):
+    help = 'Send unsent notifications through the configured delivery backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once nothing is due instead of polling')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait between polls when idle')
+        parser.add_argument('--batch-size', type=int, help='Notifications claimed per batch')
+
+    def handle(self, *args, **options):
+        while True:
+            totals = outbox.deliver(batch_size=options['batch_size'])
+            if totals['claimed']:
+                self.stdout.write(
+                    f"{totals['sent']} notifications sent, {totals['failed']} failed "
+                    f"in {totals['batches']} batches"
+                )
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS("Outbox drained."))
@@ -0,0 +1,38 @@
+"""
+Finish notification fan-outs that have not completed
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.communications import fanout
+from apps.communications.models import FanOut
+
+
+class Command(BaseCommand):
+    help = 'Run interrupted and failed notification fan-outs to completion'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=300,
+            help='Seconds a pending fan-out is left to its own worker before it is resumed'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        pending = FanOut.objects.filter(
+            Q(status='failed') | Q(status='pending', created_at__lt=cutoff)
+        ).order_by('created_at').values_list('pk', flat=True)
+        completed = failed = 0
+        for job_id in pending:
+            try:
+                job = fanout.run(job_id)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{job_id}: {exc}")
+                continue
+            completed += 1
+            self.stdout.write(f"{job.get_kind_display()} {job.related_id}: {job.notifications_created} notified")
+        self.stdout.write(self.style.SUCCESS(f"Completed {completed} fan-outs, {failed} failed."))
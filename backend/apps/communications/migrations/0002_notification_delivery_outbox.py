@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:37
+
+from django.db import migrations, models
+
+
+def close_history(apps, schema_editor):
+    # Nothing sent notifications before the outbox; delivering the whole
+    # history on the first worker run would flood every user
+    Notification = apps.get_model('communications', 'Notification')
+    Notification.objects.filter(is_push_sent=False).update(is_push_sent=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='next_push_at',
+            field=models.DateTimeField(blank=True, help_text='Earliest time of the next delivery attempt', null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='push_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='push_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='push_lease',
+            field=models.UUIDField(blank=True, help_text='Delivery worker batch holding the notification', null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='push_leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='pushed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_push_sent', 'next_push_at'], name='notification_outbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['push_lease'], name='notification_lease_idx'),
+        ),
+        migrations.RunPython(close_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0002_notification_delivery_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='push_channels',
+            field=models.CharField(blank=True, default='', help_text='Comma-separated channels already delivered on', max_length=200),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:12
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0003_notification_push_channels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FanOut',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('trip_update', 'Trip Update'), ('announcement', 'Announcement')], max_length=20)),
+                ('related_id', models.UUIDField(help_text='ID of the trip update or announcement message')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('notifications_created', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Notification Fan-out',
+                'verbose_name_plural': 'Notification Fan-outs',
+                'db_table': 'notification_fan_outs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['related_id', 'notification_type'], name='notification_related_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fanout',
+            index=models.Index(fields=['status', 'created_at'], name='fan_out_status_idx'),
+        ),
+    ]
@@ -178,6 +178,15 @@ class Notification(models.Model):
     related_id = models.UUIDField(blank=True, null=True, help_text="ID of related object (booking, message, etc.)")
     is_read = models.BooleanField(default=False)
     is_push_sent = models.BooleanField(default=False)
+    pushed_at = models.DateTimeField(blank=True, null=True)
+    push_attempts = models.PositiveIntegerField(default=0)
+    push_channels = models.CharField(
+        max_length=200, blank=True, default='', help_text="Comma-separated channels already delivered on"
+    )
+    next_push_at = models.DateTimeField(blank=True, null=True, help_text="Earliest time of the next delivery attempt")
+    push_lease = models.UUIDField(blank=True, null=True, help_text="Delivery worker batch holding the notification")
+    push_leased_until = models.DateTimeField(blank=True, null=True)
+    push_error = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -185,6 +194,50 @@ class Notification(models.Model):
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_push_sent', 'next_push_at'], name='notification_outbox_idx'),
+            models.Index(fields=['push_lease'], name='notification_lease_idx'),
+            models.Index(fields=['related_id', 'notification_type'], name='notification_related_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.first_name} - {self.title}"
+
+
+class FanOut(models.Model):
+    """
+    Notification fan-out for a trip update or announcement, recorded with
+    the post so a run lost with its worker can be run again
+    """
+    KIND_CHOICES = [
+        ('trip_update', 'Trip Update'),
+        ('announcement', 'Announcement'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    related_id = models.UUIDField(help_text="ID of the trip update or announcement message")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    notifications_created = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'notification_fan_outs'
+        verbose_name = 'Notification Fan-out'
+        verbose_name_plural = 'Notification Fan-outs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='fan_out_status_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.first_name} - {self.title}"
\ No newline at end of file
+        return f"{self.get_kind_display()} {self.related_id} ({self.status})"
\ No newline at end of file
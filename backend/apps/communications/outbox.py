@@ -0,0 +1,175 @@
+"""
+Notification delivery outbox
+
+Saved notifications with ``is_push_sent`` off form the outbox. A worker
+claims a batch of them with SELECT ... FOR UPDATE SKIP LOCKED where the
+database supports it, and stamps the batch with a lease so that other
+workers (or the same one after a crash, once the lease expires) leave it
+alone. The batch is grouped per user and sent on every channel in
+NOTIFICATION_BACKENDS it has not been delivered on yet, then the fully
+delivered notifications are marked sent with one UPDATE and the rest are
+scheduled for a retry with exponential backoff, also with one UPDATE,
+remembering the channels that did succeed so a retry only sends on the
+failed ones. Delivery is at least once: a notification whose lease runs out
+before it is marked can be sent again.
+"""
+import logging
+import random
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, CharField, DateTimeField, F, Q, TextField, Value, When
+from django.utils import timezone
+
+from .delivery import get_backends
+from .models import Notification
+
+
+logger = logging.getLogger(__name__)
+
+
+def claimable(now):
+    """
+    Unsent notifications that are due and not leased to a worker
+    """
+    return (
+        Q(is_push_sent=False, push_attempts__lt=settings.NOTIFICATION_MAX_ATTEMPTS)
+        & (Q(next_push_at__isnull=True) | Q(next_push_at__lte=now))
+        & (Q(push_leased_until__isnull=True) | Q(push_leased_until__lt=now))
+    )
+
+
+def backoff(attempt):
+    """
+    Delay before retry number ``attempt``: doubling from
+    NOTIFICATION_RETRY_BASE_SECONDS up to NOTIFICATION_RETRY_MAX_SECONDS,
+    with some jitter so failed batches do not all come back at once
+    """
+    delay = min(
+        settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempt - 1),
+        settings.NOTIFICATION_RETRY_MAX_SECONDS
+    )
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(batch_size=None, notifications=None):
+    """
+    Lease up to ``batch_size`` due notifications, oldest first, returning
+    the lease and the leased notifications with their users
+    """
+    batch_size = batch_size or settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+    notifications = Notification.objects.all() if notifications is None else notifications
+    lease = uuid.uuid4()
+    now = timezone.now()
+
+    with transaction.atomic():
+        pending = notifications.filter(claimable(now))
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        ids = list(pending.order_by('created_at').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return lease, []
+        # The conditions are checked again for databases without row locks
+        Notification.objects.filter(claimable(now), pk__in=ids).update(
+            push_lease=lease,
+            push_leased_until=now + timedelta(seconds=settings.NOTIFICATION_DELIVERY_LEASE_SECONDS)
+        )
+    return lease, list(Notification.objects.filter(push_lease=lease).select_related('user').order_by('created_at'))
+
+
+def deliver_batch(backends=None, batch_size=None, notifications=None):
+    """
+    Claim and deliver one batch, returning how many notifications were
+    claimed, sent and failed
+    """
+    backends = get_backends() if backends is None else backends
+    lease, batch = claim(batch_size, notifications)
+    if not batch:
+        return {'claimed': 0, 'sent': 0, 'failed': 0}
+
+    delivered = {
+        notification.pk: set(filter(None, notification.push_channels.split(',')))
+        for notification in batch
+    }
+    failures = {}
+    for backend in backends:
+        groups = defaultdict(list)
+        for notification in batch:
+            if backend.channel not in delivered[notification.pk]:
+                groups[notification.user_id].append(notification)
+        if not groups:
+            continue
+        try:
+            backend.open()
+        except Exception as exc:
+            logger.warning("Could not open %s delivery: %s", backend.channel, exc)
+            for notifications_for_user in groups.values():
+                for notification in notifications_for_user:
+                    failures.setdefault(notification.pk, f"{backend.channel}: {exc}")
+            continue
+        try:
+            for user_id, notifications_for_user in groups.items():
+                try:
+                    backend.send(notifications_for_user[0].user, notifications_for_user)
+                except Exception as exc:
+                    logger.warning("%s delivery to user %s failed: %s", backend.channel, user_id, exc)
+                    for notification in notifications_for_user:
+                        failures.setdefault(notification.pk, f"{backend.channel}: {exc}")
+                    continue
+                for notification in notifications_for_user:
+                    delivered[notification.pk].add(backend.channel)
+        finally:
+            backend.close()
+
+    now = timezone.now()
+    sent = [notification.pk for notification in batch if notification.pk not in failures]
+    failed = [notification for notification in batch if notification.pk in failures]
+    if sent:
+        Notification.objects.filter(pk__in=sent, push_lease=lease).update(
+            is_push_sent=True, pushed_at=now, push_error=None,
+            push_channels=','.join(sorted({backend.channel for backend in backends})),
+            next_push_at=None, push_lease=None, push_leased_until=None
+        )
+    if failed:
+        attempts = {notification.push_attempts for notification in failed}
+        channels, errors = defaultdict(list), defaultdict(list)
+        for notification in failed:
+            channels[','.join(sorted(delivered[notification.pk]))].append(notification.pk)
+            errors[failures[notification.pk]].append(notification.pk)
+        Notification.objects.filter(pk__in=[notification.pk for notification in failed], push_lease=lease).update(
+            push_attempts=F('push_attempts') + 1,
+            next_push_at=Case(
+                *[When(push_attempts=attempt, then=Value(now + backoff(attempt + 1))) for attempt in attempts],
+                output_field=DateTimeField()
+            ),
+            push_channels=Case(
+                *[When(pk__in=ids, then=Value(value)) for value, ids in channels.items()],
+                output_field=CharField()
+            ),
+            push_error=Case(
+                *[When(pk__in=ids, then=Value(error)) for error, ids in errors.items()],
+                output_field=TextField()
+            ),
+            push_lease=None,
+            push_leased_until=None
+        )
+    return {'claimed': len(batch), 'sent': len(sent), 'failed': len(failed)}
+
+
+def deliver(backends=None, batch_size=None, notifications=None, max_batches=None):
+    """
+    Deliver batches until nothing is due (or ``max_batches`` have run),
+    returning the totals and the number of batches
+    """
+    totals = {'batches': 0, 'claimed': 0, 'sent': 0, 'failed': 0}
+    while max_batches is None or totals['batches'] < max_batches:
+        result = deliver_batch(backends, batch_size, notifications)
+        if not result['claimed']:
+            break
+        totals['batches'] += 1
+        for key, value in result.items():
+            totals[key] += value
+    return totals
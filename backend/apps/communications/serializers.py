@@ -120,6 +120,14 @@ class MessageCreateSerializer(serializers.ModelSerializer):
             except (ValueError, TypeError):
                 raise serializers.ValidationError("Latitude and longitude must be valid numbers.")
         return value
+    
+    def validate(self, attrs):
+        # Announcements notify every participant, so only organizers and admins send them
+        request = self.context.get('request')
+        if attrs.get('message_type') == 'announcement' and request and hasattr(request, 'user'):
+            if request.user.role not in ('transport_organizer', 'admin'):
+                raise serializers.ValidationError({'message_type': "Only organizers and admins can send announcements."})
+        return attrs
 
 
 class CommunicationReportSerializer(serializers.ModelSerializer):
@@ -0,0 +1,21 @@
+"""
+Signal handlers fanning out notifications
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.transport.models import TripUpdate
+from .models import Message
+from . import fanout
+
+
+@receiver(post_save, sender=TripUpdate)
+def trip_update_created(sender, instance, created, **kwargs):
+    if created and instance.is_active and instance.update_type not in fanout.SILENT_UPDATE_TYPES:
+        fanout.schedule('trip_update', instance.pk)
+
+
+@receiver(post_save, sender=Message)
+def message_created(sender, instance, created, **kwargs):
+    if created and instance.message_type == 'announcement':
+        fanout.schedule('announcement', instance.pk)
@@ -0,0 +1,52 @@
+"""
+Filters for Payments app
+"""
+import django_filters
+from .models import Transaction, WalletTransaction, AuditLog
+
+
+class TransactionFilter(django_filters.FilterSet):
+    """
+    Filter for transactions
+    """
+    transaction_type = django_filters.ChoiceFilter(choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    status = django_filters.ChoiceFilter(choices=Transaction.STATUS_CHOICES)
+    payment_method = django_filters.ChoiceFilter(choices=Transaction.PAYMENT_METHOD_CHOICES)
+    min_amount = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    max_amount = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+    created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
+    
+    class Meta:
+        model = Transaction
+        fields = [
+            'transaction_type', 'status', 'payment_method', 'booking',
+            'min_amount', 'max_amount', 'created_after', 'created_before'
+        ]
+
+
+class WalletTransactionFilter(django_filters.FilterSet):
+    """
+    Filter for wallet transactions
+    """
+    transaction_type = django_filters.ChoiceFilter(choices=WalletTransaction.TRANSACTION_TYPE_CHOICES)
+    reference_type = django_filters.ChoiceFilter(choices=WalletTransaction.REFERENCE_TYPE_CHOICES)
+    created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
+    
+    class Meta:
+        model = WalletTransaction
+        fields = ['transaction_type', 'reference_type', 'created_after', 'created_before']
+
+
+class AuditLogFilter(django_filters.FilterSet):
+    """
+    Filter for audit logs
+    """
+    action = django_filters.CharFilter(lookup_expr='startswith')
+    created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
+    
+    class Meta:
+        model = AuditLog
+        fields = ['action', 'table_name', 'record_id', 'user', 'created_after', 'created_before']
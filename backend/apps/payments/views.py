@@ -9,6 +9,8 @@ from django.db.models import Sum, Q
 from django.utils import timezone
 import uuid
 
+from apps.exports import StreamingExportMixin
+from .filters import TransactionFilter, WalletTransactionFilter, AuditLogFilter
 from .models import PaymentMethod, Transaction, WalletTransaction, AuditLog
 from .serializers import (
     PaymentMethodSerializer, PaymentMethodCreateSerializer,
@@ -70,14 +72,23 @@ class PaymentMethodDetailView(generics.RetrieveUpdateDestroyAPIView):
         return PaymentMethodSerializer
 
 
-class TransactionListView(generics.ListAPIView):
+class TransactionListView(StreamingExportMixin, generics.ListAPIView):
     """
     List transactions for the current user
     """
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = TransactionFilter
     ordering = ['-created_at']
+    export_fields = (
+        ('id', 'id'), ('booking', 'booking_id'), ('student', 'student_id'), ('organizer', 'organizer_id'),
+        ('transaction_type', 'transaction_type'), ('amount', 'amount'), ('currency', 'currency'),
+        ('payment_method', 'payment_method'), ('payment_reference', 'payment_reference'),
+        ('external_reference', 'external_reference'), ('status', 'status'), ('description', 'description'),
+        ('processed_at', 'processed_at'), ('created_at', 'created_at'),
+    )
+    export_name = 'transactions'
     
     def get_queryset(self):
         if self.request.user.role == 'student':
@@ -124,14 +135,22 @@ class TransactionDetailView(generics.RetrieveAPIView):
             return Transaction.objects.none()
 
 
-class WalletTransactionListView(generics.ListAPIView):
+class WalletTransactionListView(StreamingExportMixin, generics.ListAPIView):
     """
     List wallet transactions for the current user
     """
     serializer_class = WalletTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = WalletTransactionFilter
     ordering = ['-created_at']
+    export_fields = (
+        ('id', 'id'), ('transaction_type', 'transaction_type'), ('amount', 'amount'),
+        ('balance_before', 'balance_before'), ('balance_after', 'balance_after'),
+        ('reference_type', 'reference_type'), ('reference_id', 'reference_id'),
+        ('description', 'description'), ('created_at', 'created_at'),
+    )
+    export_name = 'wallet-transactions'
     
     def get_queryset(self):
         try:
@@ -288,14 +307,21 @@ def payment_stats(request):
         )
 
 
-class AuditLogListView(generics.ListAPIView):
+class AuditLogListView(StreamingExportMixin, generics.ListAPIView):
     """
     List audit logs (admin only)
     """
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = AuditLogFilter
     ordering = ['-created_at']
+    export_fields = (
+        ('id', 'id'), ('user', 'user_id'), ('action', 'action'), ('table_name', 'table_name'),
+        ('record_id', 'record_id'), ('old_values', 'old_values'), ('new_values', 'new_values'),
+        ('ip_address', 'ip_address'), ('user_agent', 'user_agent'), ('created_at', 'created_at'),
+    )
+    export_name = 'audit-logs'
     
     def get_queryset(self):
         if self.request.user.role == 'admin':
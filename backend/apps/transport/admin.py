@@ -2,7 +2,28 @@
 Admin configuration for Transport app
 """
 from django.contrib import admin
-from .models import TransportOption, TripUpdate, Review
+from .models import TransportOption, TripUpdate, Review, RoutePerformance, RoutePopularity, Stop, StopAlias
+
+
+class StopAliasInline(admin.TabularInline):
+    """
+    Inline admin for stop aliases
+    """
+    model = StopAlias
+    fields = ('name',)
+    extra = 1
+
+
+@admin.register(Stop)
+class StopAdmin(admin.ModelAdmin):
+    """
+    Stop admin
+    """
+    list_display = ('name', 'normalized_name', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'aliases__name')
+    readonly_fields = ('normalized_name', 'created_at', 'updated_at')
+    inlines = [StopAliasInline]
 
 
 @admin.register(TransportOption)
@@ -16,7 +37,8 @@ class TransportOptionAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
     
     fieldsets = (
-        ('Route Information', {'fields': ('organizer', 'route_name', 'departure_location', 'destination')}),
+        ('Route Information', {'fields': ('organizer', 'route_name', 'departure_location', 'destination', 'departure_stop', 'destination_stop')}),
+        ('Coordinates', {'fields': ('departure_location_data', 'destination_location_data')}),
         ('Schedule', {'fields': ('departure_time', 'arrival_time', 'days_of_operation')}),
         ('Pricing & Capacity', {'fields': ('price', 'total_seats', 'available_seats')}),
         ('Status', {'fields': ('is_active',)}),
@@ -32,14 +54,14 @@ class TripUpdateAdmin(admin.ModelAdmin):
     """
     Trip Update admin
     """
-    list_display = ('title', 'transport_option', 'organizer', 'update_type', 'is_active', 'created_at')
+    list_display = ('title', 'transport_option', 'organizer', 'update_type', 'service_date', 'is_active', 'created_at')
     list_filter = ('update_type', 'is_active', 'created_at')
     search_fields = ('title', 'message', 'transport_option__route_name', 'organizer__business_name')
     readonly_fields = ('created_at',)
     
     fieldsets = (
         ('Update Information', {'fields': ('transport_option', 'organizer', 'update_type', 'title', 'message')}),
-        ('Location & Timing', {'fields': ('location_data', 'estimated_arrival')}),
+        ('Location & Timing', {'fields': ('service_date', 'location_data', 'estimated_arrival')}),
         ('Status', {'fields': ('is_active',)}),
         ('Timestamp', {'fields': ('created_at',)}),
     )
@@ -48,6 +70,33 @@ class TripUpdateAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('transport_option', 'organizer', 'organizer__user')
 
 
+@admin.register(RoutePerformance)
+class RoutePerformanceAdmin(admin.ModelAdmin):
+    """
+    Route Performance admin
+    """
+    list_display = ('organizer', 'transport_option', 'trips_count', 'on_time_rate', 'cancellation_rate', 'p90_delay_minutes', 'computed_at')
+    list_filter = ('computed_at',)
+    search_fields = ('organizer__business_name', 'transport_option__route_name')
+    readonly_fields = ('computed_at',)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('organizer', 'transport_option')
+
+
+@admin.register(RoutePopularity)
+class RoutePopularityAdmin(admin.ModelAdmin):
+    """
+    Route Popularity admin
+    """
+    list_display = ('transport_option', 'bookings_count', 'views_count', 'updated_at')
+    search_fields = ('transport_option__route_name',)
+    readonly_fields = ('log_score', 'bookings_count', 'views_count', 'updated_at')
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('transport_option')
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     """
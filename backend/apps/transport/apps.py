@@ -7,4 +7,7 @@ from django.apps import AppConfig
 class TransportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.transport'
-    verbose_name = 'Transport'
\ No newline at end of file
+    verbose_name = 'Transport'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,124 @@
+"""
+Location autocomplete served from an in-memory prefix index
+
+Every stop name and alias is indexed under each of its word starts, so
+"gate" and "main g" both find "Main Gate". Terms are kept in one sorted
+array and a prefix is answered by bisecting to the range of terms that
+start with it. Stops are ranked by recent booking popularity, and ranked
+results are memoized because short prefixes span most of the index.
+"""
+import heapq
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .indexes import InMemoryIndex
+from .stops import normalize_stop_name
+
+
+MAX_MEMOIZED_RESULTS = 10000
+
+
+def word_starts(normalized_name):
+    """
+    Suffixes of a normalized name that begin at a word boundary
+    """
+    words = normalized_name.split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class PlaceIndex(InMemoryIndex):
+    """
+    Sorted (term, stop_id, alias name) entries over all active stops
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._entries = []
+        self._stops = {}
+        self._results = {}
+
+    def load(self):
+        from apps.bookings.models import Booking
+        from .models import Stop, StopAlias
+
+        stops = {
+            str(stop_id): {'name': name, 'weight': 0}
+            for stop_id, name in Stop.objects.filter(is_active=True).values_list('id', 'name')
+        }
+
+        since = timezone.now() - timedelta(days=settings.AUTOCOMPLETE_POPULARITY_DAYS)
+        bookings = Booking.objects.filter(created_at__gte=since).order_by()
+        for field in ('transport_option__departure_stop_id', 'transport_option__destination_stop_id'):
+            for stop_id, count in bookings.values(field).annotate(count=Count('id')).values_list(field, 'count'):
+                if stop_id and str(stop_id) in stops:
+                    stops[str(stop_id)]['weight'] += count
+
+        entries = []
+        for stop_id, name, normalized_name in StopAlias.objects.values_list('stop_id', 'name', 'normalized_name'):
+            if str(stop_id) in stops:
+                entries.extend((term, str(stop_id), name) for term in word_starts(normalized_name))
+        entries.sort()
+        self._entries, self._stops, self._results = entries, stops, {}
+
+    def add_stop(self, stop):
+        if not self.is_built:
+            return
+        with self._lock:
+            if stop.is_active:
+                self._stops.setdefault(str(stop.pk), {'name': stop.name, 'weight': 0})
+                self._results = {}
+
+    def add_alias(self, alias):
+        if not self.is_built:
+            return
+        with self._lock:
+            if str(alias.stop_id) not in self._stops:
+                return
+            for term in word_starts(alias.normalized_name):
+                insort(self._entries, (term, str(alias.stop_id), alias.name))
+            self._results = {}
+
+    def suggest(self, text, limit):
+        """
+        Up to ``limit`` stops with a name or alias word starting with ``text``,
+        most booked first
+        """
+        self.ensure_built()
+        prefix = normalize_stop_name(text)
+        if not prefix:
+            return []
+        results = self._results.get((prefix, limit))
+        if results is not None:
+            return results
+        entries = self._entries
+        stops = self._stops
+        matches = {}
+        index = bisect_left(entries, (prefix,))
+        while index < len(entries) and entries[index][0].startswith(prefix):
+            _, stop_id, alias_name = entries[index]
+            matches.setdefault(stop_id, alias_name)
+            index += 1
+
+        ranked = heapq.nsmallest(
+            limit, matches, key=lambda stop_id: (-stops[stop_id]['weight'], stops[stop_id]['name'])
+        )
+        results = [
+            {
+                'id': stop_id,
+                'name': stops[stop_id]['name'],
+                'matched': matches[stop_id],
+                'popularity': stops[stop_id]['weight'],
+            }
+            for stop_id in ranked
+        ]
+        if len(self._results) >= MAX_MEMOIZED_RESULTS:
+            self._results = {}
+        self._results[(prefix, limit)] = results
+        return results
+
+
+place_index = PlaceIndex()
@@ -0,0 +1,223 @@
+"""
+In-memory departure board index
+
+Active transport options are grouped by departure stop and kept sorted by
+departure time, so "what leaves from X in the next hour" is answered by
+bisection without touching the database.
+"""
+from bisect import bisect_left
+from decimal import Decimal
+
+from .indexes import InMemoryIndex
+from .stops import normalize_stop_name
+
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def days_mask(days_of_operation):
+    mask = 0
+    for day in days_of_operation or []:
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
+def stop_key(stop_id, name):
+    """
+    Index key of a route endpoint: its stop id, or its normalized name if unresolved
+    """
+    if stop_id:
+        return str(stop_id)
+    return normalize_stop_name(name)
+
+
+class Departure:
+    """
+    Compact board entry for a single transport option
+    """
+    __slots__ = (
+        'seconds', 'arrival_seconds', 'id', 'route_name', 'departure_location', 'destination',
+        'destination_key', 'departure_time', 'arrival_time', 'price', 'available_seats', 'days'
+    )
+
+    def __init__(self, option):
+        departure_time = option['departure_time']
+        arrival_time = option['arrival_time']
+        self.seconds = departure_time.hour * 3600 + departure_time.minute * 60 + departure_time.second
+        self.arrival_seconds = arrival_time.hour * 3600 + arrival_time.minute * 60 + arrival_time.second
+        self.id = str(option['id'])
+        self.route_name = option['route_name']
+        self.departure_location = option['departure_location']
+        self.destination = option['destination']
+        self.destination_key = stop_key(option['destination_stop_id'], option['destination'])
+        self.departure_time = departure_time.strftime('%H:%M')
+        self.arrival_time = arrival_time.strftime('%H:%M')
+        self.price = Decimal(option['price'])
+        self.available_seats = option['available_seats']
+        self.days = days_mask(option['days_of_operation'])
+
+    @property
+    def sort_key(self):
+        return (self.seconds, self.id)
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'route_name': self.route_name,
+            'departure_location': self.departure_location,
+            'destination': self.destination,
+            'departure_time': self.departure_time,
+            'arrival_time': self.arrival_time,
+            'price': str(self.price),
+            'available_seats': self.available_seats,
+        }
+
+
+OPTION_FIELDS = (
+    'id', 'route_name', 'departure_location', 'departure_stop_id', 'destination',
+    'destination_stop_id', 'departure_time', 'arrival_time', 'price', 'available_seats', 'days_of_operation'
+)
+
+
+class DepartureBoardIndex(InMemoryIndex):
+    """
+    Per-stop lists of departures sorted by departure time
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._keys = {}
+        self._entries = {}
+        self._locations = {}
+        self._aliases = {}
+
+    def location_key(self, option):
+        return stop_key(option['departure_stop_id'], option['departure_location'])
+    
+    def resolve_key(self, location=None, stop_id=None):
+        """
+        Index key for a stop id, or for the stop a location name resolves to
+        """
+        self.ensure_built()
+        if stop_id:
+            return str(stop_id)
+        normalized = normalize_stop_name(location)
+        return self._aliases.get(normalized, normalized)
+    
+    def departures_from(self, key, after_seconds):
+        """
+        Departures from a stop key at or after ``after_seconds``, in departure order
+        """
+        keys = self._keys.get(key)
+        if not keys:
+            return []
+        return self._entries[key][bisect_left(keys, (after_seconds, '')):]
+
+    def load(self):
+        from .models import TransportOption, StopAlias
+
+        self._aliases = {
+            normalized_name: str(stop_id)
+            for normalized_name, stop_id in StopAlias.objects.values_list('normalized_name', 'stop_id')
+        }
+
+        boards = {}
+        locations = {}
+        options = TransportOption.objects.filter(
+            is_active=True,
+            organizer__approval_status='approved'
+        ).values(*OPTION_FIELDS)
+        for option in options.iterator():
+            key = self.location_key(option)
+            departure = Departure(option)
+            boards.setdefault(key, []).append(departure)
+            locations[departure.id] = (key, departure.sort_key)
+
+        keys = {}
+        entries = {}
+        for key, departures in boards.items():
+            departures.sort(key=lambda departure: departure.sort_key)
+            entries[key] = departures
+            keys[key] = [departure.sort_key for departure in departures]
+        self._keys, self._entries, self._locations = keys, entries, locations
+
+    def add_alias(self, alias):
+        if not self.is_built:
+            return
+        with self._lock:
+            self._aliases[alias.normalized_name] = str(alias.stop_id)
+    
+    def _remove(self, option_id):
+        located = self._locations.pop(option_id, None)
+        if located is None:
+            return
+        key, sort_key = located
+        keys = self._keys[key]
+        index = bisect_left(keys, sort_key)
+        if index < len(keys) and keys[index] == sort_key:
+            del keys[index]
+            del self._entries[key][index]
+        if not keys:
+            del self._keys[key]
+            del self._entries[key]
+
+    def upsert(self, option):
+        if not self.is_built:
+            return
+        with self._lock:
+            option_id = str(option.pk)
+            self._remove(option_id)
+            if not option.is_active or option.organizer.approval_status != 'approved':
+                return
+            values = {field: getattr(option, field) for field in OPTION_FIELDS}
+            departure = Departure(values)
+            key = self.location_key(values)
+            keys = self._keys.setdefault(key, [])
+            index = bisect_left(keys, departure.sort_key)
+            keys.insert(index, departure.sort_key)
+            self._entries.setdefault(key, []).insert(index, departure)
+            self._locations[option_id] = (key, departure.sort_key)
+
+    def discard(self, option_id):
+        with self._lock:
+            self._remove(str(option_id))
+
+    def board(self, location, weekday, after_seconds, within_minutes, limit, stop_id=None):
+        """
+        Departures from ``stop_id`` or the stop ``location`` resolves to, within
+        ``within_minutes`` of ``after_seconds`` on ``weekday`` (0 = Monday),
+        continuing into the next day past midnight.
+
+        Returns (departure, is_next_day) pairs in departure order.
+        """
+        key = self.resolve_key(location, stop_id)
+        keys = self._keys.get(key)
+        if not keys:
+            return []
+        entries = self._entries[key]
+        end_seconds = after_seconds + within_minutes * 60
+
+        results = []
+        day_bit = 1 << weekday
+        start = bisect_left(keys, (after_seconds, ''))
+        stop = bisect_left(keys, (min(end_seconds, SECONDS_PER_DAY) + 1, ''))
+        for departure in entries[start:stop]:
+            if departure.days & day_bit:
+                results.append((departure, False))
+                if len(results) >= limit:
+                    return results
+
+        if end_seconds > SECONDS_PER_DAY:
+            next_day_bit = 1 << ((weekday + 1) % 7)
+            stop = bisect_left(keys, (end_seconds - SECONDS_PER_DAY + 1, ''))
+            for departure in entries[:stop]:
+                if departure.days & next_day_bit:
+                    results.append((departure, True))
+                    if len(results) >= limit:
+                        break
+        return results
+
+
+departure_board = DepartureBoardIndex()
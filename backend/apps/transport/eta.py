@@ -0,0 +1,214 @@
+"""
+ETA prediction from historical trip location traces
+
+Training bins the segment speeds between consecutive location pings of the
+same trip by route and local time of day. Serving only needs the trained
+speeds, which are kept in memory and reloaded whenever the model file on
+disk is replaced by a new training run.
+"""
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .spatial import haversine_km, parse_coordinates
+
+
+MINUTES_PER_DAY = 24 * 60
+# Segments faster than this are GPS glitches rather than real movement
+MAX_PLAUSIBLE_KMH = 120.0
+# Pings further apart than this are treated as separate trips
+MAX_SEGMENT_SECONDS = 30 * 60
+# Bins with less observed driving time than this fall back to the route average
+MIN_BIN_SECONDS = 120.0
+
+
+def time_bin(moment, bin_minutes):
+    """
+    Index of the local time-of-day bin containing ``moment``
+    """
+    local = timezone.localtime(moment)
+    return (local.hour * 60 + local.minute) // bin_minutes
+
+
+def train(history_days=None):
+    """
+    Learn per-route, per-time-of-day speeds from stored location updates.
+
+    Returns the model as a JSON-serialisable dict.
+    """
+    import numpy as np
+    from .models import TripUpdate
+
+    bin_minutes = settings.ETA_TIME_BIN_MINUTES
+    n_bins = MINUTES_PER_DAY // bin_minutes
+    history_days = history_days or settings.ETA_HISTORY_DAYS
+
+    pings = TripUpdate.objects.filter(
+        location_data__isnull=False,
+        created_at__gte=timezone.now() - timedelta(days=history_days)
+    ).order_by('transport_option_id', 'created_at').values_list(
+        'transport_option_id', 'created_at', 'location_data'
+    )
+
+    route_ids = []
+    route_codes = {}
+    codes, local_seconds, lats, lngs = [], [], [], []
+    for option_id, created_at, location_data in pings.iterator(chunk_size=5000):
+        coordinates = parse_coordinates(location_data)
+        if coordinates is None:
+            continue
+        code = route_codes.get(option_id)
+        if code is None:
+            code = route_codes[option_id] = len(route_ids)
+            route_ids.append(str(option_id))
+        offset = timezone.localtime(created_at).utcoffset().total_seconds()
+        codes.append(code)
+        local_seconds.append(created_at.timestamp() + offset)
+        lats.append(coordinates[0])
+        lngs.append(coordinates[1])
+
+    model = {
+        'trained_at': timezone.now().isoformat(),
+        'bin_minutes': bin_minutes,
+        'samples': 0,
+        'global_kmh': settings.ETA_DEFAULT_SPEED_KMH,
+        'routes': {},
+    }
+    if len(codes) < 2:
+        return model
+
+    codes = np.asarray(codes, dtype=np.int64)
+    seconds = np.asarray(local_seconds, dtype=np.float64)
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+
+    # Consecutive ping pairs; the ordering above keeps each route contiguous
+    d_lat = lat[1:] - lat[:-1]
+    d_lng = lng[1:] - lng[:-1]
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(d_lng / 2) ** 2
+    distance_km = 2 * 6371.0088 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    elapsed = seconds[1:] - seconds[:-1]
+    same_trip = (
+        (codes[1:] == codes[:-1])
+        & (np.floor(seconds[1:] / 86400) == np.floor(seconds[:-1] / 86400))
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kmh = np.where(elapsed > 0, distance_km / elapsed * 3600, np.inf)
+    valid = same_trip & (elapsed > 0) & (elapsed <= MAX_SEGMENT_SECONDS) & (kmh <= MAX_PLAUSIBLE_KMH)
+    if not valid.any():
+        return model
+
+    segment_route = codes[:-1][valid]
+    segment_bin = ((seconds[:-1][valid] % 86400) // (bin_minutes * 60)).astype(np.int64)
+    segment_km = distance_km[valid]
+    segment_seconds = elapsed[valid]
+
+    n_routes = len(route_ids)
+    cell = segment_route * n_bins + segment_bin
+    km_by_cell = np.bincount(cell, weights=segment_km, minlength=n_routes * n_bins).reshape(n_routes, n_bins)
+    s_by_cell = np.bincount(cell, weights=segment_seconds, minlength=n_routes * n_bins).reshape(n_routes, n_bins)
+    km_by_route = km_by_cell.sum(axis=1)
+    s_by_route = s_by_cell.sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kmh_by_cell = np.where(s_by_cell >= MIN_BIN_SECONDS, km_by_cell / s_by_cell * 3600, np.nan)
+        kmh_by_route = np.where(s_by_route >= MIN_BIN_SECONDS, km_by_route / s_by_route * 3600, np.nan)
+
+    total_seconds = float(segment_seconds.sum())
+    if total_seconds >= MIN_BIN_SECONDS and segment_km.sum() > 0:
+        model['global_kmh'] = round(float(segment_km.sum()) / total_seconds * 3600, 3)
+    model['samples'] = int(valid.sum())
+
+    for code, route_id in enumerate(route_ids):
+        route_kmh = kmh_by_route[code]
+        if np.isnan(route_kmh) or route_kmh <= 0:
+            continue
+        bins = [
+            None if np.isnan(value) or value <= 0 else round(float(value), 3)
+            for value in kmh_by_cell[code]
+        ]
+        model['routes'][route_id] = {'kmh': round(float(route_kmh), 3), 'bins': bins}
+    return model
+
+
+def save(model, path=None):
+    """
+    Atomically replace the model file on disk
+    """
+    path = path or settings.ETA_MODEL_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as handle:
+        json.dump(model, handle)
+    os.replace(tmp_path, path)
+
+
+class EtaPredictor:
+    """
+    In-memory ETA model, reloaded when the model file changes
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._model = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def load(self, model):
+        with self._lock:
+            self._model = model
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._model is not None and now - self._checked_at < settings.ETA_MODEL_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(settings.ETA_MODEL_PATH).st_mtime
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            try:
+                with open(settings.ETA_MODEL_PATH) as handle:
+                    self._model = json.load(handle)
+                self._mtime = mtime
+            except (OSError, ValueError):
+                pass
+
+    def speed_kmh(self, transport_option_id, moment):
+        """
+        Expected speed for a route at a moment, falling back to the route and global averages
+        """
+        self._refresh()
+        model = self._model
+        if model is None:
+            return settings.ETA_DEFAULT_SPEED_KMH
+        route = model['routes'].get(str(transport_option_id))
+        if route is None:
+            return model['global_kmh']
+        speed = route['bins'][time_bin(moment, model['bin_minutes'])]
+        return speed or route['kmh']
+
+    def predict(self, transport_option, location_data, moment):
+        """
+        Predicted arrival datetime for a vehicle at ``location_data`` at ``moment``
+        """
+        destination = parse_coordinates(transport_option.destination_location_data)
+        position = parse_coordinates(location_data)
+        if destination is None or position is None:
+            return None
+        remaining_km = haversine_km(position[0], position[1], destination[0], destination[1])
+        if remaining_km <= settings.ETA_ARRIVAL_RADIUS_KM:
+            return moment
+        speed = self.speed_kmh(transport_option.pk, moment)
+        return moment + timedelta(hours=remaining_km / speed)
+
+
+predictor = EtaPredictor()
@@ -0,0 +1,117 @@
+"""
+Facet counts for the transport option listing
+
+All requested facets are counted in a single pass over the filtered
+listing rows. Counts are cached under a listing version that is bumped
+whenever routes, organizers or stops change.
+"""
+import hashlib
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+# (name, first hour, last hour exclusive); any other hour counts as night
+TIME_BANDS = [
+    ('morning', 5, 12),
+    ('afternoon', 12, 17),
+    ('evening', 17, 21),
+]
+FACETS = ('destination', 'price_band', 'weekday', 'time_band')
+LISTING_VERSION_KEY = 'transport:listing:version'
+
+
+def listing_version():
+    return cache.get_or_set(LISTING_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_listing():
+    """
+    Drop everything cached for the listing
+    """
+    cache.delete(LISTING_VERSION_KEY)
+
+
+def price_band(price):
+    lower = None
+    for upper in settings.FACET_PRICE_BANDS:
+        if price < upper:
+            return f'{lower}-{upper}' if lower is not None else f'<{upper}'
+        lower = upper
+    return f'{lower}+' if lower is not None else '0+'
+
+
+def price_band_labels():
+    bounds = settings.FACET_PRICE_BANDS
+    labels = [f'<{bounds[0]}'] if bounds else []
+    labels += [f'{lower}-{upper}' for lower, upper in zip(bounds, bounds[1:])]
+    labels += [f'{bounds[-1]}+'] if bounds else ['0+']
+    return labels
+
+
+def time_band(departure_time):
+    for name, start, end in TIME_BANDS:
+        if start <= departure_time.hour < end:
+            return name
+    return 'night'
+
+
+def compute_facets(queryset, names):
+    """
+    Counts per value of each requested facet over the rows of ``queryset``
+    """
+    counters = {name: Counter() for name in names}
+    destinations = {}
+    rows = queryset.order_by().values_list(
+        'destination_stop_id', 'destination_stop__name', 'destination',
+        'price', 'days_of_operation', 'departure_time'
+    )
+    for stop_id, stop_name, destination, price, days, departure_time in rows.iterator():
+        if 'destination' in counters:
+            key = str(stop_id) if stop_id else destination
+            destinations.setdefault(key, stop_name or destination)
+            counters['destination'][key] += 1
+        if 'price_band' in counters:
+            counters['price_band'][price_band(price)] += 1
+        if 'weekday' in counters:
+            for day in set(days or []):
+                counters['weekday'][day] += 1
+        if 'time_band' in counters:
+            counters['time_band'][time_band(departure_time)] += 1
+
+    facets = {}
+    for name, counter in counters.items():
+        if name == 'destination':
+            facets[name] = [
+                {'value': key, 'label': destinations[key], 'count': count}
+                for key, count in counter.most_common()
+            ]
+        else:
+            order = {
+                'price_band': price_band_labels(),
+                'weekday': WEEKDAYS,
+                'time_band': [band[0] for band in TIME_BANDS] + ['night'],
+            }[name]
+            facets[name] = [{'value': value, 'count': counter[value]} for value in order]
+    return facets
+
+
+def cached_facets(names, query_params, build_queryset):
+    """
+    ``compute_facets`` cached per listing version and filter state; the
+    filtered queryset is only built on a cache miss
+    """
+    state = sorted(
+        (key, value) for key, values in query_params.lists()
+        if key not in ('page', 'ordering', 'facets') for value in values
+    )
+    digest = hashlib.sha1(repr((sorted(names), state)).encode()).hexdigest()
+    key = f'transport:facets:{listing_version()}:{digest}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(build_queryset(), names)
+        cache.set(key, facets, settings.FACET_CACHE_SECONDS)
+    return facets
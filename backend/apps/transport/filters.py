@@ -3,6 +3,7 @@ Filters for Transport app
 """
 import django_filters
 from .models import TransportOption
+from .stops import lookup_stop_id
 
 
 class TransportOptionFilter(django_filters.FilterSet):
@@ -11,8 +12,10 @@ class TransportOptionFilter(django_filters.FilterSet):
     """
     min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
     max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
-    departure_location = django_filters.CharFilter(field_name='departure_location', lookup_expr='icontains')
-    destination = django_filters.CharFilter(field_name='destination', lookup_expr='icontains')
+    departure_location = django_filters.CharFilter(method='filter_location')
+    destination = django_filters.CharFilter(method='filter_location')
+    departure_stop = django_filters.UUIDFilter(field_name='departure_stop_id')
+    destination_stop = django_filters.UUIDFilter(field_name='destination_stop_id')
     departure_time_after = django_filters.TimeFilter(field_name='departure_time', lookup_expr='gte')
     departure_time_before = django_filters.TimeFilter(field_name='departure_time', lookup_expr='lte')
     days_of_operation = django_filters.CharFilter(method='filter_days_of_operation')
@@ -22,10 +25,23 @@ class TransportOptionFilter(django_filters.FilterSet):
         model = TransportOption
         fields = [
             'min_price', 'max_price', 'departure_location', 'destination',
-            'departure_time_after', 'departure_time_before', 'days_of_operation',
+            'departure_stop', 'destination_stop', 'departure_time_after', 'departure_time_before', 'days_of_operation',
             'min_available_seats'
         ]
     
+    def filter_location(self, queryset, name, value):
+        """
+        Filter by the stop a location name resolves to, falling back to a text
+        match for names that are not in the stop catalog
+        """
+        if not value:
+            return queryset
+        stop_field = 'departure_stop_id' if name == 'departure_location' else 'destination_stop_id'
+        stop_id = lookup_stop_id(value)
+        if stop_id:
+            return queryset.filter(**{stop_field: stop_id})
+        return queryset.filter(**{f'{name}__icontains': value})
+    
     def filter_days_of_operation(self, queryset, name, value):
         """
         Filter by days of operation
@@ -0,0 +1,55 @@
+"""
+Per-process in-memory indexes for BUI Transport System
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+_registry = []
+
+
+class InMemoryIndex:
+    """
+    Base class for per-process read indexes over transport data.
+
+    Subclasses implement ``load`` to rebuild their state from the database.
+    Model signals keep a built index up to date incrementally; an index is
+    built lazily on first use and rebuilt once it is older than
+    ``TRANSPORT_INDEX_MAX_AGE`` seconds so that writes handled by other
+    processes are eventually picked up.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+        _registry.append(self)
+
+    def load(self):
+        raise NotImplementedError
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def ensure_built(self):
+        built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > settings.TRANSPORT_INDEX_MAX_AGE:
+            self.rebuild()
+
+    def rebuild(self):
+        with self._lock:
+            self.load()
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        self._built_at = None
+
+
+def invalidate_all():
+    """
+    Drop every registered index so the next lookup rebuilds it
+    """
+    for index in _registry:
+        index.invalidate()
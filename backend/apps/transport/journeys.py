@@ -0,0 +1,117 @@
+"""
+Multi-leg journey planning over the departure board index
+
+Every departure in the board index is a direct ride between two stops, so
+the per-stop, time-sorted departure lists already form a time-expanded
+route graph that is kept current incrementally by the model signals.
+Fastest journeys are found with round-based earliest-arrival search (one
+round per leg, as in RAPTOR) and cheapest journeys with Dijkstra over
+rides. Journeys are planned within a single service day.
+"""
+import heapq
+import itertools
+
+from django.conf import settings
+
+from .departures import departure_board
+
+
+def _is_bookable(departure, day_bit):
+    return departure.days & day_bit and departure.available_seats > 0
+
+
+def _fastest(origin, target, day_bit, after_seconds, max_legs, transfer_seconds):
+    """
+    Earliest-arrival journey with at most ``max_legs`` rides.
+
+    Round k only relaxes departures from stops improved in round k - 1, so
+    the search touches each stop's departure list at most once per leg.
+    """
+    best = {origin: after_seconds}
+    # stop -> (arrival_seconds, departure, previous stop) for the current round
+    marked = {origin: (after_seconds, None, None)}
+    rounds = []
+    found = None
+    for leg in range(max_legs):
+        improved = {}
+        for stop, (arrival, _, _) in marked.items():
+            ready = arrival + (transfer_seconds if leg else 0)
+            for departure in departure_board.departures_from(stop, ready):
+                # Later departures cannot beat the best arrival at the target
+                if target in best and departure.seconds >= best[target]:
+                    break
+                if not _is_bookable(departure, day_bit):
+                    continue
+                destination = departure.destination_key
+                if departure.arrival_seconds < best.get(destination, float('inf')):
+                    best[destination] = departure.arrival_seconds
+                    improved[destination] = (departure.arrival_seconds, departure, stop)
+        rounds.append(improved)
+        if target in improved:
+            found = len(rounds) - 1
+        if not improved:
+            break
+        marked = improved
+
+    if found is None:
+        return None
+    legs = []
+    stop = target
+    for leg in range(found, -1, -1):
+        _, departure, stop = rounds[leg][stop]
+        legs.append(departure)
+    legs.reverse()
+    return legs
+
+
+def _cheapest(origin, target, day_bit, after_seconds, max_legs, transfer_seconds):
+    """
+    Cheapest journey with at most ``max_legs`` rides, earliest arrival on ties
+    """
+    counter = itertools.count()
+    heap = []
+
+    def push(departure, price, legs, parent):
+        if _is_bookable(departure, day_bit):
+            heapq.heappush(heap, (
+                price + departure.price, departure.arrival_seconds, legs, next(counter), (departure, parent)
+            ))
+
+    for departure in departure_board.departures_from(origin, after_seconds):
+        push(departure, 0, 1, None)
+
+    # Fewest legs a ride has been settled with; fewer legs leave more room to continue
+    settled = {}
+    while heap:
+        price, arrival, legs, _, path = heapq.heappop(heap)
+        departure = path[0]
+        if settled.get(departure.id, max_legs + 1) <= legs:
+            continue
+        settled[departure.id] = legs
+        if departure.destination_key == target:
+            rides = []
+            while path is not None:
+                rides.append(path[0])
+                path = path[1]
+            rides.reverse()
+            return rides
+        if legs < max_legs:
+            for following in departure_board.departures_from(departure.destination_key, arrival + transfer_seconds):
+                push(following, price, legs + 1, path)
+    return None
+
+
+def plan(origin, target, weekday, after_seconds, optimize='fastest', max_legs=None):
+    """
+    Plan a journey between two stop keys on ``weekday`` (0 = Monday),
+    leaving at or after ``after_seconds``.
+
+    Returns the list of departures ridden, or None when no journey exists.
+    """
+    departure_board.ensure_built()
+    if origin == target:
+        return None
+    max_legs = max_legs or settings.JOURNEY_MAX_LEGS
+    transfer_seconds = settings.JOURNEY_MIN_TRANSFER_MINUTES * 60
+    search = _cheapest if optimize == 'cheapest' else _fastest
+    return search(origin, target, 1 << weekday, after_seconds, max_legs, transfer_seconds)
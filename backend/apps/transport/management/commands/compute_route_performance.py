@@ -0,0 +1,23 @@
+"""
+Recompute on-time performance rollups from trip update history
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.transport import performance
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-trip outcomes and rolling on-time performance rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ROUTE_PERFORMANCE_WINDOW_DAYS,
+            help='Number of days of trip updates to reprocess'
+        )
+
+    def handle(self, *args, **options):
+        trips, routes = performance.recompute(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {trips} trips and refreshed performance for {routes} routes."
+        ))
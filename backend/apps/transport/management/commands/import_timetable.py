@@ -0,0 +1,49 @@
+"""
+Import an organizer's timetable from a CSV or JSON file
+"""
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.models import TransportOrganizer
+from apps.transport import timetable
+
+
+class Command(BaseCommand):
+    help = 'Bulk create or re-sync transport options from a CSV or JSON timetable'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organizer', help='Email of the organizer user')
+        parser.add_argument('path', help='Path to a .csv or .json timetable')
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Update routes matching an existing route name and departure time'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate without writing')
+
+    def handle(self, *args, **options):
+        try:
+            organizer = TransportOrganizer.objects.get(user__email=options['organizer'])
+        except TransportOrganizer.DoesNotExist:
+            raise CommandError(f"No organizer with email {options['organizer']}.")
+
+        path = options['path']
+        try:
+            with open(path, encoding='utf-8-sig') as handle:
+                if os.path.splitext(path)[1].lower() == '.json':
+                    rows = timetable.parse_json(json.load(handle))
+                else:
+                    rows = timetable.parse_csv(handle.read())
+            report = timetable.import_timetable(
+                organizer, rows, upsert=options['upsert'], dry_run=options['dry_run']
+            )
+        except (OSError, ValueError, timetable.TimetableError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} rows: {report['created']} created, {report['updated']} updated, "
+            f"{len(report['errors'])} rejected{' (dry run)' if report['dry_run'] else ''}."
+        ))
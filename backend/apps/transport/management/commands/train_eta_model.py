@@ -0,0 +1,26 @@
+"""
+Train the ETA model from stored trip location updates
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.transport import eta
+
+
+class Command(BaseCommand):
+    help = 'Learn per-route, per-time-of-day speeds from TripUpdate location history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ETA_HISTORY_DAYS,
+            help='Number of days of location history to train on'
+        )
+
+    def handle(self, *args, **options):
+        model = eta.train(history_days=options['days'])
+        eta.save(model)
+        eta.predictor.load(model)
+        self.stdout.write(self.style.SUCCESS(
+            f"Trained ETA model on {model['samples']} segments across "
+            f"{len(model['routes'])} routes (global {model['global_kmh']} km/h)."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transportoption',
+            name='departure_location_data',
+            field=models.JSONField(blank=True, help_text="GPS coordinates of the pickup point: {'lat': 6.5244, 'lng': 3.3792}", null=True),
+        ),
+        migrations.AddField(
+            model_name='transportoption',
+            name='destination_location_data',
+            field=models.JSONField(blank=True, help_text="GPS coordinates of the destination: {'lat': 6.5244, 'lng': 3.3792}", null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_studentprofile_emergency_contact_phone_and_more'),
+        ('transport', '0002_transportoption_location_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoutePerformance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('window_days', models.IntegerField()),
+                ('trips_count', models.IntegerField(default=0)),
+                ('on_time_rate', models.DecimalField(decimal_places=2, default=100, max_digits=5)),
+                ('cancellation_rate', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('mean_delay_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('p90_delay_minutes', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='route_performance', to='users.transportorganizer')),
+                ('transport_option', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='performance', to='transport.transportoption')),
+            ],
+            options={
+                'verbose_name': 'Route Performance',
+                'verbose_name_plural': 'Route Performance',
+                'db_table': 'route_performance',
+            },
+        ),
+        migrations.CreateModel(
+            name='TripPerformance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('service_date', models.DateField()),
+                ('delay_minutes', models.IntegerField(default=0)),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trip_performance', to='users.transportorganizer')),
+                ('transport_option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trip_performance', to='transport.transportoption')),
+            ],
+            options={
+                'verbose_name': 'Trip Performance',
+                'verbose_name_plural': 'Trip Performance',
+                'db_table': 'trip_performance',
+                'ordering': ['-service_date'],
+                'indexes': [models.Index(fields=['organizer', 'service_date'], name='trip_perfor_organiz_dd5260_idx')],
+                'unique_together': {('transport_option', 'service_date')},
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='routeperformance',
+            constraint=models.UniqueConstraint(condition=models.Q(('transport_option__isnull', True)), fields=('organizer',), name='unique_organizer_performance'),
+        ),
+    ]
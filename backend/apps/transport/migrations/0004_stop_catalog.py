@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0003_route_performance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Stop',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200, unique=True)),
+                ('location_data', models.JSONField(blank=True, help_text="GPS coordinates: {'lat': 6.5244, 'lng': 3.3792}", null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Stop',
+                'verbose_name_plural': 'Stops',
+                'db_table': 'stops',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StopAlias',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200, unique=True)),
+                ('stop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='transport.stop')),
+            ],
+            options={
+                'verbose_name': 'Stop Alias',
+                'verbose_name_plural': 'Stop Aliases',
+                'db_table': 'stop_aliases',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transportoption',
+            name='departure_stop',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='departures', to='transport.stop'),
+        ),
+        migrations.AddField(
+            model_name='transportoption',
+            name='destination_stop',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='arrivals', to='transport.stop'),
+        ),
+    ]
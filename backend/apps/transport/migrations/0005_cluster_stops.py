@@ -0,0 +1,90 @@
+# Clusters existing free-text route endpoints into the stop catalog
+
+import re
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import migrations
+
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize(name):
+    words = PUNCTUATION.sub(' ', (name or '').lower()).split()
+    kept = [word for word in words if word not in settings.STOP_NAME_IGNORED_WORDS]
+    return ' '.join(kept or words)
+
+
+def cluster_stops(apps, schema_editor):
+    TransportOption = apps.get_model('transport', 'TransportOption')
+    Stop = apps.get_model('transport', 'Stop')
+    StopAlias = apps.get_model('transport', 'StopAlias')
+
+    variants = defaultdict(Counter)
+    coordinates = defaultdict(list)
+    options = list(TransportOption.objects.values(
+        'id', 'departure_location', 'destination', 'departure_location_data', 'destination_location_data'
+    ))
+    for option in options:
+        for name, location_data in (
+            (option['departure_location'], option['departure_location_data']),
+            (option['destination'], option['destination_location_data']),
+        ):
+            key = normalize(name)
+            if not key:
+                continue
+            variants[key][' '.join(name.split())] += 1
+            try:
+                coordinates[key].append((float(location_data['lat']), float(location_data['lng'])))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    stops = {}
+    aliases = []
+    for key, names in variants.items():
+        points = coordinates.get(key)
+        stop = Stop(
+            id=uuid.uuid4(),
+            # The most common spelling becomes the display name
+            name=names.most_common(1)[0][0],
+            normalized_name=key,
+            location_data={
+                'lat': round(sum(lat for lat, _ in points) / len(points), 6),
+                'lng': round(sum(lng for _, lng in points) / len(points), 6),
+            } if points else None,
+        )
+        stops[key] = stop
+        aliases.append(StopAlias(id=uuid.uuid4(), stop=stop, name=stop.name, normalized_name=key))
+    Stop.objects.bulk_create(stops.values(), batch_size=500)
+    StopAlias.objects.bulk_create(aliases, batch_size=500)
+
+    updated = []
+    for option in options:
+        departure = stops.get(normalize(option['departure_location']))
+        destination = stops.get(normalize(option['destination']))
+        updated.append(TransportOption(
+            id=option['id'],
+            departure_stop_id=departure.id if departure else None,
+            destination_stop_id=destination.id if destination else None,
+        ))
+    TransportOption.objects.bulk_update(updated, ['departure_stop', 'destination_stop'], batch_size=500)
+
+
+def uncluster_stops(apps, schema_editor):
+    TransportOption = apps.get_model('transport', 'TransportOption')
+    Stop = apps.get_model('transport', 'Stop')
+    TransportOption.objects.update(departure_stop=None, destination_stop=None)
+    Stop.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0004_stop_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(cluster_stops, uncluster_stops),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:10
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def backfill_ratings(apps, schema_editor):
+    TransportOption = apps.get_model('transport', 'TransportOption')
+    Review = apps.get_model('transport', 'Review')
+    updated = [
+        TransportOption(
+            id=row['transport_option_id'],
+            rating_average=Decimal(row['average']).quantize(Decimal('0.01')),
+            rating_count=row['count'],
+        )
+        for row in Review.objects.values('transport_option_id').annotate(
+            average=Avg('rating'), count=Count('id')
+        ).order_by()
+    ]
+    TransportOption.objects.bulk_update(updated, ['rating_average', 'rating_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0005_cluster_stops'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transportoption',
+            name='rating_average',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='transportoption',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0006_transportoption_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoutePopularity',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('score', models.FloatField(default=0)),
+                ('bookings_count', models.IntegerField(default=0)),
+                ('views_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('transport_option', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='popularity', to='transport.transportoption')),
+            ],
+            options={
+                'verbose_name': 'Route Popularity',
+                'verbose_name_plural': 'Route Popularity',
+                'db_table': 'route_popularity',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0007_route_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tripupdate',
+            name='service_date',
+            field=models.DateField(blank=True, help_text='Date of the trip the update is about', null=True),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:05
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Landmark of the forward-decayed scores, as in apps.transport.trending
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def popularity_from_bookings(bookings):
+    rate = math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+    weight = settings.TRENDING_BOOKING_WEIGHT
+    totals = {}
+    for option_id, created_at in bookings:
+        total = totals.setdefault(option_id, [None, 0])
+        total[1] += 1
+        if weight <= 0:
+            continue
+        log_weight = math.log(weight) + rate * (created_at - EPOCH).total_seconds()
+        if total[0] is None:
+            total[0] = log_weight
+        else:
+            high, low = max(total[0], log_weight), min(total[0], log_weight)
+            total[0] = high + math.log1p(math.exp(low - high))
+    return totals
+
+
+def to_log_space(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    RoutePopularity = apps.get_model('transport', 'RoutePopularity')
+
+    rows = list(RoutePopularity.objects.filter(score__gt=0))
+    for row in rows:
+        row.log_score = math.log(row.score)
+    RoutePopularity.objects.bulk_update(rows, ['log_score'], batch_size=500)
+
+    # Backfill routes with bookings but no counters yet
+    bookings = Booking.objects.exclude(
+        transport_option_id__in=RoutePopularity.objects.values('transport_option_id')
+    ).values_list('transport_option_id', 'created_at')
+    RoutePopularity.objects.bulk_create([
+        RoutePopularity(transport_option_id=option_id, log_score=log_score, bookings_count=count)
+        for option_id, (log_score, count) in popularity_from_bookings(bookings.iterator()).items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0007_route_popularity'),
+        ('bookings', '0004_alter_booking_booking_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routepopularity',
+            name='log_score',
+            field=models.FloatField(blank=True, help_text='Natural log of the forward-decayed score', null=True),
+        ),
+        migrations.RunPython(to_log_space, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='routepopularity',
+            name='score',
+        ),
+    ]
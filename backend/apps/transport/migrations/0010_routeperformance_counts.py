@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+def counts_from_rates(apps, schema_editor):
+    # One-off approximation for existing rows; compute_route_performance
+    # rebuilds them exactly
+    RoutePerformance = apps.get_model('transport', 'RoutePerformance')
+    rows = list(RoutePerformance.objects.filter(trips_count__gt=0))
+    for row in rows:
+        row.on_time_count = round(row.on_time_rate * row.trips_count / 100)
+        row.cancelled_count = round(row.cancellation_rate * row.trips_count / 100)
+        row.delay_minutes_total = round(row.mean_delay_minutes * (row.trips_count - row.cancelled_count))
+    RoutePerformance.objects.bulk_update(
+        rows, ['on_time_count', 'cancelled_count', 'delay_minutes_total'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transport', '0008_tripupdate_service_date'),
+        ('transport', '0009_routepopularity_log_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routeperformance',
+            name='cancelled_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='routeperformance',
+            name='delay_minutes_total',
+            field=models.IntegerField(default=0, help_text='Sum of delays over trips that ran'),
+        ),
+        migrations.AddField(
+            model_name='routeperformance',
+            name='on_time_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(counts_from_rates, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,93 @@
 Transport models for BUI Transport System
 """
 import uuid
+from decimal import Decimal
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.users.models import User, TransportOrganizer
+from .stops import normalize_stop_name
+
+
+class StopManager(models.Manager):
+    """
+    Manager for stops
+    """
+    def resolve(self, name):
+        """
+        Return the stop a free-text location name refers to, creating it if needed
+        """
+        normalized = normalize_stop_name(name)
+        if not normalized:
+            return None
+        alias = StopAlias.objects.select_related('stop').filter(normalized_name=normalized).first()
+        if alias:
+            return alias.stop
+        stop, _ = self.get_or_create(
+            normalized_name=normalized,
+            defaults={'name': ' '.join(name.split())}
+        )
+        return stop
+
+
+class Stop(models.Model):
+    """
+    Canonical pickup and drop-off locations
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True)
+    location_data = models.JSONField(
+        blank=True, 
+        null=True, 
+        help_text="GPS coordinates: {'lat': 6.5244, 'lng': 3.3792}"
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = StopManager()
+    
+    class Meta:
+        db_table = 'stops'
+        verbose_name = 'Stop'
+        verbose_name_plural = 'Stops'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        if not self.normalized_name:
+            self.normalized_name = normalize_stop_name(self.name)
+        super().save(*args, **kwargs)
+        # A stop's own name always resolves to it
+        StopAlias.objects.get_or_create(
+            normalized_name=self.normalized_name,
+            defaults={'stop': self, 'name': self.name}
+        )
+
+
+class StopAlias(models.Model):
+    """
+    Alternative names that resolve to a stop
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    stop = models.ForeignKey(Stop, on_delete=models.CASCADE, related_name='aliases')
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True)
+    
+    class Meta:
+        db_table = 'stop_aliases'
+        verbose_name = 'Stop Alias'
+        verbose_name_plural = 'Stop Aliases'
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} -> {self.stop.name}"
+    
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_stop_name(self.name)
+        super().save(*args, **kwargs)
 
 
 class TransportOption(models.Model):
@@ -30,12 +114,38 @@ class TransportOption(models.Model):
     route_name = models.CharField(max_length=200)
     departure_location = models.CharField(max_length=200)
     destination = models.CharField(max_length=200)
+    departure_stop = models.ForeignKey(
+        Stop, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        blank=True,
+        related_name='departures'
+    )
+    destination_stop = models.ForeignKey(
+        Stop, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        blank=True,
+        related_name='arrivals'
+    )
+    departure_location_data = models.JSONField(
+        blank=True, 
+        null=True, 
+        help_text="GPS coordinates of the pickup point: {'lat': 6.5244, 'lng': 3.3792}"
+    )
+    destination_location_data = models.JSONField(
+        blank=True, 
+        null=True, 
+        help_text="GPS coordinates of the destination: {'lat': 6.5244, 'lng': 3.3792}"
+    )
     departure_time = models.TimeField()
     arrival_time = models.TimeField()
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     total_seats = models.IntegerField(validators=[MinValueValidator(1)])
     available_seats = models.IntegerField(validators=[MinValueValidator(0)])
     days_of_operation = models.JSONField(default=list, help_text="List of days: ['monday', 'tuesday', ...]")
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    rating_count = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -49,11 +159,59 @@ class TransportOption(models.Model):
     def __str__(self):
         return f"{self.route_name} - {self.departure_location} to {self.destination}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_locations = (
+            instance.__dict__.get('departure_location'),
+            instance.__dict__.get('destination'),
+            instance.__dict__.get('departure_stop_id'),
+            instance.__dict__.get('destination_stop_id')
+        )
+        # The corridor as stored, so caches of the previous corridor can be dropped
+        instance._loaded_stops = instance._loaded_locations[2:]
+        return instance
+    
+    def resolve_stops(self):
+        """
+        Point the stop foreign keys at the catalog entries for the free-text
+        locations, unless a stop was chosen explicitly
+        """
+        loaded = getattr(self, '_loaded_locations', (None, None, None, None))
+        if self.departure_stop_id is None or (
+            self.departure_stop_id == loaded[2] and self.departure_location != loaded[0]
+        ):
+            self.departure_stop = Stop.objects.resolve(self.departure_location)
+        if self.destination_stop_id is None or (
+            self.destination_stop_id == loaded[3] and self.destination != loaded[1]
+        ):
+            self.destination_stop = Stop.objects.resolve(self.destination)
+        self._loaded_locations = (
+            self.departure_location, self.destination, self.departure_stop_id, self.destination_stop_id
+        )
+    
+    def refresh_rating(self):
+        """
+        Recompute the stored review rollup without touching other fields
+        """
+        summary = self.reviews.aggregate(average=models.Avg('rating'), count=models.Count('id'))
+        self.rating_average = Decimal(summary['average'] or 0).quantize(Decimal('0.01'))
+        self.rating_count = summary['count']
+        TransportOption.objects.filter(pk=self.pk).update(
+            rating_average=self.rating_average, rating_count=self.rating_count
+        )
+    
     def save(self, *args, **kwargs):
         # Ensure available_seats doesn't exceed total_seats
         if self.available_seats > self.total_seats:
             self.available_seats = self.total_seats
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'departure_location', 'destination'} & set(update_fields):
+            self.resolve_stops()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'departure_stop', 'destination_stop'}
         super().save(*args, **kwargs)
+        self._loaded_stops = (self.departure_stop_id, self.destination_stop_id)
 
 
 class TripUpdate(models.Model):
@@ -88,6 +246,7 @@ class TripUpdate(models.Model):
         help_text="GPS coordinates: {'lat': 6.5244, 'lng': 3.3792}"
     )
     estimated_arrival = models.TimeField(blank=True, null=True)
+    service_date = models.DateField(blank=True, null=True, help_text="Date of the trip the update is about")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -101,6 +260,115 @@ class TripUpdate(models.Model):
         return f"{self.transport_option.route_name} - {self.title}"
 
 
+class TripPerformance(models.Model):
+    """
+    Outcome of a single trip (route and service date) derived from trip updates
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    transport_option = models.ForeignKey(
+        TransportOption, 
+        on_delete=models.CASCADE, 
+        related_name='trip_performance'
+    )
+    organizer = models.ForeignKey(
+        TransportOrganizer, 
+        on_delete=models.CASCADE, 
+        related_name='trip_performance'
+    )
+    service_date = models.DateField()
+    delay_minutes = models.IntegerField(default=0)
+    is_cancelled = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'trip_performance'
+        verbose_name = 'Trip Performance'
+        verbose_name_plural = 'Trip Performance'
+        ordering = ['-service_date']
+        unique_together = ['transport_option', 'service_date']
+        indexes = [
+            models.Index(fields=['organizer', 'service_date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.transport_option.route_name} - {self.service_date}"
+
+
+class RoutePerformance(models.Model):
+    """
+    Rolling-window reliability rollup for a transport option, or for an
+    organizer when transport_option is empty
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organizer = models.ForeignKey(
+        TransportOrganizer, 
+        on_delete=models.CASCADE, 
+        related_name='route_performance'
+    )
+    transport_option = models.OneToOneField(
+        TransportOption, 
+        on_delete=models.CASCADE, 
+        null=True, 
+        blank=True,
+        related_name='performance'
+    )
+    window_days = models.IntegerField()
+    trips_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    delay_minutes_total = models.IntegerField(default=0, help_text="Sum of delays over trips that ran")
+    on_time_rate = models.DecimalField(max_digits=5, decimal_places=2, default=100)
+    cancellation_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    mean_delay_minutes = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    p90_delay_minutes = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'route_performance'
+        verbose_name = 'Route Performance'
+        verbose_name_plural = 'Route Performance'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['organizer'],
+                condition=models.Q(transport_option__isnull=True),
+                name='unique_organizer_performance'
+            ),
+        ]
+    
+    def __str__(self):
+        scope = self.transport_option.route_name if self.transport_option_id else self.organizer.business_name
+        return f"{scope} - {self.on_time_rate}% on time"
+
+
+class RoutePopularity(models.Model):
+    """
+    Persisted trending counters for a transport option.
+
+    The score is forward-decayed: events are weighted by how far after the
+    trending epoch they happened, so scores only ever grow by addition and
+    rank routes by exponentially decayed activity. It is stored as its
+    natural logarithm to stay in float range.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    transport_option = models.OneToOneField(
+        TransportOption, 
+        on_delete=models.CASCADE, 
+        related_name='popularity'
+    )
+    log_score = models.FloatField(blank=True, null=True, help_text="Natural log of the forward-decayed score")
+    bookings_count = models.IntegerField(default=0)
+    views_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'route_popularity'
+        verbose_name = 'Route Popularity'
+        verbose_name_plural = 'Route Popularity'
+    
+    def __str__(self):
+        return f"{self.transport_option.route_name} - {self.bookings_count} bookings, {self.views_count} views"
+
+
 class Review(models.Model):
     """
     Reviews for transport options
@@ -0,0 +1,331 @@
+"""
+On-time performance analytics for transport options and organizers
+
+Trip updates are reduced to one TripPerformance row per route and service
+date, and those rows are rolled up into RoutePerformance summaries over a
+rolling window. Trips on operating days without any delay or cancellation
+update count as on time.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TransportOption, TripUpdate, TripPerformance, RoutePerformance
+
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def service_date_of(update):
+    # Updates from before service dates were recorded apply to the day they were posted
+    return update['service_date'] or timezone.localtime(update['created_at']).date()
+
+
+def _delay_minutes(arrival_time, estimated_arrival):
+    scheduled = datetime.combine(datetime.min, arrival_time)
+    estimated = datetime.combine(datetime.min, estimated_arrival)
+    # The times carry no date; take the nearest reading, so a trip due
+    # 23:50 and expected 00:10 is 20 minutes late rather than early
+    seconds = ((estimated - scheduled).total_seconds() + 12 * 3600) % (24 * 3600) - 12 * 3600
+    return max(0, int(seconds // 60))
+
+
+def _reduce_updates(updates):
+    """
+    Fold trip update rows into {(option_id, service_date): outcome}
+    """
+    threshold = settings.ROUTE_ON_TIME_THRESHOLD_MINUTES
+    outcomes = {}
+    # Rows are ordered by created_at, so the latest estimate wins
+    for update in updates:
+        key = (update['transport_option_id'], service_date_of(update))
+        outcome = outcomes.setdefault(key, {
+            'organizer_id': update['organizer_id'],
+            'delay_minutes': 0,
+            'reported_delay': False,
+            'is_cancelled': False,
+        })
+        if update['update_type'] == 'cancellation':
+            outcome['is_cancelled'] = True
+        if update['estimated_arrival'] is not None:
+            outcome['delay_minutes'] = _delay_minutes(
+                update['transport_option__arrival_time'], update['estimated_arrival']
+            )
+        if update['update_type'] == 'delay':
+            outcome['reported_delay'] = True
+
+    for outcome in outcomes.values():
+        # A delay reported without an estimate is at least the on-time threshold
+        if outcome.pop('reported_delay') and outcome['delay_minutes'] <= threshold:
+            outcome['delay_minutes'] = threshold + 1
+    return outcomes
+
+
+def _update_rows(queryset):
+    return queryset.filter(is_active=True).order_by('created_at').values(
+        'transport_option_id', 'organizer_id', 'update_type', 'estimated_arrival',
+        'service_date', 'created_at', 'transport_option__arrival_time'
+    )
+
+
+def _window_start(today=None):
+    today = today or timezone.localdate()
+    return today - timedelta(days=settings.ROUTE_PERFORMANCE_WINDOW_DAYS - 1)
+
+
+def _save_outcomes(outcomes):
+    rows = [
+        TripPerformance(
+            transport_option_id=option_id,
+            organizer_id=outcome['organizer_id'],
+            service_date=service_date,
+            delay_minutes=outcome['delay_minutes'],
+            is_cancelled=outcome['is_cancelled'],
+        )
+        for (option_id, service_date), outcome in outcomes.items()
+    ]
+    TripPerformance.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['transport_option', 'service_date'],
+        update_fields=['delay_minutes', 'is_cancelled', 'updated_at'],
+    )
+
+
+def operating_dates(days_of_operation, start, end):
+    """
+    Dates between start and end (inclusive) on which a route operates
+    """
+    weekdays = {WEEKDAYS.index(day) for day in days_of_operation if day in WEEKDAYS}
+    current = start
+    dates = []
+    while current <= end:
+        if current.weekday() in weekdays:
+            dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+
+def p90(values):
+    """
+    90th percentile by the nearest-rank method
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(0.9 * len(ordered)) - 1)]
+
+
+def _metrics(trips_count, on_time_count, cancelled_count, delay_minutes_total, p90_delay):
+    """
+    RoutePerformance field values for the given counts
+    """
+    operated = trips_count - cancelled_count
+    return {
+        'trips_count': trips_count,
+        'on_time_count': on_time_count,
+        'cancelled_count': cancelled_count,
+        'delay_minutes_total': delay_minutes_total,
+        'on_time_rate': Decimal(on_time_count * 100 / trips_count if trips_count else 100).quantize(Decimal('0.01')),
+        'cancellation_rate': Decimal(cancelled_count * 100 / trips_count if trips_count else 0).quantize(Decimal('0.01')),
+        'mean_delay_minutes': Decimal(delay_minutes_total / operated if operated else 0).quantize(Decimal('0.01')),
+        'p90_delay_minutes': Decimal(p90_delay).quantize(Decimal('0.01')),
+    }
+
+
+def summarize(trips):
+    """
+    Summary metrics for a list of (delay_minutes, is_cancelled) trips
+    """
+    threshold = settings.ROUTE_ON_TIME_THRESHOLD_MINUTES
+    delays = [delay for delay, cancelled in trips if not cancelled]
+    on_time = sum(1 for delay in delays if delay <= threshold)
+    return _metrics(len(trips), on_time, len(trips) - len(delays), sum(delays), p90(delays))
+
+
+def _route_trips(options, start, today):
+    """
+    {option_id: (organizer_id, trips)} for option rows, where trips lists
+    (delay_minutes, is_cancelled) for each operated or observed day
+    """
+    records = defaultdict(dict)
+    for row in TripPerformance.objects.filter(
+        transport_option_id__in=[option['id'] for option in options],
+        service_date__gte=start,
+        service_date__lte=today
+    ).values_list('transport_option_id', 'service_date', 'delay_minutes', 'is_cancelled'):
+        records[row[0]][row[1]] = (row[2], row[3])
+
+    route_trips = {}
+    for option in options:
+        first_day = max(start, timezone.localtime(option['created_at']).date())
+        dates = set(operating_dates(option['days_of_operation'] or [], first_day, today))
+        observed = records.get(option['id'], {})
+        trips = [observed.get(day, (0, False)) for day in sorted(dates | set(observed))]
+        route_trips[option['id']] = (option['organizer_id'], trips)
+    return route_trips
+
+
+SUMMARY_FIELDS = [
+    'window_days', 'trips_count', 'on_time_count', 'cancelled_count', 'delay_minutes_total',
+    'on_time_rate', 'cancellation_rate', 'mean_delay_minutes', 'p90_delay_minutes', 'computed_at'
+]
+COUNT_FIELDS = ('trips_count', 'on_time_count', 'cancelled_count', 'delay_minutes_total')
+
+
+def refresh_summaries(organizer_ids=None, today=None):
+    """
+    Recompute the RoutePerformance rows of the given organizers and all of
+    their routes (every organizer when organizer_ids is None)
+    """
+    today = today or timezone.localdate()
+    start = _window_start(today)
+
+    options = TransportOption.objects.all()
+    if organizer_ids is not None:
+        options = options.filter(organizer_id__in=organizer_ids)
+    options = list(options.values('id', 'organizer_id', 'days_of_operation', 'created_at'))
+    if not options:
+        return 0
+
+    route_trips = _route_trips(options, start, today)
+    organizer_trips = defaultdict(list)
+    for organizer_id, trips in route_trips.values():
+        organizer_trips[organizer_id].extend(trips)
+
+    window_days = settings.ROUTE_PERFORMANCE_WINDOW_DAYS
+    with transaction.atomic():
+        existing = {
+            (row.transport_option_id or row.organizer_id): row
+            for row in RoutePerformance.objects.filter(
+                transport_option_id__in=list(route_trips)
+            ) | RoutePerformance.objects.filter(
+                organizer_id__in=list(organizer_trips), transport_option__isnull=True
+            )
+        }
+        to_create, to_update = [], []
+
+        def stage(key, organizer_id, option_id, trips):
+            values = summarize(trips)
+            row = existing.get(key)
+            if row is None:
+                row = RoutePerformance(organizer_id=organizer_id, transport_option_id=option_id)
+                to_create.append(row)
+            else:
+                to_update.append(row)
+            row.window_days = window_days
+            row.computed_at = timezone.now()
+            for field, value in values.items():
+                setattr(row, field, value)
+
+        for option_id, (organizer_id, trips) in route_trips.items():
+            stage(option_id, organizer_id, option_id, trips)
+        for organizer_id, trips in organizer_trips.items():
+            stage(organizer_id, organizer_id, None, trips)
+
+        RoutePerformance.objects.bulk_create(to_create, batch_size=1000)
+        RoutePerformance.objects.bulk_update(to_update, SUMMARY_FIELDS, batch_size=1000)
+    return len(route_trips)
+
+
+def refresh_route(option_id, today=None):
+    """
+    Recompute one route's RoutePerformance row and apply the change in its
+    counts to its organizer's row.
+
+    The organizer's p90 delay cannot be combined that way and is left to
+    the next refresh_summaries run.
+    """
+    today = today or timezone.localdate()
+    option = TransportOption.objects.filter(pk=option_id).values(
+        'id', 'organizer_id', 'days_of_operation', 'created_at'
+    ).first()
+    if option is None:
+        return
+    organizer_id, trips = _route_trips([option], _window_start(today), today)[option_id]
+    window_days = settings.ROUTE_PERFORMANCE_WINDOW_DAYS
+    now = timezone.now()
+    values = summarize(trips)
+
+    with transaction.atomic():
+        route = RoutePerformance.objects.select_for_update().filter(transport_option_id=option_id).first()
+        previous = [getattr(route, field) for field in COUNT_FIELDS] if route else [0, 0, 0, 0]
+        if route is None:
+            route = RoutePerformance(organizer_id=organizer_id, transport_option_id=option_id)
+        for field, value in values.items():
+            setattr(route, field, value)
+        route.window_days = window_days
+        route.computed_at = now
+        route.save()
+
+        summary = RoutePerformance.objects.select_for_update().filter(
+            organizer_id=organizer_id, transport_option__isnull=True
+        ).first()
+        if summary is None:
+            summary = RoutePerformance(organizer_id=organizer_id)
+            counts = [0, 0, 0, 0]
+        else:
+            counts = [getattr(summary, field) for field in COUNT_FIELDS]
+        counts = [
+            count + values[field] - before
+            for count, field, before in zip(counts, COUNT_FIELDS, previous)
+        ]
+        for field, value in _metrics(*counts, summary.p90_delay_minutes).items():
+            setattr(summary, field, value)
+        summary.window_days = window_days
+        summary.computed_at = now
+        summary.save()
+
+
+def recompute(days=None):
+    """
+    Batch job: rebuild trip outcomes for the last ``days`` days and refresh all summaries
+    """
+    days = days or settings.ROUTE_PERFORMANCE_WINDOW_DAYS
+    since = timezone.now() - timedelta(days=days)
+    outcomes = _reduce_updates(_update_rows(TripUpdate.objects.filter(
+        Q(created_at__gte=since) | Q(service_date__gte=timezone.localtime(since).date())
+    )))
+    _save_outcomes(outcomes)
+    return len(outcomes), refresh_summaries()
+
+
+def record_trip_update(update):
+    """
+    Fold a new trip update into the rollups of its route. Updates that do
+    not change the trip's outcome, such as most location pings, stop at
+    the TripPerformance row.
+    """
+    service_date = update.service_date or timezone.localtime(update.created_at).date()
+    day_start = timezone.make_aware(datetime.combine(service_date, datetime.min.time()))
+    outcomes = _reduce_updates(_update_rows(TripUpdate.objects.filter(
+        Q(service_date=service_date) | Q(
+            service_date__isnull=True,
+            created_at__gte=day_start,
+            created_at__lt=day_start + timedelta(days=1)
+        ),
+        transport_option_id=update.transport_option_id
+    )))
+    if not outcomes:
+        return
+    previous = dict(
+        ((update.transport_option_id, service_date), (delay, cancelled))
+        for service_date, delay, cancelled in TripPerformance.objects.filter(
+            transport_option_id=update.transport_option_id,
+            service_date__in=[service_date for _, service_date in outcomes]
+        ).values_list('service_date', 'delay_minutes', 'is_cancelled')
+    )
+    if all(
+        previous.get(key) == (outcome['delay_minutes'], outcome['is_cancelled'])
+        for key, outcome in outcomes.items()
+    ):
+        return
+    _save_outcomes(outcomes)
+    refresh_route(update.transport_option_id)
@@ -0,0 +1,103 @@
+"""
+Relevance ranking for the transport option listing
+
+Text relevance is scored in the database, summed over the search terms,
+and used to cut the filtered listing down to a bounded candidate set. The
+final score blends text relevance, rating, seat availability, price and
+closeness to a requested departure time, and is vectorized over the
+candidates with NumPy.
+"""
+from django.conf import settings
+from django.db.models import Case, When, Value, IntegerField
+
+
+WEIGHTS = {
+    'text': 0.35,
+    'rating': 0.2,
+    'availability': 0.15,
+    'price': 0.15,
+    'time': 0.15,
+}
+# Prior used to shrink the average rating of routes with few reviews
+PRIOR_RATING = 3.0
+PRIOR_REVIEWS = 5
+MINUTES_PER_DAY = 24 * 60
+
+
+def _match(field, text, prefix_points, contains_points):
+    return Case(
+        When(**{f'{field}__istartswith': text}, then=Value(prefix_points)),
+        When(**{f'{field}__icontains': text}, then=Value(contains_points)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def text_score(terms):
+    """
+    Database expression scoring how well a route matches the search
+    ``terms``; each term may match a different field
+    """
+    return sum(
+        (
+            _match('route_name', term, 4, 2)
+            + _match('destination', term, 3, 2)
+            + _match('departure_location', term, 2, 1)
+            for term in terms
+        ),
+        Value(0, output_field=IntegerField())
+    )
+
+
+def rank(queryset, terms=None, departs_near=None, limit=None):
+    """
+    Ids of the best ``limit`` options in ``queryset`` with their scores,
+    best first. ``queryset`` is expected to be filtered on ``terms`` already
+    (by SearchFilter), so text relevance only orders it.
+    """
+    import numpy as np
+
+    limit = limit or settings.RANKING_MAX_RESULTS
+    if terms:
+        queryset = queryset.annotate(text_score=text_score(terms))
+    else:
+        queryset = queryset.annotate(text_score=Value(0, output_field=IntegerField()))
+    candidates = list(queryset.order_by('-text_score', '-rating_average', 'price').values_list(
+        'id', 'text_score', 'rating_average', 'rating_count', 'available_seats',
+        'total_seats', 'price', 'departure_time'
+    )[:settings.RANKING_CANDIDATE_BUDGET])
+    if not candidates:
+        return []
+
+    ids, texts, ratings, reviews, available, total, prices, times = zip(*candidates)
+    texts = np.asarray(texts, dtype=np.float64)
+    ratings = np.asarray(ratings, dtype=np.float64)
+    reviews = np.asarray(reviews, dtype=np.float64)
+    available = np.asarray(available, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+
+    score = np.zeros(len(ids))
+    if texts.max() > 0:
+        score += WEIGHTS['text'] * texts / texts.max()
+    shrunk = (ratings * reviews + PRIOR_RATING * PRIOR_REVIEWS) / (reviews + PRIOR_REVIEWS)
+    score += WEIGHTS['rating'] * shrunk / 5
+    score += WEIGHTS['availability'] * available / np.maximum(total, 1)
+    price_range = prices.max() - prices.min()
+    if price_range > 0:
+        score += WEIGHTS['price'] * (prices.max() - prices) / price_range
+    else:
+        score += WEIGHTS['price']
+    if departs_near is not None:
+        minutes = np.asarray([t.hour * 60 + t.minute for t in times], dtype=np.float64)
+        target = departs_near.hour * 60 + departs_near.minute
+        gap = np.abs(minutes - target)
+        gap = np.minimum(gap, MINUTES_PER_DAY - gap)
+        score += WEIGHTS['time'] * np.exp(-gap / settings.RANKING_TIME_SCALE_MINUTES)
+
+    if len(ids) > limit:
+        top = np.argpartition(-score, limit - 1)[:limit]
+    else:
+        top = np.arange(len(ids))
+    top = top[np.argsort(-score[top], kind='stable')]
+    return [(ids[i], round(float(score[i]), 4)) for i in top]
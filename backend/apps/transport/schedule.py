@@ -0,0 +1,138 @@
+"""
+Bulk schedule operations for an organizer's routes
+
+Each operation is one set-based statement over the selected routes (an
+UPDATE, or a bulk_create for clones), recorded as a single audit log entry
+and followed by a single cache invalidation for the whole batch.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Value, DecimalField
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from apps.payments.models import AuditLog
+from .filters import TransportOptionFilter
+from .models import TransportOption
+from .signals import options_bulk_changed
+
+
+CLONED_FIELDS = (
+    'route_name', 'departure_location', 'destination', 'departure_stop_id', 'destination_stop_id',
+    'departure_location_data', 'destination_location_data', 'departure_time', 'arrival_time',
+    'price', 'total_seats', 'days_of_operation'
+)
+
+
+class ScheduleError(Exception):
+    """
+    A bulk operation that cannot be applied
+    """
+
+
+def select_routes(organizer, ids=None, filters=None):
+    """
+    The organizer's routes narrowed by explicit ids and listing filters
+    """
+    queryset = TransportOption.objects.filter(organizer=organizer)
+    if ids:
+        queryset = queryset.filter(pk__in=ids)
+    if filters:
+        filterset = TransportOptionFilter(data=filters, queryset=queryset)
+        if not filterset.is_valid():
+            raise ScheduleError(filterset.errors)
+        queryset = filterset.qs
+    return queryset
+
+
+def _price_expression(percent=None, amount=None):
+    price = F('price')
+    if percent is not None:
+        price = Round(price * Value(1 + Decimal(percent) / 100), 2)
+    if amount is not None:
+        price = price + Value(Decimal(amount))
+    return Greatest(price, Value(Decimal('0')), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def _audit(user, action, rows, details, request_meta=None):
+    request_meta = request_meta or {}
+    return AuditLog.objects.create(
+        user=user,
+        action=action,
+        table_name=TransportOption._meta.db_table,
+        old_values={'routes': rows},
+        new_values=details,
+        ip_address=request_meta.get('ip_address'),
+        user_agent=request_meta.get('user_agent'),
+    )
+
+
+def _touched(rows):
+    # Lightweight instances carrying what the invalidation receivers read
+    return [
+        TransportOption(id=row['id'], departure_stop_id=row['departure_stop_id'], destination_stop_id=row['destination_stop_id'])
+        for row in rows
+    ]
+
+
+def apply(user, organizer, operation, ids=None, filters=None, request_meta=None, **params):
+    """
+    Run a bulk operation over the selected routes and return a summary.
+
+    Operations are ``change_price`` (``percent`` and/or ``amount``),
+    ``activate``, ``deactivate`` and ``clone`` (``name_suffix``, optional
+    ``activate``).
+    """
+    selected = select_routes(organizer, ids, filters)
+    with transaction.atomic():
+        rows = list(selected.select_for_update().values(
+            'id', 'price', 'is_active', 'departure_stop_id', 'destination_stop_id'
+        ))
+        if not rows:
+            return {'operation': operation, 'matched': 0, 'changed': 0, 'audit_log': None}
+        ids = [row['id'] for row in rows]
+        targets = TransportOption.objects.filter(pk__in=ids)
+        details = {'operation': operation, **{key: str(value) for key, value in params.items()}}
+        now = timezone.now()
+
+        if operation == 'change_price':
+            changed = targets.update(
+                price=_price_expression(params.get('percent'), params.get('amount')), updated_at=now
+            )
+            old = {str(row['id']): str(row['price']) for row in rows}
+            touched = _touched(rows)
+        elif operation in ('activate', 'deactivate'):
+            is_active = operation == 'activate'
+            changed = targets.exclude(is_active=is_active).update(is_active=is_active, updated_at=now)
+            old = {str(row['id']): row['is_active'] for row in rows}
+            touched = _touched(rows)
+        elif operation == 'clone':
+            clones = []
+            for source in targets.values(*CLONED_FIELDS):
+                source['route_name'] = f"{source['route_name']}{params['name_suffix']}"[:200]
+                clones.append(TransportOption(
+                    organizer=organizer,
+                    available_seats=source['total_seats'],
+                    is_active=params.get('activate', False),
+                    **source
+                ))
+            existing = set(TransportOption.objects.filter(
+                organizer=organizer,
+                route_name__in=[clone.route_name for clone in clones]
+            ).values_list('route_name', 'departure_time'))
+            if any((clone.route_name, clone.departure_time) in existing for clone in clones):
+                raise ScheduleError("Some routes were already cloned with this name suffix.")
+            TransportOption.objects.bulk_create(clones, batch_size=500)
+            changed = len(clones)
+            old = [str(option_id) for option_id in ids]
+            details['created'] = [str(clone.pk) for clone in clones]
+            touched = clones
+        else:
+            raise ScheduleError(f"Unknown operation: {operation}")
+
+        details['changed'] = changed
+        log = _audit(user, f'transport_options.{operation}', old, details, request_meta)
+
+    options_bulk_changed.send(sender=TransportOption, options=touched)
+    return {'operation': operation, 'matched': len(rows), 'changed': changed, 'audit_log': str(log.pk)}
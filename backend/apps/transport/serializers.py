@@ -1,11 +1,32 @@
 """
 Serializers for Transport app
 """
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
-from .models import TransportOption, TripUpdate, Review
+from .models import TransportOption, TripUpdate, Review, RoutePerformance, Stop
+from . import eta
 from apps.users.serializers import UserSerializer, TransportOrganizerSerializer
 
 
+def validate_coordinates(value):
+    """
+    Validate a {'lat': ..., 'lng': ...} location payload
+    """
+    if value:
+        required_keys = ['lat', 'lng']
+        if not isinstance(value, dict) or not all(key in value for key in required_keys):
+            raise serializers.ValidationError("Location data must contain 'lat' and 'lng' keys.")
+        try:
+            lat = float(value['lat'])
+            lng = float(value['lng'])
+        except (ValueError, TypeError):
+            raise serializers.ValidationError("Latitude and longitude must be valid numbers.")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise serializers.ValidationError("Latitude or longitude is out of range.")
+    return value
+
+
 class TransportOptionSerializer(serializers.ModelSerializer):
     """
     Serializer for transport options
@@ -17,10 +38,15 @@ class TransportOptionSerializer(serializers.ModelSerializer):
         model = TransportOption
         fields = (
             'id', 'organizer', 'organizer_id', 'route_name', 'departure_location',
-            'destination', 'departure_time', 'arrival_time', 'price', 'total_seats',
-            'available_seats', 'days_of_operation', 'is_active', 'created_at', 'updated_at'
+            'destination', 'departure_stop', 'destination_stop', 'departure_location_data',
+            'destination_location_data', 'departure_time', 'arrival_time', 'price', 'total_seats',
+            'available_seats', 'days_of_operation', 'rating_average', 'rating_count', 'is_active',
+            'created_at', 'updated_at'
+        )
+        read_only_fields = (
+            'id', 'created_at', 'updated_at', 'available_seats', 'departure_stop', 'destination_stop',
+            'rating_average', 'rating_count'
         )
-        read_only_fields = ('id', 'created_at', 'updated_at', 'available_seats')
     
     def validate_organizer_id(self, value):
         from apps.users.models import TransportOrganizer
@@ -47,17 +73,60 @@ class TransportOptionSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class TransportOptionListSerializer(TransportOptionSerializer):
+    """
+    Serializer for the transport option listing, with reliability rollups
+    """
+    on_time_rate = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+    cancellation_rate = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+    mean_delay_minutes = serializers.DecimalField(max_digits=7, decimal_places=2, read_only=True)
+    p90_delay_minutes = serializers.DecimalField(max_digits=7, decimal_places=2, read_only=True)
+    relevance_score = serializers.SerializerMethodField()
+    
+    class Meta(TransportOptionSerializer.Meta):
+        fields = TransportOptionSerializer.Meta.fields + (
+            'on_time_rate', 'cancellation_rate', 'mean_delay_minutes', 'p90_delay_minutes',
+            'relevance_score'
+        )
+    
+    def get_relevance_score(self, obj):
+        # Only set when the listing is ordered by relevance
+        return getattr(obj, 'relevance_score', None)
+
+
+class RoutePerformanceSerializer(serializers.ModelSerializer):
+    """
+    Serializer for route and organizer performance rollups
+    """
+    class Meta:
+        model = RoutePerformance
+        fields = (
+            'window_days', 'trips_count', 'on_time_rate', 'cancellation_rate',
+            'mean_delay_minutes', 'p90_delay_minutes', 'computed_at'
+        )
+
+
 class TransportOptionCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating transport options
     """
+    departure_location = serializers.CharField(max_length=200, required=False)
+    destination = serializers.CharField(max_length=200, required=False)
+    
     class Meta:
         model = TransportOption
         fields = (
-            'route_name', 'departure_location', 'destination', 'departure_time',
-            'arrival_time', 'price', 'total_seats', 'days_of_operation'
+            'route_name', 'departure_location', 'destination', 'departure_stop',
+            'destination_stop', 'departure_location_data', 'destination_location_data',
+            'departure_time', 'arrival_time', 'price', 'total_seats', 'days_of_operation'
         )
     
+    def validate_departure_location_data(self, value):
+        return validate_coordinates(value)
+    
+    def validate_destination_location_data(self, value):
+        return validate_coordinates(value)
+    
     def validate_days_of_operation(self, value):
         valid_days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
         if not isinstance(value, list):
@@ -68,8 +137,65 @@ class TransportOptionCreateSerializer(serializers.ModelSerializer):
         return value
     
     def validate(self, attrs):
-        if attrs['departure_time'] >= attrs['arrival_time']:
+        departure_time = attrs.get('departure_time', getattr(self.instance, 'departure_time', None))
+        arrival_time = attrs.get('arrival_time', getattr(self.instance, 'arrival_time', None))
+        if departure_time and arrival_time and departure_time >= arrival_time:
             raise serializers.ValidationError("Arrival time must be after departure time.")
+        
+        # A chosen stop supplies the location name; otherwise the name is resolved to a stop
+        for text_field, stop_field in (('departure_location', 'departure_stop'), ('destination', 'destination_stop')):
+            if attrs.get(stop_field):
+                attrs[text_field] = attrs[stop_field].name
+            elif not attrs.get(text_field) and not self.instance:
+                raise serializers.ValidationError({text_field: "Provide a location name or a stop."})
+        return attrs
+
+
+class PreloadedStopField(serializers.PrimaryKeyRelatedField):
+    """
+    Stop reference looked up in a ``stops`` map from the serializer context
+    when one is given, so bulk validation does not query once per row
+    """
+    def to_internal_value(self, data):
+        stops = self.context.get('stops')
+        if stops is None:
+            return super().to_internal_value(data)
+        stop = stops.get(str(data))
+        if stop is None:
+            self.fail('does_not_exist', pk_value=data)
+        return stop
+
+
+class TimetableRowSerializer(TransportOptionCreateSerializer):
+    """
+    One row of a bulk timetable import
+    """
+    departure_stop = PreloadedStopField(queryset=Stop.objects.all(), required=False, allow_null=True)
+    destination_stop = PreloadedStopField(queryset=Stop.objects.all(), required=False, allow_null=True)
+
+
+class ScheduleOperationSerializer(serializers.Serializer):
+    """
+    Bulk operation over an organizer's routes
+    """
+    OPERATION_CHOICES = ['change_price', 'activate', 'deactivate', 'clone']
+    
+    operation = serializers.ChoiceField(choices=OPERATION_CHOICES)
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+    filters = serializers.DictField(required=False)
+    percent = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=-100, required=False)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    name_suffix = serializers.CharField(max_length=50, required=False, trim_whitespace=False)
+    activate = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('filters'):
+            raise serializers.ValidationError("Select routes with ids or filters.")
+        operation = attrs['operation']
+        if operation == 'change_price' and attrs.get('percent') is None and attrs.get('amount') is None:
+            raise serializers.ValidationError("Provide a percent or amount price change.")
+        if operation == 'clone' and not attrs.get('name_suffix', '').strip():
+            raise serializers.ValidationError({'name_suffix': "A name suffix is required to clone routes."})
         return attrs
 
 
@@ -79,14 +205,22 @@ class TripUpdateSerializer(serializers.ModelSerializer):
     """
     organizer = TransportOrganizerSerializer(read_only=True)
     transport_option = TransportOptionSerializer(read_only=True)
+    predicted_arrival = serializers.SerializerMethodField()
     
     class Meta:
         model = TripUpdate
         fields = (
             'id', 'transport_option', 'organizer', 'update_type', 'title',
-            'message', 'location_data', 'estimated_arrival', 'is_active', 'created_at'
+            'message', 'location_data', 'estimated_arrival', 'predicted_arrival',
+            'service_date', 'is_active', 'created_at'
         )
         read_only_fields = ('id', 'created_at')
+    
+    def get_predicted_arrival(self, obj):
+        if not obj.location_data:
+            return None
+        predicted = eta.predictor.predict(obj.transport_option, obj.location_data, obj.created_at)
+        return predicted.isoformat() if predicted else None
 
 
 class TripUpdateCreateSerializer(serializers.ModelSerializer):
@@ -97,20 +231,20 @@ class TripUpdateCreateSerializer(serializers.ModelSerializer):
         model = TripUpdate
         fields = (
             'transport_option', 'update_type', 'title', 'message',
-            'location_data', 'estimated_arrival'
+            'location_data', 'estimated_arrival', 'service_date'
         )
     
     def validate_location_data(self, value):
-        if value:
-            required_keys = ['lat', 'lng']
-            if not all(key in value for key in required_keys):
-                raise serializers.ValidationError("Location data must contain 'lat' and 'lng' keys.")
-            try:
-                float(value['lat'])
-                float(value['lng'])
-            except (ValueError, TypeError):
-                raise serializers.ValidationError("Latitude and longitude must be valid numbers.")
-        return value
+        return validate_coordinates(value)
+    
+    def validate(self, attrs):
+        if attrs['update_type'] == 'cancellation':
+            # A cancellation applies to one day's trip, today's unless given
+            service_date = attrs.get('service_date') or timezone.localdate()
+            if service_date < timezone.localdate():
+                raise serializers.ValidationError({'service_date': "Cannot cancel a trip in the past."})
+            attrs['service_date'] = service_date
+        return attrs
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -151,4 +285,86 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
         # Check if review already exists for this booking
         if Review.objects.filter(booking=attrs['booking']).exists():
             raise serializers.ValidationError("Review already exists for this booking.")
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for nearby departure and vehicle lookups
+    """
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(min_value=0.01, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    
+    def validate_radius_km(self, value):
+        if value > settings.SPATIAL_MAX_RADIUS_KM:
+            raise serializers.ValidationError(
+                f"Radius cannot exceed {settings.SPATIAL_MAX_RADIUS_KM} km."
+            )
+        return value
+
+
+class DepartureBoardQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for the departure board
+    """
+    location = serializers.CharField(max_length=200, required=False)
+    stop = serializers.UUIDField(required=False)
+    date = serializers.DateField(required=False)
+    after = serializers.TimeField(required=False)
+    within = serializers.IntegerField(min_value=1, max_value=24 * 60, default=60)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    
+    def validate(self, attrs):
+        if not attrs.get('location') and not attrs.get('stop'):
+            raise serializers.ValidationError("Provide a location name or a stop.")
+        return attrs
+
+
+class RankingQuerySerializer(serializers.Serializer):
+    """
+    Extra query parameters for relevance ordering
+    """
+    departs_near = serializers.TimeField(required=False)
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for location autocomplete
+    """
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=8)
+
+
+class JourneyQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for journey planning
+    """
+    origin = serializers.CharField(max_length=200, required=False)
+    origin_stop = serializers.UUIDField(required=False)
+    destination = serializers.CharField(max_length=200, required=False)
+    destination_stop = serializers.UUIDField(required=False)
+    date = serializers.DateField(required=False)
+    after = serializers.TimeField(required=False)
+    optimize = serializers.ChoiceField(choices=['fastest', 'cheapest'], default='fastest')
+    max_legs = serializers.IntegerField(min_value=1, max_value=settings.JOURNEY_MAX_LEGS, required=False)
+    
+    def validate(self, attrs):
+        if not attrs.get('origin') and not attrs.get('origin_stop'):
+            raise serializers.ValidationError({'origin': "Provide an origin name or stop."})
+        if not attrs.get('destination') and not attrs.get('destination_stop'):
+            raise serializers.ValidationError({'destination': "Provide a destination name or stop."})
+        return attrs
+
+
+class StopSerializer(serializers.ModelSerializer):
+    """
+    Serializer for stops
+    """
+    aliases = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    
+    class Meta:
+        model = Stop
+        fields = ('id', 'name', 'location_data', 'aliases', 'is_active')
+        read_only_fields = fields
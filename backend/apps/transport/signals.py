@@ -0,0 +1,98 @@
+"""
+Signal handlers keeping the transport indexes in sync
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from apps.users.models import TransportOrganizer
+from .models import TransportOption, TripUpdate, Review, Stop, StopAlias
+from .autocomplete import place_index
+from .departures import departure_board
+from .facets import invalidate_listing
+from .indexes import invalidate_all
+from .spatial import departure_index, vehicle_index
+from .trending import trending
+from . import performance
+
+
+# Sent with options=[TransportOption, ...] after bulk writes that bypass post_save
+options_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=TransportOption)
+def transport_option_saved(sender, instance, **kwargs):
+    departure_index.upsert(instance)
+    departure_board.upsert(instance)
+    invalidate_listing()
+
+
+@receiver(post_delete, sender=TransportOption)
+def transport_option_deleted(sender, instance, **kwargs):
+    departure_index.discard(instance.pk)
+    departure_board.discard(instance.pk)
+    vehicle_index.discard(instance.pk)
+    trending.discard(instance.pk)
+    invalidate_listing()
+
+
+@receiver(post_save, sender=TripUpdate)
+def trip_update_saved(sender, instance, **kwargs):
+    if instance.location_data:
+        vehicle_index.upsert(instance)
+    if instance.update_type in ('delay', 'cancellation') or instance.estimated_arrival:
+        performance.record_trip_update(instance)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    try:
+        instance.transport_option.refresh_rating()
+    except TransportOption.DoesNotExist:
+        # The route itself is being deleted
+        return
+    invalidate_listing()
+
+
+@receiver(post_save, sender=TransportOrganizer)
+def organizer_saved(sender, instance, created, **kwargs):
+    # Approval changes affect which routes are listed; rebuild lazily
+    if not created:
+        invalidate_all()
+        invalidate_listing()
+
+
+@receiver(post_save, sender=Stop)
+def stop_saved(sender, instance, created, **kwargs):
+    if created:
+        # New stops have no routes yet, so only the place index needs them
+        place_index.add_stop(instance)
+        return
+    # Stop names and coordinates feed several indexes; rebuild lazily
+    invalidate_all()
+    invalidate_listing()
+
+
+@receiver(post_save, sender=StopAlias)
+def stop_alias_saved(sender, instance, created, **kwargs):
+    if created:
+        departure_board.add_alias(instance)
+        place_index.add_alias(instance)
+        invalidate_listing()
+    else:
+        invalidate_all()
+        invalidate_listing()
+
+
+@receiver(post_delete, sender=Stop)
+@receiver(post_delete, sender=StopAlias)
+def stop_catalog_deleted(sender, **kwargs):
+    invalidate_all()
+    invalidate_listing()
+
+
+@receiver(options_bulk_changed)
+def transport_options_bulk_changed(sender, options, **kwargs):
+    # One rebuild for the whole batch instead of an update per row
+    invalidate_all()
+    invalidate_listing()
\ No newline at end of file
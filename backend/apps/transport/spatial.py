@@ -0,0 +1,320 @@
+"""
+Grid-based spatial indexes for nearby departure and vehicle queries
+"""
+import heapq
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .indexes import InMemoryIndex
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distance between two points in kilometres
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_coordinates(location_data):
+    """
+    Return (lat, lng) floats from a {'lat': ..., 'lng': ...} dict, or None
+    """
+    if not location_data:
+        return None
+    try:
+        return float(location_data['lat']), float(location_data['lng'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class GridIndex:
+    """
+    Uniform lat/lng grid mapping cells to the points that fall inside them.
+
+    Candidate cells are found from the grid and exact distances are only
+    computed for the points in those cells.
+    """
+
+    def __init__(self, cell_degrees):
+        self.cell_degrees = cell_degrees
+        self._cells = {}
+        self._points = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def clear(self):
+        self._cells = {}
+        self._points = {}
+
+    def get(self, key):
+        point = self._points.get(key)
+        return point[2] if point else None
+
+    def position(self, key):
+        return self._points.get(key)
+
+    def insert(self, key, lat, lng, payload):
+        self.remove(key)
+        self._points[key] = (lat, lng, payload)
+        self._cells.setdefault(self._cell(lat, lng), set()).add(key)
+
+    def remove(self, key):
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell(point[0], point[1])
+        keys = self._cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def _ring(self, ci, cj, r):
+        if r == 0:
+            yield (ci, cj)
+            return
+        for dj in range(-r, r + 1):
+            yield (ci - r, cj + dj)
+            yield (ci + r, cj + dj)
+        for di in range(-r + 1, r):
+            yield (ci + di, cj - r)
+            yield (ci + di, cj + r)
+
+    def within(self, lat, lng, radius_km, predicate=None):
+        """
+        All points within ``radius_km``, as (distance_km, key, payload) sorted by distance
+        """
+        lat_span = radius_km / KM_PER_DEGREE
+        lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        i_min, j_min = self._cell(lat - lat_span, lng - lng_span)
+        i_max, j_max = self._cell(lat + lat_span, lng + lng_span)
+
+        results = []
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > len(self._cells):
+            candidate_cells = [
+                keys for (ci, cj), keys in self._cells.items()
+                if i_min <= ci <= i_max and j_min <= cj <= j_max
+            ]
+        else:
+            candidate_cells = [
+                self._cells[cell]
+                for cell in ((ci, cj) for ci in range(i_min, i_max + 1) for cj in range(j_min, j_max + 1))
+                if cell in self._cells
+            ]
+        for keys in candidate_cells:
+            for key in keys:
+                p_lat, p_lng, payload = self._points[key]
+                if predicate is not None and not predicate(payload):
+                    continue
+                distance = haversine_km(lat, lng, p_lat, p_lng)
+                if distance <= radius_km:
+                    results.append((distance, key, payload))
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def nearest(self, lat, lng, k, max_radius_km, predicate=None):
+        """
+        Up to ``k`` nearest points within ``max_radius_km``, sorted by distance
+        """
+        if not self._points or k <= 0:
+            return []
+        ci, cj = self._cell(lat, lng)
+        # Smallest distance covered by one cell step around the query point
+        cell_km = self.cell_degrees * KM_PER_DEGREE * max(math.cos(math.radians(abs(lat) + self.cell_degrees)), 0.01)
+        max_ring = int(max_radius_km / cell_km) + 1
+
+        best = []  # max-heap of (-distance, key, payload) holding the k best so far
+        seen_cells = 0
+        for r in range(max_ring + 1):
+            for cell in self._ring(ci, cj, r):
+                keys = self._cells.get(cell)
+                if not keys:
+                    continue
+                seen_cells += 1
+                for key in keys:
+                    p_lat, p_lng, payload = self._points[key]
+                    if predicate is not None and not predicate(payload):
+                        continue
+                    distance = haversine_km(lat, lng, p_lat, p_lng)
+                    if distance > max_radius_km:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, key, payload))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, key, payload))
+            # Points outside ring r are at least r cells away from the query
+            if len(best) == k and -best[0][0] <= r * cell_km:
+                break
+            if seen_cells == len(self._cells):
+                break
+        return sorted(((-d, key, payload) for d, key, payload in best), key=lambda item: item[0])
+
+
+class DepartureIndex(InMemoryIndex):
+    """
+    Departure points of active transport options from approved organizers
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.grid = GridIndex(settings.SPATIAL_GRID_CELL_DEGREES)
+
+    def _entry(self, option):
+        coordinates = parse_coordinates(option.departure_location_data)
+        if coordinates is None and option.departure_stop_id:
+            coordinates = parse_coordinates(option.departure_stop.location_data)
+        if coordinates is None or not option.is_active:
+            return None
+        payload = {
+            'id': str(option.id),
+            'route_name': option.route_name,
+            'departure_location': option.departure_location,
+            'destination': option.destination,
+            'departure_time': option.departure_time.strftime('%H:%M'),
+            'price': str(option.price),
+            'available_seats': option.available_seats,
+        }
+        return coordinates, payload
+
+    def load(self):
+        from .models import TransportOption
+
+        grid = GridIndex(settings.SPATIAL_GRID_CELL_DEGREES)
+        options = TransportOption.objects.filter(
+            Q(departure_location_data__isnull=False) | Q(departure_stop__location_data__isnull=False),
+            is_active=True,
+            organizer__approval_status='approved'
+        ).select_related('departure_stop')
+        for option in options.iterator():
+            entry = self._entry(option)
+            if entry is not None:
+                (lat, lng), payload = entry
+                grid.insert(option.pk, lat, lng, payload)
+        self.grid = grid
+
+    def upsert(self, option):
+        if not self.is_built:
+            return
+        with self._lock:
+            entry = self._entry(option)
+            if entry is None or option.organizer.approval_status != 'approved':
+                self.grid.remove(option.pk)
+            else:
+                (lat, lng), payload = entry
+                self.grid.insert(option.pk, lat, lng, payload)
+
+    def discard(self, option_id):
+        with self._lock:
+            self.grid.remove(option_id)
+
+    def nearest(self, lat, lng, k, max_radius_km):
+        self.ensure_built()
+        return self.grid.nearest(lat, lng, k, max_radius_km)
+
+    def within(self, lat, lng, radius_km):
+        self.ensure_built()
+        return self.grid.within(lat, lng, radius_km)
+
+
+class VehicleIndex(InMemoryIndex):
+    """
+    Latest reported position of each transport option with a trip in progress
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.grid = GridIndex(settings.SPATIAL_GRID_CELL_DEGREES)
+
+    def _cutoff(self):
+        return timezone.now() - timedelta(minutes=settings.VEHICLE_POSITION_TTL_MINUTES)
+
+    def _payload(self, update, option):
+        return {
+            'transport_option_id': str(option.id),
+            'route_name': option.route_name,
+            'destination': option.destination,
+            'trip_update_id': str(update.id),
+            'estimated_arrival': update.estimated_arrival.strftime('%H:%M') if update.estimated_arrival else None,
+            'reported_at': update.created_at,
+        }
+
+    def load(self):
+        from .models import TripUpdate
+
+        grid = GridIndex(settings.SPATIAL_GRID_CELL_DEGREES)
+        updates = TripUpdate.objects.filter(
+            is_active=True,
+            location_data__isnull=False,
+            created_at__gte=self._cutoff(),
+            transport_option__is_active=True
+        ).select_related('transport_option').order_by('created_at')
+        for update in updates.iterator():
+            coordinates = parse_coordinates(update.location_data)
+            if coordinates is not None:
+                grid.insert(update.transport_option_id, *coordinates, self._payload(update, update.transport_option))
+        self.grid = grid
+
+    def upsert(self, update):
+        if not self.is_built:
+            return
+        coordinates = parse_coordinates(update.location_data)
+        if coordinates is None or not update.is_active:
+            return
+        with self._lock:
+            current = self.grid.get(update.transport_option_id)
+            if current is not None and current['reported_at'] > update.created_at:
+                return
+            self.grid.insert(
+                update.transport_option_id, *coordinates,
+                self._payload(update, update.transport_option)
+            )
+
+    def discard(self, option_id):
+        with self._lock:
+            self.grid.remove(option_id)
+
+    def latest(self, option_id):
+        """
+        (lat, lng, payload) of the latest fresh position of a trip, or None
+        """
+        self.ensure_built()
+        point = self.grid.position(option_id)
+        if point is None or point[2]['reported_at'] < self._cutoff():
+            return None
+        return point
+
+    def _is_fresh(self):
+        cutoff = self._cutoff()
+        return lambda payload: payload['reported_at'] >= cutoff
+
+    def nearest(self, lat, lng, k, max_radius_km):
+        self.ensure_built()
+        return self.grid.nearest(lat, lng, k, max_radius_km, predicate=self._is_fresh())
+
+    def within(self, lat, lng, radius_km):
+        self.ensure_built()
+        return self.grid.within(lat, lng, radius_km, predicate=self._is_fresh())
+
+
+departure_index = DepartureIndex()
+vehicle_index = VehicleIndex()
@@ -0,0 +1,34 @@
+"""
+Stop name normalization for BUI Transport System
+"""
+import re
+
+from django.conf import settings
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_stop_name(name):
+    """
+    Canonical key for a free-text location name.
+
+    Case, punctuation, extra whitespace and institution prefixes such as
+    "BUI" are ignored, so "Main gate", "Main Gate " and "BUI main gate" all
+    map to "main gate".
+    """
+    words = _PUNCTUATION.sub(' ', (name or '').lower()).split()
+    kept = [word for word in words if word not in settings.STOP_NAME_IGNORED_WORDS]
+    return ' '.join(kept or words)
+
+
+def lookup_stop_id(name):
+    """
+    Id of the stop a location name is an alias of, or None if it is not in the catalog
+    """
+    from .models import StopAlias
+    
+    normalized = normalize_stop_name(name)
+    if not normalized:
+        return None
+    return StopAlias.objects.filter(normalized_name=normalized).values_list('stop_id', flat=True).first()
@@ -0,0 +1,204 @@
+"""
+Bulk timetable import for organizers
+
+Rows from a CSV or JSON timetable are validated with the same rules as
+single route creation, then written in one transaction: new routes with
+bulk_create and, when upserting, routes matching an existing
+(route_name, departure_time) with bulk_update.
+"""
+import csv
+import io
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import TransportOption, Stop, StopAlias
+from .serializers import TimetableRowSerializer
+from .signals import options_bulk_changed
+from .stops import normalize_stop_name
+
+
+WRITABLE_FIELDS = (
+    'departure_location', 'destination', 'departure_stop', 'destination_stop',
+    'departure_location_data', 'destination_location_data', 'arrival_time',
+    'price', 'total_seats', 'days_of_operation'
+)
+
+
+class TimetableError(Exception):
+    """
+    A timetable that cannot be read at all
+    """
+
+
+def _coordinates(row, prefix):
+    lat = row.pop(f'{prefix}_lat', None)
+    lng = row.pop(f'{prefix}_lng', None)
+    if lat in (None, '') and lng in (None, ''):
+        return None
+    return {'lat': lat, 'lng': lng}
+
+
+def parse_csv(text):
+    """
+    Rows of a CSV timetable as serializer input.
+
+    Days are separated by semicolons or spaces, and coordinates can be given
+    as departure_lat/departure_lng and destination_lat/destination_lng.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or 'route_name' not in reader.fieldnames:
+        raise TimetableError("CSV timetable must have a header row including route_name.")
+    rows = []
+    for raw in reader:
+        row = {key.strip(): (value or '').strip() for key, value in raw.items() if key}
+        row['days_of_operation'] = [
+            day.lower() for day in row.get('days_of_operation', '').replace(';', ' ').split()
+        ]
+        departure = _coordinates(row, 'departure')
+        if departure:
+            row['departure_location_data'] = departure
+        destination = _coordinates(row, 'destination')
+        if destination:
+            row['destination_location_data'] = destination
+        rows.append({key: value for key, value in row.items() if value != ''})
+    return rows
+
+
+def parse_json(payload):
+    rows = payload.get('rows') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise TimetableError("JSON timetable must be a list of rows or an object with a 'rows' list.")
+    return rows
+
+
+def _preload_stops(rows):
+    stop_ids = set()
+    for row in rows:
+        for field in ('departure_stop', 'destination_stop'):
+            value = row.get(field)
+            if value:
+                try:
+                    stop_ids.add(uuid.UUID(str(value)))
+                except ValueError:
+                    pass
+    return {str(stop.pk): stop for stop in Stop.objects.filter(pk__in=stop_ids)}
+
+
+def validate_rows(rows):
+    """
+    Validate every row, returning ({index: attrs}, {index: errors})
+    """
+    context = {'stops': _preload_stops(rows)}
+    child = TimetableRowSerializer(context=context)
+    valid, errors = {}, {}
+    seen = {}
+    for index, row in enumerate(rows):
+        try:
+            attrs = child.run_validation(row)
+        except serializers.ValidationError as exc:
+            errors[index] = exc.detail
+            continue
+        key = (attrs['route_name'], attrs['departure_time'])
+        if key in seen:
+            errors[index] = {'non_field_errors': [f"Duplicates row {seen[key] + 1}."]}
+            continue
+        seen[key] = index
+        valid[index] = attrs
+    return valid, errors
+
+
+def resolve_stops(options):
+    """
+    Point the stop foreign keys of unsaved routes at the catalog, creating
+    missing stops in bulk rather than one lookup per route
+    """
+    names = {}
+    for option in options:
+        if option.departure_stop_id is None:
+            names.setdefault(normalize_stop_name(option.departure_location), option.departure_location)
+        if option.destination_stop_id is None:
+            names.setdefault(normalize_stop_name(option.destination), option.destination)
+    names.pop('', None)
+
+    stops = dict(StopAlias.objects.filter(normalized_name__in=list(names)).values_list('normalized_name', 'stop_id'))
+    missing = [normalized for normalized in names if normalized not in stops]
+    if missing:
+        created = [Stop(name=names[normalized], normalized_name=normalized) for normalized in missing]
+        Stop.objects.bulk_create(created, batch_size=500)
+        StopAlias.objects.bulk_create([
+            StopAlias(stop=stop, name=stop.name, normalized_name=stop.normalized_name) for stop in created
+        ], batch_size=500)
+        stops.update((stop.normalized_name, stop.pk) for stop in created)
+
+    for option in options:
+        if option.departure_stop_id is None:
+            option.departure_stop_id = stops.get(normalize_stop_name(option.departure_location))
+        if option.destination_stop_id is None:
+            option.destination_stop_id = stops.get(normalize_stop_name(option.destination))
+
+
+def import_timetable(organizer, rows, upsert=False, dry_run=False):
+    """
+    Validate and write a timetable for an organizer.
+
+    Returns a report with created and updated counts and per-row errors
+    (rows are numbered from 1).
+    """
+    if len(rows) > settings.TIMETABLE_IMPORT_MAX_ROWS:
+        raise TimetableError(f"Timetables are limited to {settings.TIMETABLE_IMPORT_MAX_ROWS} rows.")
+
+    valid, errors = validate_rows(rows)
+    existing = {}
+    if valid:
+        for option in TransportOption.objects.filter(
+            organizer=organizer,
+            route_name__in={attrs['route_name'] for attrs in valid.values()}
+        ):
+            existing[(option.route_name, option.departure_time)] = option
+
+    to_create, to_update = [], []
+    for index, attrs in valid.items():
+        option = existing.get((attrs['route_name'], attrs['departure_time']))
+        if option is None:
+            to_create.append(TransportOption(
+                organizer=organizer, available_seats=attrs['total_seats'], **attrs
+            ))
+        elif not upsert:
+            errors[index] = {'non_field_errors': ["A route with this name and departure time already exists."]}
+        else:
+            booked = option.total_seats - option.available_seats
+            for field, value in attrs.items():
+                setattr(option, field, value)
+            if 'departure_stop' not in attrs:
+                option.departure_stop = None
+            if 'destination_stop' not in attrs:
+                option.destination_stop = None
+            option.available_seats = max(0, option.total_seats - booked)
+            option.is_active = True
+            option.updated_at = timezone.now()
+            to_update.append(option)
+
+    if not dry_run and (to_create or to_update):
+        with transaction.atomic():
+            resolve_stops(to_create + to_update)
+            TransportOption.objects.bulk_create(to_create, batch_size=500)
+            TransportOption.objects.bulk_update(
+                to_update, list(WRITABLE_FIELDS) + ['available_seats', 'is_active', 'updated_at'],
+                batch_size=500
+            )
+        options_bulk_changed.send(sender=TransportOption, options=to_create + to_update)
+
+    return {
+        'rows': len(rows),
+        'created': len(to_create),
+        'updated': len(to_update),
+        'dry_run': dry_run,
+        'errors': [
+            {'row': index + 1, 'errors': detail}
+            for index, detail in sorted(errors.items())
+        ],
+    }
@@ -0,0 +1,205 @@
+"""
+Trending routes from exponentially decayed booking and view counters
+
+Counters use forward decay: an event at time t adds weight * 2^((t - EPOCH)
+/ half-life), so older activity fades relative to newer activity without
+ever rewriting stored scores. Scores are kept as their natural logarithm,
+which grows linearly with time instead of exponentially and so stays in
+float range for any half-life. Deltas are accumulated in memory, flushed to
+RoutePopularity periodically as log-space additions, and the per-process
+ranking is kept as a sorted list so the top K is a slice.
+"""
+import math
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from .indexes import InMemoryIndex
+
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def log_weight(weight, moment):
+    """
+    Log forward-decayed score of an event of ``weight`` at ``moment``, or
+    None for events that carry no weight
+    """
+    if weight <= 0:
+        return None
+    return math.log(weight) + decay_rate() * (moment - EPOCH).total_seconds()
+
+
+def log_add(a, b):
+    """
+    log(e^a + e^b) without leaving log space; None stands for no activity
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _log_add_expression(field, value):
+    value = Value(value)
+    high, low = Greatest(F(field), value), Least(F(field), value)
+    return Case(
+        When(**{f'{field}__isnull': True}, then=value),
+        default=high + Ln(1 + Exp(low - high))
+    )
+
+
+def current_value(log_score, moment=None):
+    """
+    Decayed activity at ``moment`` represented by a log forward-decayed score
+    """
+    if log_score is None:
+        return 0.0
+    moment = moment or timezone.now()
+    return math.exp(log_score - decay_rate() * (moment - EPOCH).total_seconds())
+
+
+class TrendingTracker(InMemoryIndex):
+    """
+    Per-process ranking of routes by decayed activity, plus unflushed deltas
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._scores = {}
+        self._ranked = []
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+
+    def load(self):
+        from .models import RoutePopularity
+
+        self.flush()
+        scores = {
+            str(option_id): score
+            for option_id, score in RoutePopularity.objects.filter(
+                transport_option__is_active=True,
+                transport_option__organizer__approval_status='approved'
+            ).exclude(log_score__isnull=True).values_list('transport_option_id', 'log_score')
+        }
+        self._scores = scores
+        self._ranked = sorted((-score, option_id) for option_id, score in scores.items())
+
+    def _bump(self, option_id, delta):
+        old = self._scores.get(option_id)
+        if old is not None:
+            index = bisect_left(self._ranked, (-old, option_id))
+            if index < len(self._ranked) and self._ranked[index] == (-old, option_id):
+                del self._ranked[index]
+        new = log_add(old, delta)
+        self._scores[option_id] = new
+        insort(self._ranked, (-new, option_id))
+
+    def record(self, option_id, weight, bookings=0, views=0, moment=None):
+        """
+        Count an event for a route and flush pending deltas when they are due
+        """
+        option_id = str(option_id)
+        delta = log_weight(weight, moment or timezone.now())
+        with self._lock:
+            pending = self._pending.setdefault(option_id, [None, 0, 0])
+            pending[0] = log_add(pending[0], delta)
+            pending[1] += bookings
+            pending[2] += views
+            if self.is_built and delta is not None:
+                self._bump(option_id, delta)
+        if time.monotonic() - self._flushed_at >= settings.TRENDING_FLUSH_SECONDS:
+            # Never write other requests' deltas inside this caller's transaction
+            if transaction.get_connection().in_atomic_block:
+                transaction.on_commit(self.flush)
+            else:
+                self.flush()
+
+    def record_booking(self, option_id, moment=None):
+        self.record(option_id, settings.TRENDING_BOOKING_WEIGHT, bookings=1, moment=moment)
+
+    def record_view(self, option_id, moment=None):
+        self.record(option_id, settings.TRENDING_VIEW_WEIGHT, views=1, moment=moment)
+
+    def discard(self, option_id):
+        option_id = str(option_id)
+        with self._lock:
+            self._pending.pop(option_id, None)
+            score = self._scores.pop(option_id, None)
+            if score is not None:
+                index = bisect_left(self._ranked, (-score, option_id))
+                if index < len(self._ranked) and self._ranked[index] == (-score, option_id):
+                    del self._ranked[index]
+
+    def flush(self):
+        """
+        Add pending deltas to the persisted counters
+        """
+        from .models import TransportOption
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            existing = set(
+                str(option_id) for option_id in TransportOption.objects.filter(
+                    pk__in=list(pending)
+                ).values_list('pk', flat=True)
+            )
+            self._write(pending, existing)
+        except Exception:
+            self._restore(pending)
+            raise
+        return len(existing)
+
+    def _write(self, pending, existing):
+        from .models import RoutePopularity
+
+        with transaction.atomic():
+            RoutePopularity.objects.bulk_create(
+                [RoutePopularity(transport_option_id=option_id) for option_id in existing],
+                ignore_conflicts=True
+            )
+            for option_id in existing:
+                log_score, bookings, views = pending[option_id]
+                fields = {
+                    'bookings_count': F('bookings_count') + bookings,
+                    'views_count': F('views_count') + views,
+                    'updated_at': timezone.now(),
+                }
+                if log_score is not None:
+                    fields['log_score'] = _log_add_expression('log_score', log_score)
+                RoutePopularity.objects.filter(transport_option_id=option_id).update(**fields)
+
+    def _restore(self, pending):
+        # Put unwritten deltas back so the next flush retries them
+        with self._lock:
+            for option_id, (log_score, bookings, views) in pending.items():
+                current = self._pending.setdefault(option_id, [None, 0, 0])
+                current[0] = log_add(current[0], log_score)
+                current[1] += bookings
+                current[2] += views
+
+    def top(self, k):
+        """
+        The ``k`` highest-scoring (option_id, log_score) pairs, best first
+        """
+        self.ensure_built()
+        return [(option_id, -score) for score, option_id in self._ranked[:k]]
+
+
+trending = TrendingTracker()
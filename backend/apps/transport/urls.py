@@ -12,6 +12,25 @@ urlpatterns = [
     path('options/<uuid:pk>/update/', views.TransportOptionUpdateView.as_view(), name='transport-option-update'),
     path('options/<uuid:pk>/delete/', views.TransportOptionDeleteView.as_view(), name='transport-option-delete'),
     path('options/<uuid:pk>/stats/', views.transport_option_stats, name='transport-option-stats'),
+    path('options/import/', views.import_timetable, name='transport-options-import'),
+    path('options/bulk/', views.bulk_schedule_operation, name='transport-options-bulk'),
+    
+    # Stop catalog
+    path('stops/', views.StopListView.as_view(), name='stops-list'),
+    path('autocomplete/', views.location_autocomplete, name='location-autocomplete'),
+    
+    # Departure board
+    path('departures/', views.departure_board_view, name='departure-board'),
+    
+    # Trending routes
+    path('trending/', views.trending_routes, name='trending-routes'),
+    
+    # Journey planning
+    path('journeys/', views.plan_journey, name='journey-plan'),
+    
+    # Nearby search endpoints
+    path('nearby/departures/', views.nearby_departures, name='nearby-departures'),
+    path('nearby/vehicles/', views.nearby_vehicles, name='nearby-vehicles'),
     
     # Organizer transport options
     path('organizer/<uuid:organizer_id>/options/', views.OrganizerTransportOptionsView.as_view(), name='organizer-transport-options'),
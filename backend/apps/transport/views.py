@@ -3,37 +3,95 @@ Views for Transport app
 """
 from rest_framework import generics, status, permissions, filters
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Avg
+from django.conf import settings
+from django.db.models import Q, Avg, F
 from django.utils import timezone
+import uuid
+from datetime import time, timedelta
 
-from .models import TransportOption, TripUpdate, Review
+from .models import TransportOption, TripUpdate, Review, RoutePerformance, Stop
 from .serializers import (
-    TransportOptionSerializer, TransportOptionCreateSerializer,
+    TransportOptionSerializer, TransportOptionListSerializer, TransportOptionCreateSerializer,
+    RoutePerformanceSerializer, DepartureBoardQuerySerializer, JourneyQuerySerializer, StopSerializer,
+    AutocompleteQuerySerializer, RankingQuerySerializer, ScheduleOperationSerializer,
     TripUpdateSerializer, TripUpdateCreateSerializer,
-    ReviewSerializer, ReviewCreateSerializer
+    ReviewSerializer, ReviewCreateSerializer, NearbyQuerySerializer
 )
 from .filters import TransportOptionFilter
+from .spatial import departure_index, vehicle_index
+from .autocomplete import place_index
+from .departures import departure_board
+from .trending import trending, current_value
+from . import eta, facets, journeys, ranking, schedule, timetable
 
 
 class TransportOptionListView(generics.ListAPIView):
     """
     List all active transport options with filtering
     """
-    serializer_class = TransportOptionSerializer
+    serializer_class = TransportOptionListSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = TransportOptionFilter
     search_fields = ['route_name', 'departure_location', 'destination']
-    ordering_fields = ['price', 'departure_time', 'created_at']
+    ordering_fields = [
+        'price', 'departure_time', 'created_at', 'rating_average', 'on_time_rate',
+        'cancellation_rate', 'mean_delay_minutes', 'p90_delay_minutes'
+    ]
     ordering = ['departure_time']
     
     def get_queryset(self):
         return TransportOption.objects.filter(
             is_active=True,
             organizer__approval_status='approved'
+        ).annotate(
+            on_time_rate=F('performance__on_time_rate'),
+            cancellation_rate=F('performance__cancellation_rate'),
+            mean_delay_minutes=F('performance__mean_delay_minutes'),
+            p90_delay_minutes=F('performance__p90_delay_minutes')
         ).select_related('organizer', 'organizer__user').prefetch_related('reviews')
+    
+    def list(self, request, *args, **kwargs):
+        names = [name.strip() for name in request.query_params.get('facets', '').split(',') if name.strip()]
+        unknown = [name for name in names if name not in facets.FACETS]
+        if unknown:
+            return Response(
+                {'error': f"Unknown facets: {', '.join(unknown)}. Must be one of {list(facets.FACETS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if request.query_params.get('ordering') == 'relevance':
+            response = self.ranked_list(request)
+        else:
+            response = super().list(request, *args, **kwargs)
+        if names:
+            response.data['facets'] = facets.cached_facets(
+                names, request.query_params, lambda: self.filter_queryset(self.get_queryset())
+            )
+        return response
+    
+    def ranked_list(self, request):
+        """
+        Page through the top options by relevance score
+        """
+        query = RankingQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        ranked = ranking.rank(
+            self.filter_queryset(self.get_queryset()),
+            terms=filters.SearchFilter().get_search_terms(request),
+            departs_near=query.validated_data.get('departs_near')
+        )
+        page = self.paginate_queryset(ranked)
+        options = self.get_queryset().in_bulk([option_id for option_id, _ in page])
+        results = []
+        for option_id, score in page:
+            option = options[option_id]
+            option.relevance_score = score
+            results.append(option)
+        serializer = self.get_serializer(results, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class TransportOptionDetailView(generics.RetrieveAPIView):
@@ -48,6 +106,11 @@ class TransportOptionDetailView(generics.RetrieveAPIView):
             is_active=True,
             organizer__approval_status='approved'
         ).select_related('organizer', 'organizer__user').prefetch_related('reviews')
+    
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        trending.record_view(kwargs['pk'])
+        return response
 
 
 class TransportOptionCreateView(generics.CreateAPIView):
@@ -112,6 +175,20 @@ class OrganizerTransportOptionsView(generics.ListAPIView):
                 return TransportOption.objects.none()
 
 
+class StopListView(generics.ListAPIView):
+    """
+    List stops in the location catalog
+    """
+    serializer_class = StopSerializer
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['name', 'aliases__name']
+    ordering = ['name']
+    
+    def get_queryset(self):
+        return Stop.objects.filter(is_active=True).prefetch_related('aliases')
+
+
 class TripUpdateListView(generics.ListAPIView):
     """
     List trip updates for a transport option
@@ -140,6 +217,8 @@ class TripUpdateCreateView(generics.CreateAPIView):
             organizer = self.request.user.organizer_profile
             if organizer.approval_status != 'approved':
                 raise PermissionError("Only approved organizers can create trip updates.")
+            if serializer.validated_data['transport_option'].organizer_id != organizer.pk:
+                raise PermissionDenied("You can only post updates for your own routes.")
             serializer.save(organizer=organizer)
         except AttributeError:
             raise PermissionError("Only transport organizers can create trip updates.")
@@ -191,7 +270,7 @@ def transport_option_stats(request, pk):
     Get statistics for a transport option
     """
     try:
-        transport_option = TransportOption.objects.get(pk=pk)
+        transport_option = TransportOption.objects.select_related('performance').get(pk=pk)
         
         # Calculate average rating
         avg_rating = Review.objects.filter(
@@ -206,16 +285,278 @@ def transport_option_stats(request, pk):
             booking_status='completed'
         ).count()
         
+        # Predict arrival from the latest position of a trip in progress
+        predicted_arrival = None
+        latest_position = vehicle_index.latest(transport_option.pk)
+        if latest_position:
+            lat, lng, position = latest_position
+            predicted = eta.predictor.predict(
+                transport_option, {'lat': lat, 'lng': lng}, position['reported_at']
+            )
+            predicted_arrival = predicted.isoformat() if predicted else None
+        
+        # Reliability rollups maintained by the performance analytics job
+        route_performance = getattr(transport_option, 'performance', None)
+        organizer_performance = RoutePerformance.objects.filter(
+            organizer_id=transport_option.organizer_id,
+            transport_option__isnull=True
+        ).first()
+        
         return Response({
             'transport_option_id': str(transport_option.id),
             'route_name': transport_option.route_name,
             'average_rating': round(avg_rating, 2),
             'total_reviews': total_reviews,
             'total_bookings': total_bookings,
-            'occupancy_rate': round((transport_option.total_seats - transport_option.available_seats) / transport_option.total_seats * 100, 2) if transport_option.total_seats > 0 else 0
+            'occupancy_rate': round((transport_option.total_seats - transport_option.available_seats) / transport_option.total_seats * 100, 2) if transport_option.total_seats > 0 else 0,
+            'predicted_arrival': predicted_arrival,
+            'performance': RoutePerformanceSerializer(route_performance).data if route_performance else None,
+            'organizer_performance': RoutePerformanceSerializer(organizer_performance).data if organizer_performance else None
         })
     except TransportOption.DoesNotExist:
         return Response(
             {'error': 'Transport option not found'}, 
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+
+
+def _nearby(request, index):
+    """
+    Run a radius or k-nearest query against a spatial index
+    """
+    query = NearbyQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    
+    if 'radius_km' in params:
+        matches = index.within(params['lat'], params['lng'], params['radius_km'])[:params['limit']]
+    else:
+        matches = index.nearest(
+            params['lat'], params['lng'], params['limit'], settings.SPATIAL_MAX_RADIUS_KM
+        )
+    
+    results = [
+        dict(payload, distance_km=round(distance, 3))
+        for distance, _, payload in matches
+    ]
+    return Response({'count': len(results), 'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def nearby_departures(request):
+    """
+    Active transport options departing near a point
+    """
+    return _nearby(request, departure_index)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def nearby_vehicles(request):
+    """
+    Trips in progress whose latest reported position is near a point
+    """
+    return _nearby(request, vehicle_index)
+
+
+def _approved_organizer(user):
+    """
+    The approved organizer profile of a user, or None
+    """
+    organizer = getattr(user, 'organizer_profile', None)
+    if organizer is None or organizer.approval_status != 'approved':
+        return None
+    return organizer
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_timetable(request):
+    """
+    Bulk create or re-sync an organizer's routes from a CSV or JSON timetable
+    """
+    organizer = _approved_organizer(request.user)
+    if organizer is None:
+        return Response(
+            {'error': 'Only approved organizers can import timetables.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    upsert = request.query_params.get('upsert', '').lower() in ('1', 'true', 'yes')
+    dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    try:
+        upload = request.FILES.get('file')
+        if upload is not None:
+            rows = timetable.parse_csv(upload.read().decode('utf-8-sig'))
+        else:
+            rows = timetable.parse_json(request.data)
+        report = timetable.import_timetable(organizer, rows, upsert=upsert, dry_run=dry_run)
+    except UnicodeDecodeError:
+        return Response({'error': 'CSV timetables must be UTF-8 encoded.'}, status=status.HTTP_400_BAD_REQUEST)
+    except timetable.TimetableError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    response_status = status.HTTP_200_OK if dry_run or not report['errors'] else status.HTTP_207_MULTI_STATUS
+    return Response(report, status=response_status)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_schedule_operation(request):
+    """
+    Change prices, activate, deactivate or clone many of an organizer's routes at once
+    """
+    organizer = _approved_organizer(request.user)
+    if organizer is None:
+        return Response(
+            {'error': 'Only approved organizers can update their schedule.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    serializer = ScheduleOperationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    params = dict(serializer.validated_data)
+    operation = params.pop('operation')
+    ids = params.pop('ids', None)
+    filters = params.pop('filters', None)
+    if operation != 'clone':
+        params.pop('activate')
+    
+    try:
+        result = schedule.apply(
+            request.user, organizer, operation, ids=ids, filters=filters,
+            request_meta={
+                'ip_address': request.META.get('REMOTE_ADDR'),
+                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+            },
+            **params
+        )
+    except schedule.ScheduleError as exc:
+        return Response({'error': exc.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def location_autocomplete(request):
+    """
+    Stop suggestions for a partially typed location, served from memory
+    """
+    query = AutocompleteQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    results = place_index.suggest(query.validated_data['q'], query.validated_data['limit'])
+    return Response({'count': len(results), 'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def trending_routes(request):
+    """
+    Routes with the most recent booking and view activity
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'limit must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Over-fetch a little in case some routes were deactivated since ranking
+    ranked = trending.top(limit * 2)
+    options = TransportOption.objects.filter(
+        is_active=True,
+        organizer__approval_status='approved'
+    ).select_related('organizer', 'organizer__user').prefetch_related('reviews').in_bulk(
+        [option_id for option_id, _ in ranked]
+    )
+    now = timezone.now()
+    results = []
+    for option_id, log_score in ranked:
+        option = options.get(uuid.UUID(option_id))
+        if option is None:
+            continue
+        row = TransportOptionSerializer(option).data
+        row['trending_score'] = round(current_value(log_score, now), 4)
+        results.append(row)
+        if len(results) == limit:
+            break
+    return Response({'count': len(results), 'results': results})
+
+
+def _schedule_start(params):
+    """
+    Service date and earliest time for a schedule query, defaulting to now
+    """
+    now = timezone.localtime()
+    service_date = params.get('date') or now.date()
+    after = params.get('after')
+    if after is None:
+        after = now.time() if service_date == now.date() else time.min
+    return service_date, after, after.hour * 3600 + after.minute * 60 + after.second
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def departure_board_view(request):
+    """
+    Upcoming departures from a location, served from the in-memory schedule index
+    """
+    query = DepartureBoardQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    
+    board_date, after, after_seconds = _schedule_start(params)
+    departures = departure_board.board(
+        params.get('location'), board_date.weekday(), after_seconds, params['within'], params['limit'],
+        stop_id=params.get('stop')
+    )
+    results = []
+    for departure, is_next_day in departures:
+        row = departure.as_dict()
+        row['date'] = (board_date + timedelta(days=1) if is_next_day else board_date).isoformat()
+        results.append(row)
+    return Response({
+        'location': params.get('location'),
+        'stop': params.get('stop'),
+        'date': board_date.isoformat(),
+        'after': after.strftime('%H:%M'),
+        'count': len(results),
+        'results': results
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def plan_journey(request):
+    """
+    Fastest or cheapest journey between two stops, with transfers
+    """
+    query = JourneyQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    
+    service_date, after, after_seconds = _schedule_start(params)
+    origin = departure_board.resolve_key(params.get('origin'), params.get('origin_stop'))
+    destination = departure_board.resolve_key(params.get('destination'), params.get('destination_stop'))
+    rides = journeys.plan(
+        origin, destination, service_date.weekday(), after_seconds,
+        optimize=params['optimize'], max_legs=params.get('max_legs')
+    )
+    if not rides:
+        return Response({'error': 'No journey found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    legs = []
+    for ride in rides:
+        leg = ride.as_dict()
+        leg['date'] = service_date.isoformat()
+        legs.append(leg)
+    return Response({
+        'date': service_date.isoformat(),
+        'after': after.strftime('%H:%M'),
+        'optimize': params['optimize'],
+        'departure_time': legs[0]['departure_time'],
+        'arrival_time': legs[-1]['arrival_time'],
+        'duration_minutes': (rides[-1].arrival_seconds - rides[0].seconds) // 60,
+        'transfers': len(rides) - 1,
+        'total_price': str(sum(ride.price for ride in rides)),
+        'legs': legs
+    })
\ No newline at end of file
@@ -3,7 +3,7 @@ Django settings for bui_transport project.
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'apps.bookings.middleware.AdmissionControlMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -206,6 +207,137 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Stop catalog
+# Words ignored when matching free-text location names to stops
+STOP_NAME_IGNORED_WORDS = config('STOP_NAME_IGNORED_WORDS', default='bui', cast=lambda v: [s.strip().lower() for s in v.split(',') if s.strip()])
+
+# Transport in-memory indexes
+# Seconds before a per-process index is rebuilt to pick up writes from other processes
+TRANSPORT_INDEX_MAX_AGE = config('TRANSPORT_INDEX_MAX_AGE', default=300, cast=int)
+# Grid cell size for spatial queries (0.01 degrees is roughly 1.1 km)
+SPATIAL_GRID_CELL_DEGREES = config('SPATIAL_GRID_CELL_DEGREES', default=0.01, cast=float)
+SPATIAL_MAX_RADIUS_KM = config('SPATIAL_MAX_RADIUS_KM', default=25, cast=float)
+# Vehicle positions older than this are no longer reported as trips in progress
+VEHICLE_POSITION_TTL_MINUTES = config('VEHICLE_POSITION_TTL_MINUTES', default=30, cast=int)
+
+# Location autocomplete
+# Bookings from this many days back rank autocomplete suggestions
+AUTOCOMPLETE_POPULARITY_DAYS = config('AUTOCOMPLETE_POPULARITY_DAYS', default=90, cast=int)
+
+# Listing facets
+# Upper bounds of the price bands counted by the listing facets
+FACET_PRICE_BANDS = config('FACET_PRICE_BANDS', default='500,1000,2000', cast=lambda v: [int(s) for s in v.split(',') if s.strip()])
+FACET_CACHE_SECONDS = config('FACET_CACHE_SECONDS', default=300, cast=int)
+
+# Bulk timetable import
+TIMETABLE_IMPORT_MAX_ROWS = config('TIMETABLE_IMPORT_MAX_ROWS', default=5000, cast=int)
+
+# Relevance ranking
+# Filtered routes scored per ranked search, best text matches first
+RANKING_CANDIDATE_BUDGET = config('RANKING_CANDIDATE_BUDGET', default=500, cast=int)
+RANKING_MAX_RESULTS = config('RANKING_MAX_RESULTS', default=100, cast=int)
+# Departure time gap at which the time proximity score falls to 1/e
+RANKING_TIME_SCALE_MINUTES = config('RANKING_TIME_SCALE_MINUTES', default=60, cast=int)
+
+# Trending routes
+# Activity loses half its weight in the trending ranking after this long
+TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=72, cast=float)
+TRENDING_BOOKING_WEIGHT = config('TRENDING_BOOKING_WEIGHT', default=5, cast=float)
+TRENDING_VIEW_WEIGHT = config('TRENDING_VIEW_WEIGHT', default=1, cast=float)
+# Seconds between writes of accumulated counters to the database
+TRENDING_FLUSH_SECONDS = config('TRENDING_FLUSH_SECONDS', default=60, cast=int)
+
+# Journey planning
+JOURNEY_MAX_LEGS = config('JOURNEY_MAX_LEGS', default=3, cast=int)
+# Minimum time between arriving on one leg and departing on the next
+JOURNEY_MIN_TRANSFER_MINUTES = config('JOURNEY_MIN_TRANSFER_MINUTES', default=5, cast=int)
+
+# ETA prediction
+ETA_MODEL_PATH = config('ETA_MODEL_PATH', default=str(BASE_DIR / 'var' / 'eta_model.json'))
+ETA_HISTORY_DAYS = config('ETA_HISTORY_DAYS', default=90, cast=int)
+ETA_TIME_BIN_MINUTES = config('ETA_TIME_BIN_MINUTES', default=30, cast=int)
+ETA_DEFAULT_SPEED_KMH = config('ETA_DEFAULT_SPEED_KMH', default=25, cast=float)
+ETA_ARRIVAL_RADIUS_KM = config('ETA_ARRIVAL_RADIUS_KM', default=0.2, cast=float)
+# Seconds between checks for a retrained model file
+ETA_MODEL_CHECK_INTERVAL = config('ETA_MODEL_CHECK_INTERVAL', default=5, cast=int)
+
+# Route performance analytics
+ROUTE_PERFORMANCE_WINDOW_DAYS = config('ROUTE_PERFORMANCE_WINDOW_DAYS', default=30, cast=int)
+ROUTE_ON_TIME_THRESHOLD_MINUTES = config('ROUTE_ON_TIME_THRESHOLD_MINUTES', default=5, cast=int)
+
+# Booking availability calendar
+BOOKING_CALENDAR_MAX_DAYS = config('BOOKING_CALENDAR_MAX_DAYS', default=60, cast=int)
+BOOKING_CALENDAR_CACHE_SECONDS = config('BOOKING_CALENDAR_CACHE_SECONDS', default=300, cast=int)
+
+# Multi-date bookings
+BULK_BOOKING_MAX_DATES = config('BULK_BOOKING_MAX_DATES', default=120, cast=int)
+
+# Waitlist
+# Minutes a booking promoted from the waitlist has to be paid before its seats are released
+BOOKING_PENDING_EXPIRY_MINUTES = config('BOOKING_PENDING_EXPIRY_MINUTES', default=30, cast=int)
+
+# Seat holds
+# Minutes seats stay reserved between choosing a trip and paying
+SEAT_HOLD_MINUTES = config('SEAT_HOLD_MINUTES', default=10, cast=int)
+SEAT_HOLD_MAX_ACTIVE = config('SEAT_HOLD_MAX_ACTIVE', default=3, cast=int)
+# Upper bound on how long a process trusts its cached held-seat totals
+SEAT_HOLD_CACHE_SECONDS = config('SEAT_HOLD_CACHE_SECONDS', default=5, cast=int)
+
+# Booking admission control
+ADMISSION_CONTROL_ENABLED = config('ADMISSION_CONTROL_ENABLED', default=True, cast=bool)
+# LocalAdmissionBackend queues per process; CacheAdmissionBackend shares queues through the cache
+ADMISSION_BACKEND = config('ADMISSION_BACKEND', default='apps.bookings.admission.LocalAdmissionBackend')
+# Booking requests admitted per second for each route, and payment requests per second overall
+ADMISSION_ROUTE_RATE = config('ADMISSION_ROUTE_RATE', default=5, cast=float)
+ADMISSION_PAYMENT_RATE = config('ADMISSION_PAYMENT_RATE', default=20, cast=float)
+# Requests admitted back to back on an idle queue before the rate applies
+ADMISSION_BURST = config('ADMISSION_BURST', default=10, cast=int)
+# Requests that would wait longer than this are turned away instead of queued
+ADMISSION_MAX_WAIT_SECONDS = config('ADMISSION_MAX_WAIT_SECONDS', default=120, cast=int)
+# Seconds an admitted queue ticket stays usable
+ADMISSION_TICKET_TTL_SECONDS = config('ADMISSION_TICKET_TTL_SECONDS', default=60, cast=int)
+
+# Trip cancellations
+# Bookings cancelled per transaction when a trip is cancelled
+TRIP_CANCELLATION_CHUNK_SIZE = config('TRIP_CANCELLATION_CHUNK_SIZE', default=200, cast=int)
+# Run cancellations on a background thread pool; inline runs them in the request that cancels the trip
+TRIP_CANCELLATION_RUN_INLINE = config('TRIP_CANCELLATION_RUN_INLINE', default=False, cast=bool)
+TRIP_CANCELLATION_WORKERS = config('TRIP_CANCELLATION_WORKERS', default=1, cast=int)
+
+# Refund processing
+# Refund requests locked and updated per batch when processing in bulk
+REFUND_BATCH_SIZE = config('REFUND_BATCH_SIZE', default=500, cast=int)
+
+# Boarding passes
+# Secret the per-organizer boarding pass keys are derived from; changing it reissues every key
+BOARDING_PASS_SECRET = config('BOARDING_PASS_SECRET', default=SECRET_KEY)
+BOARDING_SYNC_MAX_ITEMS = config('BOARDING_SYNC_MAX_ITEMS', default=1000, cast=int)
+
+# Notifications
+# Notifications inserted per batch when fanning out
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=500, cast=int)
+# Fan out on a background thread pool; when off, fan-out runs in the request
+NOTIFICATION_FANOUT_ASYNC = config('NOTIFICATION_FANOUT_ASYNC', default=True, cast=bool)
+NOTIFICATION_FANOUT_WORKERS = config('NOTIFICATION_FANOUT_WORKERS', default=2, cast=int)
+
+# Notification delivery
+# One backend per channel: apps.communications.delivery.LocalPushBackend (stub
+# push gateway), .EmailBackend (through EMAIL_BACKEND) or .ConsoleBackend
+NOTIFICATION_BACKENDS = config(
+    'NOTIFICATION_BACKENDS', default='apps.communications.delivery.LocalPushBackend', cast=Csv()
+)
+# Notifications claimed per batch and how long a worker holds a claimed batch
+NOTIFICATION_DELIVERY_BATCH_SIZE = config('NOTIFICATION_DELIVERY_BATCH_SIZE', default=500, cast=int)
+NOTIFICATION_DELIVERY_LEASE_SECONDS = config('NOTIFICATION_DELIVERY_LEASE_SECONDS', default=300, cast=int)
+# Failed deliveries are retried after a doubling delay, up to a limit
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=8, cast=int)
+NOTIFICATION_RETRY_BASE_SECONDS = config('NOTIFICATION_RETRY_BASE_SECONDS', default=30, cast=int)
+NOTIFICATION_RETRY_MAX_SECONDS = config('NOTIFICATION_RETRY_MAX_SECONDS', default=3600, cast=int)
+
+# CSV/NDJSON exports of list endpoints
+# Rows fetched from the database per round trip while streaming
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 # Email Configuration (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 